@@ -1,6 +1,10 @@
 from database import SessionLocal
+from migrations import run_migrations
 from models import User
 
+# Same schema upgrade main.py runs at startup; User rows need the version column
+run_migrations()
+
 sa = SessionLocal()
 manager = User(username="admin", password="admin123", role="manager")
 sa.add(manager)
@@ -1,7 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
 from datetime import date
-from models import Medicine
+from virtual_tree import VirtualTreeview
+from events import MedicinesEdited, StockChanged
+
+# Past this many touched medicines one full reload beats per-id queries
+BULK_TOUCH_LIMIT = 500
 
 
 class AlertMixin:
@@ -24,8 +28,11 @@ class AlertMixin:
         table_frame = ttk.LabelFrame(frame, text="Alerts", padding=15)
         table_frame.pack(fill="both", expand=True)
 
-        columns = ("Medicine", "Type", "Quantity Left", "Expiry Date", "Days Left", "Alert")
-        self.alerts_tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        # The medicine id keys the rows but is not shown
+        columns = ("ID", "Medicine", "Type", "Quantity Left", "Expiry Date", "Days Left", "Alert")
+        self.alerts_tree = VirtualTreeview(
+            table_frame, columns=columns, displaycolumns=columns[1:], show="headings"
+        )
         self.alerts_tree.pack(side="left", fill="both", expand=True)
 
         widths = {
@@ -37,7 +44,7 @@ class AlertMixin:
             "Alert": 380,
         }
 
-        for col in columns:
+        for col in columns[1:]:
             self.alerts_tree.heading(col, text=col)
             self.alerts_tree.column(col, anchor="center", width=widths[col])
 
@@ -47,46 +54,25 @@ class AlertMixin:
 
         self.load_alerts()
 
+    def alerts_tab_events(self):
+        return [((StockChanged, MedicinesEdited), self.load_alerts)]
+
     def load_alerts(self):
-        for row in self.alerts_tree.get_children():
-            self.alerts_tree.delete(row)
-
-        medicines = self.session.query(Medicine).all()
-        today = date.today()
-
-        for med in medicines:
-            quantity = med.quantity or 0
-            med_type = (med.type or "").strip().lower()
-            threshold = 50 if med_type in ("tablet", "capsule") else 30
-
-            expiry_date = med.expiry_date
-            days_left = "N/A"
-            alert_messages = []
-
-            if quantity < threshold:
-                alert_messages.append(f"Low stock (threshold < {threshold})")
-
-            if expiry_date:
-                delta_days = (expiry_date - today).days
-                days_left = str(delta_days)
-
-                if delta_days < 0:
-                    alert_messages.append("Expired")
-                elif delta_days <= 90:
-                    alert_messages.append(f"Expiring soon ({delta_days} day(s) left)")
-            else:
-                alert_messages.append("No expiry date")
-
-            if alert_messages:
-                self.alerts_tree.insert(
-                    "",
-                    "end",
-                    values=(
-                        med.name,
-                        med.type,
-                        quantity,
-                        expiry_date if expiry_date else "-",
-                        days_left,
-                        " | ".join(alert_messages)
-                    )
-                )
+        self.db_worker.submit(
+            "alerts",
+            self.compute_alert_rows,
+            self.alerts_tree.set_rows,
+            label="Loading alerts",
+        )
+
+    def compute_alert_rows(self, session, job):
+        return self.services.alert_rows(session, date.today())
+
+    def refresh_medicine_alerts(self, medicine_ids):
+        if self.alert_engine is None:
+            return
+        medicine_ids = set(medicine_ids)
+        if len(medicine_ids) > BULK_TOUCH_LIMIT:
+            self.alert_engine.start()
+        else:
+            self.alert_engine.touch(medicine_ids)
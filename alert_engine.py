@@ -0,0 +1,134 @@
+from datetime import date, datetime, time
+import services
+
+
+class AlertEngine:
+    """Keeps the set of alerting medicines up to date without rescanning the catalog.
+
+    One alert query runs at start-up. After that, ``touch(ids)`` re-evaluates
+    only the medicines a write affected. Queries run on the DB worker, one at a
+    time; ids touched while the start-up load or another evaluation is still
+    running are queued and evaluated after it. The only time-driven changes
+    are expiry crossings (entering the warning window, or expiring), so a
+    single Tk timer is armed for the next such day. When it fires, only
+    medicines whose crossing fell between the last evaluated day and today
+    are re-evaluated. Queries go through ``backend`` (``services`` or, in
+    client mode, ``api_client.RemoteServices``).
+    """
+
+    def __init__(self, root, db_worker, on_change=None, backend=services):
+        self.root = root
+        self.db_worker = db_worker
+        self.on_change = on_change
+        self.backend = backend
+
+        self.alerts = {}
+        self._today = None
+        self._timer = None
+        # Touched ids not evaluated yet, and whether a query is on the worker
+        self._dirty = set()
+        self._running = False
+
+    @property
+    def count(self):
+        return len(self.alerts)
+
+    def start(self):
+        self._running = True
+        self._submit(self._load_all, self._on_loaded, lambda error: self._on_failed((), error))
+
+    def stop(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def touch(self, medicine_ids):
+        self._dirty.update(int(med_id) for med_id in medicine_ids if med_id is not None)
+        self._evaluate()
+
+    def _evaluate(self):
+        # Before the start-up load finishes, or while a query runs, ids wait in _dirty
+        if not self._dirty or self._running or self._today is None:
+            return
+
+        medicine_ids, self._dirty = self._dirty, set()
+        today = self._today
+        self._running = True
+        self._submit(
+            lambda session, job: (
+                self.backend.alert_rows(session, today, medicine_ids),
+                self.backend.next_alert_crossing(session, today),
+            ),
+            lambda result: self._on_evaluated(medicine_ids, result),
+            lambda error: self._on_failed(medicine_ids, error),
+        )
+
+    def _on_evaluated(self, medicine_ids, result):
+        rows, next_crossing = result
+        for med_id in medicine_ids:
+            self.alerts.pop(med_id, None)
+        self.alerts.update({row[0]: row[-1] for row in rows})
+
+        self._schedule(next_crossing)
+        self._publish()
+        self._done()
+
+    def _on_failed(self, medicine_ids, error):
+        # Keep the ids so the next touch retries them
+        self._dirty.update(medicine_ids)
+        self._running = False
+        raise error
+
+    def _done(self):
+        self._running = False
+        self._evaluate()
+
+    def _submit(self, work, on_done, on_error=None):
+        # Not cancellable: a dropped result would leave the engine waiting forever
+        self.db_worker.submit(
+            "alert_engine", work, on_done, on_error=on_error, label="Checking alerts", cancellable=False,
+        )
+
+    # ---------------- Loading ----------------
+    def _load_all(self, session, job):
+        today = date.today()
+        alerts = {row[0]: row[-1] for row in self.backend.alert_rows(session, today)}
+        return today, alerts, self.backend.next_alert_crossing(session, today)
+
+    def _on_loaded(self, result):
+        self._today, self.alerts, next_crossing = result
+        self._schedule(next_crossing)
+        self._publish()
+        self._done()
+
+    # ---------------- Day Rollover ----------------
+    def _schedule(self, crossing_day):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        if crossing_day is None:
+            return
+
+        delay = datetime.combine(crossing_day, time.min) - datetime.now()
+        delay_ms = max(int(delay.total_seconds() * 1000), 0) + 1000
+        self._timer = self.root.after(delay_ms, self._on_day_rollover)
+
+    def _on_day_rollover(self):
+        self._timer = None
+        previous, today = self._today, date.today()
+        self._submit(
+            lambda session, job: self.backend.medicines_crossing(session, previous, today),
+            lambda result: self._on_rolled_over(previous, today, result),
+        )
+
+    def _on_rolled_over(self, previous, today, result):
+        crossed, next_crossing = result
+        self._today = max(previous, today)
+        if crossed:
+            self.touch(crossed)
+        else:
+            self._schedule(next_crossing)
+
+    def _publish(self):
+        if self.on_change is not None:
+            self.on_change(self.count)
@@ -0,0 +1,122 @@
+"""Alert rules: which medicines are low on stock or near expiry, and when that changes.
+
+Tk-free so the API server can evaluate alerts for client-mode terminals;
+the Alerts tab and AlertEngine reach these through ``services``.
+"""
+from datetime import timedelta
+from sqlalchemy import func, case, cast, or_, and_, Integer
+from models import Medicine
+
+# ---------------- ALERT RULES ----------------
+LOW_STOCK_THRESHOLDS = {"tablet": 50, "capsule": 50}
+DEFAULT_LOW_STOCK_THRESHOLD = 30
+EXPIRY_WARNING_DAYS = 90
+
+
+def alert_columns(today):
+    """SQL expressions for the per-medicine threshold, days left and alert state."""
+    med_type = func.lower(func.trim(func.coalesce(Medicine.type, "")))
+    threshold = case(
+        *[(med_type == name, value) for name, value in LOW_STOCK_THRESHOLDS.items()],
+        else_=DEFAULT_LOW_STOCK_THRESHOLD,
+    )
+    days_left = cast(func.julianday(Medicine.expiry_date) - func.julianday(today.isoformat()), Integer)
+    expiry_state = case(
+        (Medicine.expiry_date.is_(None), "none"),
+        (Medicine.expiry_date < today, "expired"),
+        (Medicine.expiry_date <= today + timedelta(days=EXPIRY_WARNING_DAYS), "soon"),
+        else_=None,
+    )
+    return threshold, days_left, expiry_state
+
+
+def alert_filter(today, threshold):
+    # Each OR branch can be served by ix_medicines_quantity or ix_medicines_expiry_date
+    max_threshold = max([DEFAULT_LOW_STOCK_THRESHOLD, *LOW_STOCK_THRESHOLDS.values()])
+    return or_(
+        Medicine.expiry_date.is_(None),
+        Medicine.expiry_date <= today + timedelta(days=EXPIRY_WARNING_DAYS),
+        Medicine.quantity.is_(None),
+        and_(Medicine.quantity < max_threshold, Medicine.quantity < threshold),
+    )
+
+
+def format_alert_messages(quantity, threshold, expiry_state, days_left):
+    messages = []
+    if quantity < threshold:
+        messages.append(f"Low stock (threshold < {threshold})")
+    if expiry_state == "none":
+        messages.append("No expiry date")
+    elif expiry_state == "expired":
+        messages.append("Expired")
+    elif expiry_state == "soon":
+        messages.append(f"Expiring soon ({days_left} day(s) left)")
+    return messages
+
+
+def query_alerts(session, today, medicine_ids=None):
+    """Return (id, name, type, quantity, expiry, days_left, message) for alerting medicines only."""
+    threshold, days_left, expiry_state = alert_columns(today)
+    query = (
+        session.query(
+            Medicine.id,
+            Medicine.name,
+            Medicine.type,
+            func.coalesce(Medicine.quantity, 0),
+            Medicine.expiry_date,
+            threshold,
+            days_left,
+            expiry_state,
+        )
+        .filter(alert_filter(today, threshold))
+        .order_by(Medicine.id.asc())
+    )
+    if medicine_ids is not None:
+        query = query.filter(Medicine.id.in_(list(medicine_ids)))
+
+    rows = []
+    for med_id, name, med_type, quantity, expiry_date, limit, days, state in query:
+        messages = format_alert_messages(quantity, limit, state, days)
+        if messages:
+            rows.append((
+                med_id,
+                name,
+                med_type,
+                quantity,
+                expiry_date.isoformat() if expiry_date else "-",
+                str(days) if expiry_date else "N/A",
+                " | ".join(messages),
+            ))
+    return rows
+
+
+# ---------------- DAY ROLLOVER ----------------
+def next_crossing(session, today):
+    """First day after ``today`` on which some medicine's expiry state changes."""
+    warning = timedelta(days=EXPIRY_WARNING_DAYS)
+    enters_warning, expires = session.query(
+        func.min(Medicine.expiry_date).filter(Medicine.expiry_date > today + warning),
+        func.min(Medicine.expiry_date).filter(Medicine.expiry_date >= today),
+    ).one()
+
+    candidates = []
+    if enters_warning is not None:
+        candidates.append(enters_warning - warning)
+    if expires is not None:
+        candidates.append(expires + timedelta(days=1))
+    return min(candidates) if candidates else None
+
+
+def crossed_since(session, previous, today):
+    """Ids whose warning start or expiry fell in (previous, today], and the next crossing if none did."""
+    if today <= previous:
+        return [], next_crossing(session, previous)
+
+    warning = timedelta(days=EXPIRY_WARNING_DAYS)
+    crossed = [
+        med_id for (med_id,) in session.query(Medicine.id).filter(or_(
+            and_(Medicine.expiry_date > previous + warning, Medicine.expiry_date <= today + warning),
+            and_(Medicine.expiry_date >= previous, Medicine.expiry_date < today),
+        ))
+    ]
+    return crossed, None if crossed else next_crossing(session, today)
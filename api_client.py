@@ -0,0 +1,307 @@
+"""``services`` over HTTP, for terminals running against ``api_server``.
+
+``RemoteServices`` has the same operations and signatures as the
+``services`` module; the ``session`` argument is accepted and ignored so
+the GUI can call either one. ``backend()`` picks the module, or a client
+when ``PHARMACY_SERVER_URL`` is set ("client mode").
+
+In client mode every read and write goes through the server: list pages
+and counts, searches, typeahead lists, alerts, sales and patient history,
+log-in, CSV imports and exports. The GUI still opens ``session_scope()``
+around each call, but nothing runs on that session, and SQLAlchemy only
+connects on first use, so a client terminal never opens the database file.
+"""
+import http.client
+import json
+import os
+import select
+import threading
+from datetime import date
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from api_codec import decode, decode_error, encode
+from export import format_for_path
+import services
+
+SERVER_URL = os.environ.get("PHARMACY_SERVER_URL")
+CHUNK_SIZE = 64 * 1024
+
+
+class ServerUnavailableError(services.ServiceError):
+    pass
+
+
+class RemoteServices:
+    """Calls ``api_server`` over one keep-alive connection per thread."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and _dropped(connection):
+            self._reset()
+            connection = None
+        if connection is None:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def _reset(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+        self._local.connection = None
+
+    def _send(self, method, path, body, content_type, read=None):
+        connection = self._connection()
+        connection.request(method, path, body=body, headers={"Content-Type": content_type})
+        response = connection.getresponse()
+        if read is not None and response.status < 400:
+            return response.status, read(response)
+        return response.status, response.read()
+
+    def _request(self, method, path, data, content_type, read=None):
+        try:
+            try:
+                return self._send(method, path, data, content_type, read)
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                self._reset()
+                if method != "GET":
+                    # The server may have committed before the connection
+                    # dropped; sending the write again could apply it twice
+                    raise ServerUnavailableError(
+                        f"Lost the connection to the pharmacy server at {self.base_url} during {method} {path}; "
+                        "the change may have been applied, check before trying again."
+                    ) from e
+                return self._send(method, path, data, content_type, read)
+        except (OSError, http.client.HTTPException) as e:
+            self._reset()
+            raise ServerUnavailableError(f"Pharmacy server at {self.base_url} is unavailable: {e}") from e
+
+    def _call(self, method, path, body=None, result_type=None, record_type=None,
+              content_type="application/json"):
+        if isinstance(body, bytes):
+            data = body
+        else:
+            data = json.dumps(encode(body)).encode() if body is not None else None
+        status, raw = self._request(method, path, data, content_type)
+        return _result(status, raw, result_type, record_type)
+
+    def health(self):
+        return self._call("GET", "/health")
+
+    def authenticate(self, session, username, password) -> Optional[services.UserRecord]:
+        request = services.LoginRequest(username, password)
+        return self._call("POST", "/login", request, services.UserRecord)
+
+    # ---------------- Checkout ----------------
+    def checkout(self, session, request: services.CheckoutRequest) -> services.CheckoutResult:
+        return self._call("POST", "/checkout", request, services.CheckoutResult)
+
+    def sales_history_page(self, session, history_filter, after=None, limit=200) -> List[services.SalesHistoryRow]:
+        query = _query(
+            start=history_filter.start, end=history_filter.end,
+            patient_id=history_filter.patient_id, medicine_id=history_filter.medicine_id,
+            after=after, limit=limit,
+        )
+        return self._call("GET", f"/sales?{query}", result_type=List[services.SalesHistoryRow])
+
+    # ---------------- Inventory ----------------
+    def get_medicine(self, session, medicine_id) -> services.MedicineRecord:
+        return self._call("GET", f"/medicines/{int(medicine_id)}", result_type=services.MedicineRecord)
+
+    def search_medicines(self, session, search_text, limit=50) -> List[services.MedicineRecord]:
+        query = urlencode({"q": search_text, "limit": limit})
+        return self._call("GET", f"/medicines?{query}", result_type=List[services.MedicineRecord])
+
+    def save_medicine(self, session, request: services.MedicineInput) -> services.MedicineRecord:
+        return self._call("POST", "/medicines", request, services.MedicineRecord, services.MedicineRecord)
+
+    def adjust_stock(self, session, request: services.StockAdjustment) -> services.MedicineRecord:
+        return self._call("POST", "/stock", request, services.MedicineRecord)
+
+    def delete_medicine(self, session, medicine_id) -> int:
+        return self._call("DELETE", f"/medicines/{int(medicine_id)}", result_type=int)
+
+    def count_medicines(self, session) -> int:
+        return self._call("GET", "/medicines/count", result_type=int)
+
+    def list_medicines(self, session, offset=0, limit=None) -> List[services.MedicineRecord]:
+        query = _query(offset=offset, limit=limit)
+        return self._call("GET", f"/medicines/page?{query}", result_type=List[services.MedicineRecord])
+
+    def import_csv(self, session, kind, source, dry_run=False, job=None) -> services.ImportReport:
+        # Sent whole; the server validates and commits it in chunks as a local import would
+        query = _query(dry_run=int(dry_run))
+        return self._call(
+            "POST", f"/import/{kind}?{query}", source.read().encode("utf-8"),
+            services.ImportReport, content_type="text/csv; charset=utf-8",
+        )
+
+    # ---------------- Patients ----------------
+    def get_patient(self, session, patient_id) -> services.PatientRecord:
+        return self._call("GET", f"/patients/{int(patient_id)}", result_type=services.PatientRecord)
+
+    def search_patients(self, session, search_text, offset=0, limit=50) -> List[services.PatientMatch]:
+        query = urlencode({"q": search_text, "offset": offset, "limit": limit})
+        return self._call("GET", f"/patients?{query}", result_type=List[services.PatientMatch])
+
+    def save_patient(self, session, request: services.PatientInput) -> services.PatientRecord:
+        return self._call("POST", "/patients", request, services.PatientRecord, services.PatientRecord)
+
+    def delete_patient(self, session, patient_id) -> int:
+        return self._call("DELETE", f"/patients/{int(patient_id)}", result_type=int)
+
+    def count_patient_matches(self, session, search_text) -> int:
+        return self._call("GET", f"/patients/count?{_query(q=search_text)}", result_type=int)
+
+    def count_patients(self, session) -> int:
+        return self._call("GET", "/patients/count", result_type=int)
+
+    def list_patients(self, session, offset=0, limit=None) -> List[services.PatientMatch]:
+        query = _query(offset=offset, limit=limit)
+        return self._call("GET", f"/patients/page?{query}", result_type=List[services.PatientMatch])
+
+    def list_patient_names(self, session) -> List[Tuple[int, str]]:
+        return self._call("GET", "/patients/names", result_type=List[Tuple[int, str]])
+
+    def load_patient_history(self, session, patient_id, page_size=200, job=None) -> Optional[services.PatientHistory]:
+        query = _query(page_size=page_size)
+        return self._call(
+            "GET", f"/patients/{int(patient_id)}/history?{query}", result_type=services.PatientHistory
+        )
+
+    def patient_history_page(self, session, patient_id, after=None, limit=200) -> List[services.PatientHistoryRow]:
+        query = _query(after=after, limit=limit)
+        return self._call(
+            "GET", f"/patients/{int(patient_id)}/history/page?{query}",
+            result_type=List[services.PatientHistoryRow],
+        )
+
+    # ---------------- Users ----------------
+    def get_user(self, session, user_id) -> services.UserRecord:
+        return self._call("GET", f"/users/{int(user_id)}", result_type=services.UserRecord)
+
+    def save_user(self, session, request: services.UserInput) -> services.UserRecord:
+        return self._call("POST", "/users", request, services.UserRecord, services.UserRecord)
+
+    def delete_user(self, session, user_id) -> int:
+        return self._call("DELETE", f"/users/{int(user_id)}", result_type=int)
+
+    def change_password(self, session, username, current_password, new_password) -> services.UserRecord:
+        request = services.PasswordChange(username, current_password, new_password)
+        return self._call("POST", "/users/password", request, services.UserRecord)
+
+    def count_users(self, session) -> int:
+        return self._call("GET", "/users/count", result_type=int)
+
+    def list_users(self, session, offset=0, limit=None) -> List[services.UserRecord]:
+        query = _query(offset=offset, limit=limit)
+        return self._call("GET", f"/users/page?{query}", result_type=List[services.UserRecord])
+
+    # ---------------- Alerts ----------------
+    def alert_rows(self, session, today, medicine_ids=None) -> List[services.AlertRow]:
+        if medicine_ids is None:
+            query = _query(today=today)
+        else:
+            medicine_ids = [int(med_id) for med_id in medicine_ids]
+            if not medicine_ids:
+                return []
+            query = _query(today=today, ids=",".join(map(str, medicine_ids)))
+        return self._call("GET", f"/alerts?{query}", result_type=List[services.AlertRow])
+
+    def next_alert_crossing(self, session, today) -> Optional[date]:
+        return self._call("GET", f"/alerts/next-crossing?{_query(today=today)}", result_type=date)
+
+    def medicines_crossing(self, session, previous, today) -> Tuple[List[int], Optional[date]]:
+        query = _query(since=previous, today=today)
+        return self._call("GET", f"/alerts/crossed?{query}", result_type=Tuple[List[int], Optional[date]])
+
+    # ---------------- Reports ----------------
+    def build_report(self, session, request: services.ReportRequest, cache=None, job=None) -> services.SalesReport:
+        # The server keeps its own report cache; ``cache`` and ``job`` are local-only
+        query = urlencode({"start": request.start.isoformat(), "end": request.end.isoformat()})
+        return self._call("GET", f"/reports?{query}", result_type=services.SalesReport)
+
+    def export_data(self, session, dataset, path, fmt=None, start=None, end=None, job=None) -> int:
+        """Download the server's export of ``dataset`` into ``path``; returns the row count.
+
+        As with a local export, the file is written next to ``path`` and
+        only moved into place once complete.
+        """
+        query = _query(format=fmt or format_for_path(path), start=start, end=end)
+        partial = f"{path}.part"
+
+        def save(response):
+            with open(partial, "wb") as target:
+                while True:
+                    if job is not None:
+                        job.check()
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+            return int(response.getheader("X-Row-Count", 0))
+
+        try:
+            status, raw = self._request("GET", f"/export/{dataset}?{query}", None, "application/json", save)
+        except BaseException:
+            self._reset()
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        if status >= 400:
+            return _result(status, raw)
+        os.replace(partial, path)
+        return raw
+
+
+def _query(**params):
+    """URL query of the given parameters, leaving out None; dates as ISO text, cursors as JSON."""
+    values = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, (list, tuple)):
+            value = json.dumps(encode(value))
+        values[name] = value
+    return urlencode(values)
+
+
+def _result(status, raw, result_type=None, record_type=None):
+    payload = json.loads(raw) if raw else None
+    if status >= 400:
+        if status >= 500 or not isinstance(payload, dict) or "error" not in payload:
+            raise RuntimeError(f"Server error {status}: {payload}")
+        raise decode_error(payload, record_type)
+    return decode(result_type, payload)
+
+
+def _dropped(connection):
+    """True if the server closed this idle keep-alive connection.
+
+    An idle HTTP connection has nothing to read until the server closes it,
+    so a readable socket means it is gone; checking this before sending
+    keeps writes off connections left over from a restarted server.
+    """
+    if connection.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def backend():
+    """The ``services`` module, or a RemoteServices when PHARMACY_SERVER_URL is set."""
+    return RemoteServices(SERVER_URL) if SERVER_URL else services
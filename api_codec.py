@@ -0,0 +1,82 @@
+"""JSON form of the ``services`` dataclasses, shared by api_server and api_client."""
+import dataclasses
+import functools
+import typing
+from datetime import date
+
+import services
+
+ERROR_STATUS = {
+    "ValidationError": 422,
+    "NotFoundError": 404,
+    "InsufficientStockError": 409,
+    "ConflictError": 409,
+    "ServiceError": 400,
+}
+ERROR_TYPES = {
+    error.__name__: error
+    for error in (
+        services.ServiceError,
+        services.ValidationError,
+        services.NotFoundError,
+        services.InsufficientStockError,
+        services.ConflictError,
+    )
+}
+
+
+def encode(value):
+    if dataclasses.is_dataclass(value):
+        return {f.name: encode(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode(item) for key, item in value.items()}
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _fields(cls):
+    hints = typing.get_type_hints(cls)
+    return [(f.name, hints[f.name]) for f in dataclasses.fields(cls)]
+
+
+def decode(cls, data):
+    """Build ``cls`` (a dataclass, date, List/Set/Tuple[...] or Optional[...]) from its JSON form."""
+    if data is None:
+        return None
+    origin = typing.get_origin(cls)
+    if origin is typing.Union:
+        return decode(next(arg for arg in typing.get_args(cls) if arg is not type(None)), data)
+    if origin in (list, set):
+        (item_type,) = typing.get_args(cls) or (None,)
+        return origin(decode(item_type, item) for item in data) if item_type else origin(data)
+    if origin is tuple:
+        # Table rows: Tuple[int, str, Optional[date], ...], one type per column
+        return tuple(decode(item_type, item) for item_type, item in zip(typing.get_args(cls), data))
+    if cls is date:
+        return date.fromisoformat(data)
+    if dataclasses.is_dataclass(cls):
+        return cls(**{name: decode(hint, data[name]) for name, hint in _fields(cls) if name in data})
+    if cls in (int, float, str):
+        return cls(data)
+    return data
+
+
+def encode_error(error):
+    return {
+        "error": type(error).__name__,
+        "message": str(error),
+        "current": encode(getattr(error, "current", None)),
+    }
+
+
+def decode_error(payload, record_type=None):
+    """The ServiceError a server response describes, with ``current`` decoded as ``record_type``."""
+    error_type = ERROR_TYPES.get(payload.get("error"), services.ServiceError)
+    if error_type is services.ConflictError:
+        current = decode(record_type, payload.get("current")) if record_type else None
+        return error_type(payload.get("message", ""), current=current)
+    return error_type(payload.get("message", ""))
@@ -0,0 +1,515 @@
+"""Local HTTP/JSON server that owns the database for every counter terminal.
+
+    python api_server.py [--port 8765] [--max-batch 64]
+
+Terminals started with ``PHARMACY_SERVER_URL=http://127.0.0.1:8765`` send
+every read and write here instead of opening the SQLite file themselves
+(see ``api_client``). All writes go through one queue drained by a single
+writer: whatever queued while the previous commit ran is committed next
+as one transaction, each request in its own savepoint (``services.apply_batch``),
+so one invalid cart never fails its neighbours. Reads run on a small
+thread pool with their own sessions; WAL keeps them off the writer's way.
+
+Endpoints (JSON bodies are the ``services`` dataclasses, see ``api_codec``):
+
+    GET    /health
+    POST   /login                         LoginRequest -> UserRecord or null
+    POST   /checkout                      CheckoutRequest -> CheckoutResult
+    GET    /sales?start=&end=&patient_id=&medicine_id=&after=&limit=
+                                          sales history page -> [SalesHistoryRow]
+    POST   /stock                         StockAdjustment -> MedicineRecord
+    GET    /medicines?q=&limit=           stock lookup -> [MedicineRecord]
+    GET    /medicines/count               -> int
+    GET    /medicines/page?offset=&limit= -> [MedicineRecord], by id
+    GET    /medicines/<id>                -> MedicineRecord
+    POST   /medicines                     MedicineInput -> MedicineRecord
+    DELETE /medicines/<id>
+    POST   /import/<kind>?dry_run=        CSV body -> ImportReport
+    GET    /patients?q=&offset=&limit=    patient search -> [PatientMatch]
+    GET    /patients/count?q=             all patients, or search matches -> int
+    GET    /patients/page?offset=&limit=  -> [PatientMatch], by id
+    GET    /patients/names                -> [[id, name]], for the sale picker
+    GET    /patients/<id>                 -> PatientRecord
+    GET    /patients/<id>/history?page_size=
+                                          -> PatientHistory or null
+    GET    /patients/<id>/history/page?after=&limit=
+                                          -> [PatientHistoryRow]
+    POST   /patients                      PatientInput -> PatientRecord
+    DELETE /patients/<id>
+    GET    /users/count                   -> int
+    GET    /users/page?offset=&limit=     -> [UserRecord], by id
+    GET    /users/<id>                    -> UserRecord
+    POST   /users                         UserInput -> UserRecord
+    DELETE /users/<id>
+    POST   /users/password                PasswordChange -> UserRecord
+    GET    /alerts?today=&ids=            -> [AlertRow]
+    GET    /alerts/next-crossing?today=   -> date or null
+    GET    /alerts/crossed?since=&today=  -> [[medicine id], date or null]
+    GET    /reports?start=&end=           -> SalesReport
+    GET    /export/<dataset>?format=&start=&end=
+                                          the file, row count in X-Row-Count
+
+Keyset cursors (``after``) are JSON arrays. Service errors come back as
+4xx with ``{"error", "message", "current"}``. Only loopback addresses are
+served; there is no authentication.
+"""
+import argparse
+import asyncio
+import io
+import ipaddress
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from database import SessionLocal
+from report_cache import ReportCache
+from api_codec import ERROR_STATUS, decode, encode, encode_error
+import services
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BATCH = 64
+MAX_BODY = 1024 * 1024
+# CSV imports are posted whole
+MAX_UPLOAD = 64 * 1024 * 1024
+READ_THREADS = 4
+CHUNK_SIZE = 64 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class FileResponse:
+    """A file to stream back instead of JSON; its directory is removed once sent."""
+
+    def __init__(self, path, rows):
+        self.path = path
+        self.rows = rows
+
+    def cleanup(self):
+        shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+
+
+class ApiServer:
+    """Routes requests to ``services``; writes are serialised through one queue."""
+
+    def __init__(self, session_factory=SessionLocal, max_batch=MAX_BATCH):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.report_cache = ReportCache()
+        self.stats = {"requests": 0, "writes": 0, "batches": 0, "largest_batch": 0, "write_seconds": 0.0}
+        self.started = time.time()
+
+        self._queue = None
+        self._writer_task = None
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=READ_THREADS, thread_name_prefix="api-reader")
+        self._routes = [
+            ("GET", r"/health", self.health),
+            ("POST", r"/login", self.login),
+            ("POST", r"/checkout", self.write_handler("checkout")),
+            ("GET", r"/sales", self.sales_history),
+            ("POST", r"/stock", self.write_handler("adjust_stock")),
+            ("GET", r"/medicines", self.search_medicines),
+            ("GET", r"/medicines/count", self.read_all(services.count_medicines)),
+            ("GET", r"/medicines/page", self.page(services.list_medicines)),
+            ("GET", r"/medicines/(\d+)", self.read_by_id(services.get_medicine)),
+            ("POST", r"/medicines", self.write_handler("save_medicine")),
+            ("DELETE", r"/medicines/(\d+)", self.write_handler("delete_medicine")),
+            ("POST", r"/import/(\w+)", self.import_csv),
+            ("GET", r"/patients", self.search_patients),
+            ("GET", r"/patients/count", self.count_patients),
+            ("GET", r"/patients/page", self.page(services.list_patients)),
+            ("GET", r"/patients/names", self.read_all(services.list_patient_names)),
+            ("GET", r"/patients/(\d+)", self.read_by_id(services.get_patient)),
+            ("GET", r"/patients/(\d+)/history", self.patient_history),
+            ("GET", r"/patients/(\d+)/history/page", self.patient_history_page),
+            ("POST", r"/patients", self.write_handler("save_patient")),
+            ("DELETE", r"/patients/(\d+)", self.write_handler("delete_patient")),
+            ("GET", r"/users/count", self.read_all(services.count_users)),
+            ("GET", r"/users/page", self.page(services.list_users)),
+            ("GET", r"/users/(\d+)", self.read_by_id(services.get_user)),
+            ("POST", r"/users", self.write_handler("save_user")),
+            ("DELETE", r"/users/(\d+)", self.write_handler("delete_user")),
+            ("POST", r"/users/password", self.write_handler("change_password")),
+            ("GET", r"/alerts", self.alerts),
+            ("GET", r"/alerts/next-crossing", self.next_alert_crossing),
+            ("GET", r"/alerts/crossed", self.medicines_crossing),
+            ("GET", r"/reports", self.report),
+            ("GET", r"/export/(\w+)", self.export),
+        ]
+
+    # ---------------- Lifecycle ----------------
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def close(self):
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        self._write_executor.shutdown(wait=True)
+        self._read_executor.shutdown(wait=True)
+
+    # ---------------- Writes ----------------
+    async def submit_write(self, name, request):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((services.WRITE_OPERATIONS[name][0], request, future))
+        return await future
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # Everything that queued up during the previous commit rides along
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            calls = [(operation, request) for operation, request, _ in batch]
+            started = time.perf_counter()
+            try:
+                outcomes = await loop.run_in_executor(self._write_executor, self._commit_batch, calls)
+            except Exception as e:
+                outcomes = [e] * len(batch)
+            self.stats["write_seconds"] += time.perf_counter() - started
+            self.stats["batches"] += 1
+            self.stats["writes"] += len(batch)
+            self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+            for (_, _, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def _commit_batch(self, calls):
+        with self.session_factory() as session:
+            try:
+                return services.apply_batch(session, calls)
+            except Exception as e:
+                if len(calls) == 1:
+                    return [e]
+        # An unexpected error rolled back the batch; commit the calls one by
+        # one so it only fails the request that caused it.
+        return [self._commit_batch([call])[0] for call in calls]
+
+    def write_handler(self, name):
+        request_type = services.WRITE_OPERATIONS[name][1]
+
+        async def handle(query, body, *groups):
+            if groups:
+                request = int(groups[0])
+            else:
+                request = decode(request_type, body)
+            return await self.submit_write(name, request)
+
+        return handle
+
+    async def import_csv(self, query, body, kind):
+        if not isinstance(body, bytes):
+            raise HttpError(415, "import expects a text/csv body")
+        dry_run = _param(query, "dry_run", "0") == "1"
+
+        def work():
+            source = io.StringIO(body.decode("utf-8-sig"), newline="")
+            with self.session_factory() as session:
+                return services.import_csv(session, kind, source, dry_run=dry_run)
+
+        # A real import commits its own chunks, so it waits its turn with the batches
+        executor = self._read_executor if dry_run else self._write_executor
+        return await asyncio.get_running_loop().run_in_executor(executor, work)
+
+    # ---------------- Reads ----------------
+    async def run_read(self, fn, *args):
+        def work():
+            with self.session_factory() as session:
+                return fn(session, *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, work)
+
+    def read_all(self, fn):
+        async def handle(query, body):
+            return await self.run_read(fn)
+
+        return handle
+
+    def page(self, fn):
+        async def handle(query, body):
+            limit = _param(query, "limit", "")
+            return await self.run_read(fn, int(_param(query, "offset", 0)), int(limit) if limit else None)
+
+        return handle
+
+    def read_by_id(self, fn):
+        async def handle(query, body, row_id):
+            return await self.run_read(fn, int(row_id))
+
+        return handle
+
+    async def search_medicines(self, query, body):
+        return await self.run_read(services.search_medicines, _param(query, "q", ""), int(_param(query, "limit", 50)))
+
+    async def search_patients(self, query, body):
+        return await self.run_read(
+            services.search_patients,
+            _param(query, "q", ""),
+            int(_param(query, "offset", 0)),
+            int(_param(query, "limit", 50)),
+        )
+
+    async def count_patients(self, query, body):
+        search_text = _param(query, "q", "")
+        if search_text:
+            return await self.run_read(services.count_patient_matches, search_text)
+        return await self.run_read(services.count_patients)
+
+    async def patient_history(self, query, body, patient_id):
+        page_size = int(_param(query, "page_size", 200))
+        return await self.run_read(services.load_patient_history, int(patient_id), page_size)
+
+    async def patient_history_page(self, query, body, patient_id):
+        after = _cursor(query, Optional[date], int, int)
+        return await self.run_read(
+            services.patient_history_page, int(patient_id), after, int(_param(query, "limit", 200))
+        )
+
+    async def sales_history(self, query, body):
+        history_filter = services.SalesHistoryFilter(
+            start=_date_param(query, "start"),
+            end=_date_param(query, "end"),
+            patient_id=_int_param(query, "patient_id"),
+            medicine_id=_int_param(query, "medicine_id"),
+        )
+        after = _cursor(query, Optional[date], int)
+        return await self.run_read(
+            services.sales_history_page, history_filter, after, int(_param(query, "limit", 200))
+        )
+
+    async def alerts(self, query, body):
+        ids = _param(query, "ids", "")
+        medicine_ids = [int(med_id) for med_id in ids.split(",")] if ids else None
+        return await self.run_read(services.alert_rows, date.fromisoformat(_param(query, "today")), medicine_ids)
+
+    async def next_alert_crossing(self, query, body):
+        return await self.run_read(services.next_alert_crossing, date.fromisoformat(_param(query, "today")))
+
+    async def medicines_crossing(self, query, body):
+        return await self.run_read(
+            services.medicines_crossing,
+            date.fromisoformat(_param(query, "since")),
+            date.fromisoformat(_param(query, "today")),
+        )
+
+    async def login(self, query, body):
+        request = decode(services.LoginRequest, body)
+        return await self.run_read(services.authenticate, request.username, request.password)
+
+    async def export(self, query, body, dataset):
+        fmt = _param(query, "format", "csv")
+        directory = tempfile.mkdtemp(prefix="pharmacy-export-")
+        path = os.path.join(directory, f"{dataset}.{fmt}")
+        try:
+            rows = await self.run_read(
+                services.export_data, dataset, path, fmt, _date_param(query, "start"), _date_param(query, "end")
+            )
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        return FileResponse(path, rows)
+
+    async def report(self, query, body):
+        request = services.ReportRequest(
+            date.fromisoformat(_param(query, "start")),
+            date.fromisoformat(_param(query, "end")),
+        )
+        return await self.run_read(services.build_report, request, self.report_cache)
+
+    async def health(self, query, body):
+        return {
+            **self.stats,
+            "write_seconds": round(self.stats["write_seconds"], 3),
+            "queued": self._queue.qsize(),
+            "uptime_seconds": round(time.time() - self.started, 1),
+        }
+
+    # ---------------- HTTP ----------------
+    async def dispatch(self, method, target, body, content_type="application/json"):
+        parts = urlsplit(target)
+        path = parts.path.rstrip("/") or "/"
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            if content_type.startswith("text/"):
+                payload = body
+            else:
+                payload = json.loads(body) if body else None
+            return 200, encode(await handler(parse_qs(parts.query), payload, *match.groups()))
+        if allowed:
+            raise HttpError(405, f"{method} not allowed on {path}")
+        raise HttpError(404, f"no route for {path}")
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    keep_alive = keep_alive and version == "HTTP/1.1"
+                    length = int(headers.get("content-length", 0))
+                    if length > (MAX_UPLOAD if target.startswith("/import/") else MAX_BODY):
+                        raise HttpError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    self.stats["requests"] += 1
+                    status, payload = await self.dispatch(
+                        method, target, body, headers.get("content-type", "application/json")
+                    )
+                except services.ServiceError as e:
+                    status, payload = ERROR_STATUS.get(type(e).__name__, 400), encode_error(e)
+                except HttpError as e:
+                    status, payload = e.status, {"error": "HttpError", "message": str(e)}
+                except (ValueError, KeyError, TypeError) as e:
+                    status, payload = 400, {"error": "BadRequest", "message": str(e)}
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, payload = 500, {"error": type(e).__name__, "message": str(e)}
+
+                if isinstance(payload, FileResponse):
+                    await self._send_file(writer, payload, keep_alive)
+                    if not keep_alive:
+                        break
+                    continue
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _send_file(self, writer, response, keep_alive):
+        try:
+            with open(response.path, "rb") as source:
+                size = os.fstat(source.fileno()).st_size
+                writer.write(
+                    f"HTTP/1.1 200 OK\r\n"
+                    f"Content-Type: application/octet-stream\r\n"
+                    f"Content-Length: {size}\r\n"
+                    f"X-Row-Count: {response.rows}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                )
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    writer.write(chunk)
+                    await writer.drain()
+        finally:
+            response.cleanup()
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    if values:
+        return values[0]
+    if default is None:
+        raise ValueError(f"missing query parameter {name!r}")
+    return default
+
+
+def _date_param(query, name):
+    value = _param(query, name, "")
+    return date.fromisoformat(value) if value else None
+
+
+def _int_param(query, name):
+    value = _param(query, name, "")
+    return int(value) if value else None
+
+
+def _cursor(query, *types):
+    """The ``after`` keyset cursor, sent as a JSON array of ``types``."""
+    value = _param(query, "after", "")
+    return decode(Tuple[types], json.loads(value)) if value else None
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=MAX_BATCH):
+    api = ApiServer(max_batch=max_batch)
+    server = await api.start(host, port)
+    print(f"pharmacy API listening on http://{host}:{port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the pharmacy database to local terminals.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="loopback address to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="most writes committed together")
+    args = parser.parse_args(argv)
+
+    if not is_loopback(args.host):
+        parser.error(f"{args.host} is not a loopback address; the API has no authentication")
+
+    from migrations import run_migrations
+
+    run_migrations()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
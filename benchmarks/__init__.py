@@ -0,0 +1,8 @@
+"""Headless benchmarks for the pharmacy data paths.
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the repo
+root and works on a throwaway SQLite file, never on pharmacy.db.
+``suite`` times every hot path on data from ``synthetic`` and compares the
+JSON results against a stored baseline; the other modules each dig into
+one optimisation.
+"""
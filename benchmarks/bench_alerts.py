@@ -0,0 +1,82 @@
+"""Compare the SQL alert query with the old load-everything Python loop.
+
+    python -m benchmarks.bench_alerts [--medicines 100000]
+"""
+import argparse
+import time
+from datetime import date
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+from database import SessionLocal
+from migrations import run_migrations
+from models import Medicine
+from alert_rules import query_alerts
+from benchmarks.synthetic import seed_medicines
+
+
+def legacy_alert_rows(session, today):
+    """The pre-SQL implementation: load every medicine and filter in Python."""
+    rows = []
+    for med in session.query(Medicine).all():
+        quantity = med.quantity or 0
+        med_type = (med.type or "").strip().lower()
+        threshold = 50 if med_type in ("tablet", "capsule") else 30
+        expiry_date = med.expiry_date
+        days_left = "N/A"
+        messages = []
+        if quantity < threshold:
+            messages.append(f"Low stock (threshold < {threshold})")
+        if expiry_date:
+            delta_days = (expiry_date - today).days
+            days_left = str(delta_days)
+            if delta_days < 0:
+                messages.append("Expired")
+            elif delta_days <= 90:
+                messages.append(f"Expiring soon ({delta_days} day(s) left)")
+        else:
+            messages.append("No expiry date")
+        if messages:
+            rows.append((med.name, med.type, quantity, expiry_date.isoformat() if expiry_date else "-", days_left, " | ".join(messages)))
+    return rows
+
+
+def best_of(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--medicines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run_migrations()
+    seed_medicines(args.medicines)
+    today = date.today()
+
+    def run_legacy():
+        with SessionLocal() as session:
+            return legacy_alert_rows(session, today)
+
+    def run_sql():
+        with SessionLocal() as session:
+            return [row[1:] for row in query_alerts(session, today)]
+
+    legacy_time, legacy_rows = best_of(run_legacy, args.repeat)
+    sql_time, sql_rows = best_of(run_sql, args.repeat)
+
+    print(f"medicines:        {args.medicines}")
+    print(f"alerting rows:    {len(sql_rows)}")
+    print(f"identical output: {legacy_rows == sql_rows}")
+    print(f"python loop:      {legacy_time * 1000:.1f} ms")
+    print(f"sql query:        {sql_time * 1000:.1f} ms ({legacy_time / sql_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Checkout throughput with terminals on the file directly vs through api_server.
+
+    python -m benchmarks.bench_api_server [--terminals 1 4 8 16] [--checkouts 200]
+
+Each terminal is a separate process issuing checkouts back to back. In
+direct mode it opens the database itself, as every PharmacyApp does today,
+and competes for the SQLite write lock. In server mode the same checkouts
+go to an ``api_server`` subprocess over localhost HTTP, which commits
+whatever has queued as one batch. Both modes start from the same data.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from benchmarks.tempdb import ROOT  # sets the database URL; import first
+from sqlalchemy import text
+from database import SessionLocal, engine
+from migrations import run_migrations
+from benchmarks.synthetic import clear, seed_medicines, seed_patients
+from api_client import RemoteServices
+import services
+
+MEDICINES = 200
+PATIENTS = 500
+PRICE = 3.0
+
+
+def reset_database():
+    clear()
+    seed_medicines(MEDICINES, price=PRICE, quantity=1_000_000)
+    seed_patients(PATIENTS)
+
+
+def terminal(seed, checkouts, server_url, start_event, results):
+    rng = random.Random(seed)
+    backend = RemoteServices(server_url) if server_url else services
+    session = None if server_url else SessionLocal()
+    requests = [
+        services.CheckoutRequest(rng.randint(1, PATIENTS), [
+            services.CartLine(medicine_id, 2, 2 * PRICE)
+            for medicine_id in rng.sample(range(1, MEDICINES + 1), rng.randint(1, 4))
+        ])
+        for _ in range(checkouts)
+    ]
+    latencies = []
+    start_event.wait()
+    for request in requests:
+        started = time.perf_counter()
+        backend.checkout(session, request)
+        latencies.append((time.perf_counter() - started) * 1000)
+    results.put(latencies)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "api_server.py"), "--port", str(port)],
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 15
+    while True:
+        try:
+            urllib.request.urlopen(f"{url}/health", timeout=1).read()
+            return process, url
+        except OSError:
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("api_server did not start")
+            time.sleep(0.1)
+
+
+def server_stats(server_url):
+    return json.loads(urllib.request.urlopen(f"{server_url}/health").read())
+
+
+def run_round(terminals, checkouts, server_url, seed):
+    reset_database()
+    before = server_stats(server_url) if server_url else None
+    context = multiprocessing.get_context("spawn")
+    start_event = context.Event()
+    results = context.Queue()
+    processes = [
+        context.Process(target=terminal, args=(seed + n, checkouts, server_url, start_event, results))
+        for n in range(terminals)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)  # let every terminal finish importing before the clock starts
+    started = time.perf_counter()
+    start_event.set()
+    latencies = [latency for _ in processes for latency in results.get()]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    with engine.connect() as conn:
+        committed = conn.execute(text("SELECT COUNT(*) FROM sales")).scalar()
+    latencies.sort()
+    commits = writer_busy = None
+    if server_url:
+        after = server_stats(server_url)
+        commits = after["batches"] - before["batches"]
+        writer_busy = (after["write_seconds"] - before["write_seconds"]) / elapsed
+    return {
+        "commits": commits if commits is not None else committed,
+        "writer_busy": writer_busy,
+        "checkouts_per_s": round(committed / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        "max_ms": round(latencies[-1], 2),
+        "committed": committed,
+        "expected": terminals * checkouts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terminals", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--checkouts", type=int, default=200, help="checkouts per terminal")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_migrations()
+    server, url = start_server()
+    try:
+        print(f"{'terminals':>9} {'mode':>6} {'checkouts/s':>11} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+              f"{'commits':>8} {'writer busy':>11}")
+        failed = False
+        for terminals in args.terminals:
+            for mode, server_url in (("direct", None), ("server", url)):
+                result = run_round(terminals, args.checkouts, server_url, args.seed)
+                failed = failed or result["committed"] != result["expected"]
+                print(
+                    f"{terminals:>9} {mode:>6} {result['checkouts_per_s']:>11.0f} {result['p50_ms']:>8.2f} "
+                    f"{result['p95_ms']:>8.2f} {result['max_ms']:>8.2f} {result['commits']:>8} "
+                    + (f"{result['writer_busy']:>10.0%}" if result["writer_busy"] is not None else f"{'-':>11}")
+                )
+        stats = server_stats(url)
+        print(f"server: {stats['writes']} writes in {stats['batches']} commits, largest batch {stats['largest_batch']}")
+    finally:
+        server.terminate()
+        server.wait()
+    if failed:
+        print("FAILED: committed sales do not match the checkouts issued")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
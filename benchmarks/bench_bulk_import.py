@@ -0,0 +1,105 @@
+"""Time the streaming CSV import against one ORM add-and-commit per row.
+
+    python -m benchmarks.bench_bulk_import [--rows 100000] [--legacy-rows 2000]
+"""
+import argparse
+import csv
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.tempdb import DB_DIR  # sets the database URL; import first
+from database import SessionLocal
+from migrations import run_migrations
+from models import Medicine, StockEntry
+from bulk_import import import_file
+from benchmarks.synthetic import TYPES, medicine_name
+
+
+
+def write_catalog(path, count, seed=42):
+    rng = random.Random(seed)
+    today = date.today()
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "type", "expiry_date", "price", "quantity"])
+        for i in range(1, count + 1):
+            writer.writerow([
+                medicine_name(i),
+                rng.choice(TYPES),
+                (today + timedelta(days=rng.randint(1, 1500))).isoformat(),
+                round(rng.uniform(0.5, 80), 2),
+                rng.randint(0, 2000),
+            ])
+        # A few bad rows so the error path is exercised too
+        writer.writerow(["Broken price", "Tablet", today.isoformat(), "abc", 5])
+        writer.writerow(["Broken date", "Tablet", "31/12/2030", 1.5, 5])
+
+
+def write_deliveries(path, count, catalog_size, seed=7):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "quantity", "entry_date"])
+        for _ in range(count):
+            writer.writerow([medicine_name(rng.randint(1, catalog_size)), rng.randint(1, 500), date.today().isoformat()])
+
+
+def legacy_import(path, limit):
+    """The add_medicine pattern: one ORM object and one commit per row."""
+    with SessionLocal() as session, open(path, newline="") as f:
+        for i, row in enumerate(csv.DictReader(f)):
+            if i >= limit:
+                break
+            session.add(Medicine(
+                name=f"Legacy {row['name']}",
+                type=row["type"],
+                expiry_date=date.fromisoformat(row["expiry_date"]),
+                price=float(row["price"]),
+                quantity=int(row["quantity"]),
+            ))
+            session.commit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--legacy-rows", type=int, default=2_000)
+    args = parser.parse_args()
+
+    run_migrations()
+    catalog = os.path.join(DB_DIR, "catalog.csv")
+    deliveries = os.path.join(DB_DIR, "deliveries.csv")
+    write_catalog(catalog, args.rows)
+    write_deliveries(deliveries, args.rows, args.rows)
+
+    dry_time, dry = timed(lambda: import_file("catalog", catalog, dry_run=True))
+    insert_time, inserted = timed(lambda: import_file("catalog", catalog))
+    upsert_time, upserted = timed(lambda: import_file("catalog", catalog))
+    delivery_time, delivered = timed(lambda: import_file("deliveries", deliveries))
+    legacy_time, _ = timed(lambda: legacy_import(catalog, args.legacy_rows))
+
+    with SessionLocal() as session:
+        medicines = session.query(Medicine).count()
+        entries = session.query(StockEntry).count()
+
+    legacy_rate = args.legacy_rows / legacy_time
+    print(f"rows per file:      {args.rows} (+{len(inserted.errors)} invalid)")
+    print(f"dry run:            {dry_time:.2f} s ({len(dry.errors)} errors reported)")
+    print(f"catalog insert:     {insert_time:.2f} s ({inserted.inserted} new, {args.rows / insert_time:,.0f} rows/s)")
+    print(f"catalog upsert:     {upsert_time:.2f} s ({upserted.updated} updated)")
+    print(f"deliveries:         {delivery_time:.2f} s ({delivered.stock_entries} stock entries)")
+    print(f"per-row ORM commit: {legacy_rate:,.0f} rows/s over {args.legacy_rows} rows "
+          f"(~{args.rows / legacy_rate:.0f} s for {args.rows})")
+    print(f"medicines / entries in db: {medicines} / {entries}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Several counter terminals writing one database at once: correctness and throughput.
+
+    python -m benchmarks.bench_concurrency [--writers 1 2 4 8] [--ops 300]
+
+Each writer is a separate process with its own engine, like a separate PC on
+the shared file. Writers mix checkouts, deliveries and price edits on a small
+set of hot medicines. After every round the database is checked against what
+the writers report they did: stock is conserved and never negative, every
+committed update bumped ``version`` exactly once, and the daily rollups match
+the sales they summarise. Any violation exits with 1.
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+from sqlalchemy import text
+from database import SessionLocal, engine
+from migrations import run_migrations
+from retry import DEFAULT_RETRY_POLICY
+import services
+from benchmarks.synthetic import clear, seed_medicines, seed_patients
+
+MEDICINES = 20
+PATIENTS = 50
+INITIAL_STOCK = 500
+PRICE = 4.0
+
+
+def reset_database():
+    clear()
+    seed_medicines(MEDICINES, price=PRICE, quantity=INITIAL_STOCK)
+    seed_patients(PATIENTS)
+
+
+def writer(seed, ops, results):
+    """One terminal: returns what it committed so the parent can audit the database."""
+    rng = random.Random(seed)
+    sold, added, bumps = Counter(), Counter(), Counter()
+    stats = Counter()
+    session = SessionLocal()
+    started = time.perf_counter()
+    for _ in range(ops):
+        roll = rng.random()
+        try:
+            if roll < 0.7:
+                lines = [
+                    services.CartLine(medicine_id, quantity, PRICE * quantity)
+                    for medicine_id, quantity in {
+                        rng.randint(1, MEDICINES): rng.randint(1, 4) for _ in range(rng.randint(1, 3))
+                    }.items()
+                ]
+                services.checkout(session, services.CheckoutRequest(rng.randint(1, PATIENTS), lines))
+                for line in lines:
+                    sold[line.medicine_id] += line.quantity
+                    bumps[line.medicine_id] += 1
+                stats["checkouts"] += 1
+            elif roll < 0.85:
+                medicine_id, delta = rng.randint(1, MEDICINES), rng.randint(5, 20)
+                services.adjust_stock(session, services.StockAdjustment(medicine_id, delta))
+                added[medicine_id] += delta
+                bumps[medicine_id] += 1
+                stats["deliveries"] += 1
+            else:
+                # An edit form opened, then saved a moment later
+                medicine = services.get_medicine(session, rng.randint(1, MEDICINES))
+                request = services.MedicineInput(
+                    medicine.name, medicine.type, medicine.expiry_date, round(rng.uniform(1, 9), 2),
+                    medicine.quantity, medicine.id, medicine.version,
+                )
+                try:
+                    services.save_medicine(session, request)
+                except services.ConflictError:
+                    stats["conflicts"] += 1
+                else:
+                    # The form carried the quantity it read; if that was stale
+                    # the save would have been refused, so it is a no-op here.
+                    bumps[medicine.id] += 1
+                    stats["edits"] += 1
+        except services.InsufficientStockError:
+            stats["out_of_stock"] += 1
+    session.close()
+    stats["seconds"] = time.perf_counter() - started
+    stats["retries"] = DEFAULT_RETRY_POLICY.retries
+    results.put((dict(sold), dict(added), dict(bumps), dict(stats)))
+
+
+def audit(reports):
+    """Compare the database with the writers' own accounts; return a list of violations."""
+    sold, added, bumps = Counter(), Counter(), Counter()
+    checkouts = 0
+    for report_sold, report_added, report_bumps, stats in reports:
+        sold.update(report_sold)
+        added.update(report_added)
+        bumps.update(report_bumps)
+        checkouts += stats.get("checkouts", 0)
+
+    problems = []
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, quantity, version FROM medicines")).all()
+        db_sold = dict(conn.execute(text("SELECT medicine_id, SUM(quantity) FROM sale_items GROUP BY medicine_id")).all())
+        db_added = dict(conn.execute(
+            text("SELECT medicine_id, SUM(quantity_added) FROM stock_entries GROUP BY medicine_id")
+        ).all())
+        sales = conn.execute(text("SELECT COUNT(*) FROM sales")).scalar()
+        rollup_mismatches = conn.execute(text("""
+            SELECT COUNT(*) FROM (
+                SELECT s.sale_date, COUNT(*) AS n, ROUND(SUM(s.total_amount), 6) AS amount
+                FROM sales s GROUP BY s.sale_date
+                EXCEPT
+                SELECT sale_date, transaction_count, ROUND(amount, 6) FROM daily_sales
+            )
+        """)).scalar()
+        medicine_rollup_mismatches = conn.execute(text("""
+            SELECT COUNT(*) FROM (
+                SELECT s.sale_date, i.medicine_id, SUM(i.quantity), COUNT(DISTINCT s.id)
+                FROM sale_items i JOIN sales s ON s.id = i.sale_id
+                GROUP BY s.sale_date, i.medicine_id
+                EXCEPT
+                SELECT sale_date, medicine_id, quantity, transaction_count FROM daily_medicine_sales
+            )
+        """)).scalar()
+        patient_rollup_mismatches = conn.execute(text("""
+            SELECT COUNT(*) FROM (
+                SELECT s.patient_id, COUNT(*), ROUND(SUM(s.total_amount), 6), MAX(s.sale_date)
+                FROM sales s GROUP BY s.patient_id
+                EXCEPT
+                SELECT patient_id, visit_count, ROUND(lifetime_spend, 6), last_visit FROM patient_summaries
+            )
+        """)).scalar()
+
+    for medicine_id, quantity, version in rows:
+        expected = INITIAL_STOCK + added[medicine_id] - sold[medicine_id]
+        if quantity != expected:
+            problems.append(f"medicine {medicine_id}: quantity {quantity}, expected {expected}")
+        if quantity < 0:
+            problems.append(f"medicine {medicine_id}: negative stock {quantity}")
+        if version != 1 + bumps[medicine_id]:
+            problems.append(f"medicine {medicine_id}: version {version}, expected {1 + bumps[medicine_id]}")
+        if db_sold.get(medicine_id, 0) != sold[medicine_id]:
+            problems.append(f"medicine {medicine_id}: {db_sold.get(medicine_id, 0)} sold in sale_items, "
+                            f"writers committed {sold[medicine_id]}")
+        if db_added.get(medicine_id, 0) != added[medicine_id]:
+            problems.append(f"medicine {medicine_id}: stock_entries disagree with committed deliveries")
+    if sales != checkouts:
+        problems.append(f"{sales} sales rows, writers committed {checkouts} checkouts")
+    mismatches = rollup_mismatches + medicine_rollup_mismatches + patient_rollup_mismatches
+    if mismatches:
+        problems.append(f"rollups disagree with sales on {mismatches} rows")
+    return problems
+
+
+def run_round(writers, ops, seed):
+    reset_database()
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=writer, args=(seed + n, ops, results)) for n in range(writers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    totals = Counter()
+    for *_, stats in reports:
+        totals.update({key: value for key, value in stats.items() if key != "seconds"})
+    committed = totals["checkouts"] + totals["deliveries"] + totals["edits"]
+    return elapsed, committed, totals, audit(reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=300, help="operations per writer")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_migrations()
+    print(f"{'writers':>7} {'commits':>8} {'commits/s':>10} {'conflicts':>9} {'retries':>8} {'no stock':>8}  audit")
+    failed = False
+    for writers in args.writers:
+        elapsed, committed, totals, problems = run_round(writers, args.ops, args.seed)
+        failed = failed or bool(problems)
+        print(
+            f"{writers:>7} {committed:>8} {committed / elapsed:>10.0f} {totals['conflicts']:>9} "
+            f"{totals['retries']:>8} {totals['out_of_stock']:>8}  {'ok' if not problems else 'FAILED'}"
+        )
+        for problem in problems[:20]:
+            print(f"    {problem}")
+    print(f"date {date.today().isoformat()}, database {engine.url}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
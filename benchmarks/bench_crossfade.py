@@ -0,0 +1,66 @@
+"""CPU time per homepage background fade cycle, before and after frame caching.
+
+    python -m benchmarks.bench_crossfade [--size 1920x1080] [--mode quality]
+
+Runs without a display, so the one-off PIL -> PhotoImage conversion done on
+first display is not included; everything else on the old per-frame path is.
+"""
+import argparse
+import time
+from pathlib import Path
+from PIL import Image
+
+from bg_fader import FADE_MODES, build_fade_frames
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+IMAGES = ["bg1.jpg", "bg.jpg"]
+
+
+def legacy_cycle(current, following, size, steps):
+    """What fade_to_next used to do: two LANCZOS resizes and a blend per frame."""
+    for step in range(steps + 1):
+        Image.blend(
+            current.resize(size, Image.Resampling.LANCZOS),
+            following.resize(size, Image.Resampling.LANCZOS),
+            step / steps,
+        )
+
+
+def cpu_ms(fn):
+    start = time.process_time()
+    fn()
+    return (time.process_time() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--mode", default="quality", choices=sorted(FADE_MODES))
+    parser.add_argument("--cycles", type=int, default=4)
+    args = parser.parse_args()
+
+    size = tuple(int(part) for part in args.size.split("x"))
+    steps, _delay, resample, _hold = FADE_MODES[args.mode]
+    first, second = (Image.open(BASE_PATH / name).convert("RGB") for name in IMAGES)
+
+    legacy = [cpu_ms(lambda: legacy_cycle(first, second, size, 20)) for _ in range(args.cycles)]
+
+    cache = {}
+
+    def cached_cycle():
+        if size not in cache:
+            scaled = (first.resize(size, resample), second.resize(size, resample))
+            cache[size] = build_fade_frames(*scaled, steps)
+        for frame in cache[size]:
+            frame.getpixel((0, 0))
+
+    cached = [cpu_ms(cached_cycle) for _ in range(args.cycles)]
+
+    print(f"window {size[0]}x{size[1]}, mode {args.mode} ({steps} steps)")
+    print(f"before: {sum(legacy) / len(legacy):8.1f} ms CPU per cycle (every cycle)")
+    print(f"after:  {cached[0]:8.1f} ms CPU for the first cycle (on the worker thread)")
+    print(f"        {sum(cached[1:]) / max(len(cached) - 1, 1):8.1f} ms CPU per later cycle")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Stream a large sale_items export and check that memory stays flat.
+
+    python -m benchmarks.bench_export [--items 2000000] [--format csv|parquet|arrow]
+"""
+import argparse
+import os
+import resource
+import time
+from datetime import date, timedelta
+
+from benchmarks.tempdb import DB_DIR  # sets the database URL; import first
+from migrations import run_migrations
+from export import export_dataset
+from benchmarks.synthetic import seed_medicines, seed_sales
+
+MEDICINES = 2000
+
+
+# Growth is capped by the pragma profile's page cache and mmap window, not by row count
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2_000_000)
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="csv")
+    args = parser.parse_args()
+
+    run_migrations()
+    seed_sales(args.items, seed_medicines(MEDICINES), patients=0)
+    path = os.path.join(DB_DIR, f"sale_items.{args.format}")
+    before = max_rss_mb()
+
+    def timed_export(**kwargs):
+        start = time.perf_counter()
+        rows = export_dataset("sale_items", path, fmt=args.format, **kwargs)
+        return rows, time.perf_counter() - start
+
+    rows, elapsed = timed_export()
+    year_ago = date.today() - timedelta(days=365)
+    window_rows, window_elapsed = timed_export(start=year_ago, end=date.today())
+
+    print(f"line items:        {args.items}")
+    print(f"full export:       {rows} rows in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s)")
+    print(f"last 365 days:     {window_rows} rows in {window_elapsed:.2f} s")
+    print(f"file size:         {os.path.getsize(path) / 1e6:.1f} MB ({args.format}, last export)")
+    print(f"peak RSS growth:   {max_rss_mb() - before:.1f} MB during export")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Python heap over a long shift of checkouts: per-operation sessions vs one shift session.
+
+    python -m benchmarks.bench_memory [--items 100000] [--checkouts 10000] [--sample-every 1000]
+
+Each mode runs in a fresh process under ``tracemalloc`` and repeats what one
+counter does per customer: a live stock lookup per cart line, the checkout,
+the sales tab's first page, and every few sales an inventory page; the
+medicine and patient lists are reloaded every few hundred sales.
+
+``scoped``  is the app as it is: ``session_scope`` per operation and
+            lookup maps of plain records and ids.
+``shift``   is the old layout: one session opened at login with
+            ``expire_on_commit=True``, lookup maps of ORM objects, and the
+            medicine list reloaded after every checkout.
+
+Heap is sampled after ``gc.collect()`` every ``--sample-every`` checkouts;
+growth is measured from the first sample to the last.
+"""
+import argparse
+import gc
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from database import engine, session_scope
+from migrations import run_migrations
+from models import Medicine, Patient
+import services
+from benchmarks.synthetic import generate
+from benchmarks.suite import PAGE_SIZE, HeadlessApp
+
+CART_MEDICINES = 50
+INVENTORY_EVERY = 10
+RELOAD_LISTS_EVERY = 500
+
+
+def random_cart(rng, medicines, patient_id):
+    lines = []
+    for medicine in rng.sample(medicines, rng.randint(1, 3)):
+        quantity = rng.randint(1, 3)
+        lines.append(services.CartLine(medicine.id, quantity, medicine.price * quantity, "1*2*3"))
+    return services.CheckoutRequest(patient_id, lines)
+
+
+def run_scoped(app, checkouts, rng, sample):
+    app.load_medicines_for_sale()
+    app.load_patients_for_sale()
+    for n in range(1, checkouts + 1):
+        medicines = list(app.medicine_map.values())[:CART_MEDICINES]
+        request = random_cart(rng, medicines, rng.choice(list(app.patient_map.values())))
+        for line in request.lines:
+            with session_scope() as session:
+                services.get_medicine(session, line.medicine_id)
+        with session_scope() as session:
+            services.checkout(session, request)
+        app.fetch_sales_history(None, PAGE_SIZE)
+        if n % INVENTORY_EVERY == 0:
+            app.count_inventory_rows()
+            app.fetch_inventory_rows(0, PAGE_SIZE)
+        if n % RELOAD_LISTS_EVERY == 0:
+            app.load_medicines_for_sale()
+            app.load_patients_for_sale()
+        sample(n)
+
+
+def run_shift(app, checkouts, rng, sample):
+    session = sessionmaker(bind=engine, expire_on_commit=True)()
+
+    def load_medicines():
+        app.medicine_map = {medicine.name: medicine for medicine in session.query(Medicine).all()}
+        app.medicine_index.sync(list(app.medicine_map))
+
+    def load_lists():
+        load_medicines()
+        app.patient_map = {patient.name: patient for patient in session.query(Patient).all()}
+        app.patient_index.sync(list(app.patient_map))
+
+    load_lists()
+    for n in range(1, checkouts + 1):
+        medicines = list(app.medicine_map.values())[:CART_MEDICINES]
+        request = random_cart(rng, medicines, rng.choice(list(app.patient_map.values())).id)
+        for line in request.lines:
+            session.get(Medicine, line.medicine_id).quantity
+        services.checkout(session, request)
+        load_medicines()
+        app.fetch_sales_history(None, PAGE_SIZE, session)
+        if n % INVENTORY_EVERY == 0:
+            app.count_inventory_rows()
+            app.fetch_inventory_rows(0, PAGE_SIZE)
+        if n % RELOAD_LISTS_EVERY == 0:
+            load_lists()
+        sample(n)
+    session.close()
+
+
+MODES = {"scoped": run_scoped, "shift": run_shift}
+
+
+def run_mode(mode, checkouts, sample_every, seed, results):
+    rng = random.Random(seed)
+    app = HeadlessApp()
+    samples = []
+
+    def sample(n):
+        if n % sample_every == 0:
+            gc.collect()
+            samples.append((n, tracemalloc.get_traced_memory()[0], time.perf_counter()))
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    MODES[mode](app, checkouts, rng, sample)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results.put({"samples": samples, "peak": peak, "elapsed": elapsed})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="sale line items to generate")
+    parser.add_argument("--checkouts", type=int, default=10_000)
+    parser.add_argument("--sample-every", type=int, default=1000)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["scoped", "shift"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_migrations()
+    scale = generate(args.items, seed=args.seed)
+    # Enough stock that no cart in the run is refused
+    with engine.begin() as conn:
+        conn.execute(update(Medicine).values(quantity=Medicine.quantity + 10 * args.checkouts))
+    print(f"generated {scale.as_dict()}")
+
+    context = multiprocessing.get_context("spawn")
+    for mode in args.modes:
+        results = context.Queue()
+        process = context.Process(
+            target=run_mode, args=(mode, args.checkouts, args.sample_every, args.seed, results)
+        )
+        process.start()
+        report = results.get()
+        process.join()
+
+        samples = report["samples"]
+        print(f"\n{mode}: {args.checkouts} checkouts in {report['elapsed']:.1f} s "
+              f"({report['elapsed'] / args.checkouts * 1000:.2f} ms each)")
+        print(f"{'checkouts':>10} {'heap KiB':>10}")
+        for n, current, _ in samples:
+            print(f"{n:>10} {current / 1024:>10.0f}")
+        if len(samples) >= 2:
+            (first_n, first, _), (last_n, last, _) = samples[0], samples[-1]
+            per_thousand = (last - first) / (last_n - first_n) * 1000
+            print(f"growth {(last - first) / 1024:+.0f} KiB from checkout {first_n} to {last_n} "
+                  f"({per_thousand / 1024:+.1f} KiB per 1000), peak {report['peak'] / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Time FTS5 patient search against a LIKE scan on a large patient table.
+
+    python -m benchmarks.bench_patient_search [--patients 1000000]
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+from sqlalchemy import text
+from database import engine
+from migrations import run_migrations
+from patient_search import fts_available, rebuild_patient_index, search_patients, count_patients
+from benchmarks.synthetic import seed_patients
+
+CONDITIONS = ["asthma", "diabetes", "hypertension", "malaria", "allergy to penicillin", "ulcers",
+              "migraine", "arthritis", "anaemia", "epilepsy", "pregnant", "none reported"]
+RARE_CONDITIONS = ["tuberculosis", "sickle cell"]
+QUERIES = ["asthma", "hypertension diabetes", "Grace Kamau", "epilep", "tuberculosis", "sickle cell"]
+
+
+def medical_history(rng):
+    history = ", ".join(rng.sample(CONDITIONS, rng.randint(1, 3)))
+    if rng.random() < 0.001:
+        history += f", {rng.choice(RARE_CONDITIONS)}"
+    return f"Known {history}; last review {rng.randint(2015, 2026)}"
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    run_migrations()
+    start = time.perf_counter()
+    seed_patients(args.patients, rng=random.Random(3), medical_history=medical_history)
+    seed_s = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        if not fts_available(conn):
+            sys.exit("FTS5 is not available in this SQLite build.")
+
+        print(f"patients:           {args.patients} (seeded with triggers in {seed_s:.1f} s)")
+        for query in QUERIES:
+            like_words = query.split()
+            like_sql = " AND ".join(
+                f"(name LIKE :w{i} OR medical_history LIKE :w{i})" for i in range(len(like_words))
+            )
+            params = {f"w{i}": f"%{word}%" for i, word in enumerate(like_words)}
+            # A LIKE scan must read every row to find (or count) all matches
+            like_ms = timed(lambda: conn.execute(
+                text(f"SELECT COUNT(*) FROM patients WHERE {like_sql}"), params
+            ).scalar(), repeat=3)
+            count_ms = timed(lambda: count_patients(conn, query))
+            fts_ms = timed(lambda: search_patients(conn, query, limit=50))
+            print(
+                f"{query!r:24} matches {count_patients(conn, query):>7}   LIKE scan {like_ms:8.1f} ms   "
+                f"FTS5 count {count_ms:7.1f} ms   FTS5 ranked top-50 {fts_ms:7.1f} ms"
+            )
+
+    with engine.begin() as conn:
+        start = time.perf_counter()
+        rebuild_patient_index(conn)
+        print(f"full rebuild:       {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
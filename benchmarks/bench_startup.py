@@ -0,0 +1,99 @@
+"""Import-time report for the start-up path (``python -X importtime``).
+
+    python -m benchmarks.bench_startup [--save-baseline] [--tolerance 0.25]
+
+Reports what ``import main`` pulls in before the first window can appear and
+what the background warmup imports afterwards. It fails (exit 1) when a
+module that must stay lazy (PIL, SQLAlchemy, the pharmacy app) sneaks back
+into the eager path, or when cumulative import time regresses beyond the
+tolerance against a saved baseline.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "startup_importtime.json"
+
+# Must not be imported before the login window is shown
+LAZY_MODULES = ("PIL", "sqlalchemy", "pharmacy", "database", "models", "migrations", "bg_fader")
+
+TARGETS = {
+    "window": "import main",
+    "warmup": "import bg_fader, migrations, pharmacy",
+}
+
+
+def import_times(statement, runs):
+    """Best-of-N {module: cumulative_us} from -X importtime for one statement."""
+    best = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            # Nested imports are indented further; only count top-level ones
+            if name.startswith("  "):
+                continue
+            module = name.strip()
+            best[module] = min(best.get(module, float("inf")), int(cumulative_us))
+    return best
+
+
+def eager_modules(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    names = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            names.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    report = {}
+    failures = []
+    for target, statement in TARGETS.items():
+        times = import_times(statement, args.runs)
+        total_ms = sum(times.values()) / 1000
+        report[target] = total_ms
+        print(f"{target}: `{statement}` -> {total_ms:.1f} ms cumulative (top-level modules)")
+        for module, us in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {module}")
+
+    leaked = sorted(eager_modules(TARGETS["window"]).intersection(LAZY_MODULES))
+    if leaked:
+        failures.append(f"imported before the window is shown: {', '.join(leaked)}")
+
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline saved to {BASELINE_PATH}")
+    elif BASELINE_PATH.exists():
+        baseline = json.loads(BASELINE_PATH.read_text())
+        for target, total_ms in report.items():
+            if target in baseline and total_ms > baseline[target] * (1 + args.tolerance):
+                failures.append(f"{target}: {total_ms:.1f} ms vs baseline {baseline[target]:.1f} ms")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Treeview rows touched by the refreshes that follow a checkout.
+
+    python -m benchmarks.bench_tree_refresh [--items 100000] [--checkouts 50]
+
+After each checkout the sales history and inventory lists are refreshed.
+This replays that on the headless app: each list's visible window is
+fetched before and after the sale and diffed with ``virtual_tree.plan_render``,
+the same plan VirtualTreeview applies to its items. Before keyed diffing
+every refresh deleted and reinserted the whole window.
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+from sqlalchemy import update
+from database import engine, session_scope
+from migrations import run_migrations
+from models import Medicine
+import services
+from virtual_tree import first_column, keyed_rows, plan_render
+from benchmarks.synthetic import generate
+from benchmarks.suite import HeadlessApp
+
+WINDOW = 45  # visible rows plus overscan on a 1080p screen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--checkouts", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_migrations()
+    scale = generate(args.items, seed=args.seed)
+    with engine.begin() as conn:
+        conn.execute(update(Medicine).values(quantity=Medicine.quantity + 1000))
+
+    rng = random.Random(args.seed)
+    app = HeadlessApp()
+    lists = {
+        "sales history": lambda: app.fetch_sales_history(None, WINDOW),
+        "inventory": lambda: app.fetch_inventory_rows(0, WINDOW),
+    }
+    shown = {name: dict(keyed_rows(fetch(), first_column)) for name, fetch in lists.items()}
+    totals = {name: Counter() for name in lists}
+    plan_seconds = 0.0
+
+    for _ in range(args.checkouts):
+        # Carts favour the medicines on the inventory's first page, the worst case here
+        lines = [
+            services.CartLine(medicine_id, 1, 1.0, "1*2*3")
+            for medicine_id in rng.sample(range(1, min(scale.medicines, WINDOW) + 1), rng.randint(1, 3))
+        ]
+        with session_scope() as session:
+            services.checkout(session, services.CheckoutRequest(rng.randint(1, scale.patients), lines))
+
+        for name, fetch in lists.items():
+            wanted = keyed_rows(fetch(), first_column)
+            started = time.perf_counter()
+            _, _, stats = plan_render(shown[name], wanted)
+            plan_seconds += time.perf_counter() - started
+            totals[name].update(stats._asdict())
+            totals[name]["rows"] += len(wanted)
+            shown[name] = dict(wanted)
+
+    print(f"{args.checkouts} checkouts, {WINDOW}-row windows, generated {scale.as_dict()}")
+    print(f"{'list':>14} {'inserted':>9} {'updated':>8} {'moved':>6} {'deleted':>8} {'untouched':>10} "
+          f"{'touched/refresh':>16} {'rebuild touched':>16}")
+    for name, total in totals.items():
+        touched = total["inserted"] + total["updated"] + total["moved"] + total["deleted"]
+        print(f"{name:>14} {total['inserted']:>9} {total['updated']:>8} {total['moved']:>6} {total['deleted']:>8} "
+              f"{total['unchanged']:>10} {touched / args.checkouts:>16.1f} {2 * total['rows'] / args.checkouts:>16.1f}")
+    print(f"diff planning: {plan_seconds / (args.checkouts * len(lists)) * 1e6:.0f} us per refresh")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure typeahead index build/query latency against the old linear scan.
+
+    python -m benchmarks.bench_typeahead [--names 50000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from typeahead import TypeaheadIndex, SUGGESTION_LIMIT
+
+SYLLABLES = ["ab", "ac", "al", "am", "an", "ar", "ce", "ci", "do", "en", "fa", "gi", "in", "ka",
+             "lo", "ma", "mi", "ne", "no", "ol", "pa", "ra", "ri", "sa", "ta", "te", "to", "xi", "zo"]
+
+
+def make_names(count, seed=7):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                 for _ in range(rng.randint(1, 3))]
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def make_queries(names, count, seed=11):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name = rng.choice(names).lower()
+        start = rng.randint(0, max(len(name) - 3, 0))
+        query = name[start:start + rng.randint(2, 6)]
+        if rng.random() < 0.2 and len(query) > 3:
+            i = rng.randrange(len(query))
+            query = query[:i] + rng.choice("aeiou") + query[i + 1:]
+        queries.append(query)
+    return queries
+
+
+def linear_scan(names, query):
+    query = query.strip().lower()
+    return [name for name in names if query in name.lower()]
+
+
+def timed(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    names = make_names(args.names)
+    queries = make_queries(names, args.queries)
+
+    start = time.perf_counter()
+    index = TypeaheadIndex(names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    index.sync(names[:-100] + [f"New Name {i}" for i in range(100)])
+    sync_ms = (time.perf_counter() - start) * 1000
+
+    scan_p50, scan_p95 = timed(lambda q: linear_scan(names, q), queries)
+    index_p50, index_p95 = timed(index.search, queries)
+
+    print(f"names:            {len(names)}")
+    print(f"index build:      {build_ms:.1f} ms")
+    print(f"sync 100 changes: {sync_ms:.1f} ms")
+    print(f"linear scan:      p50 {scan_p50:.2f} ms, p95 {scan_p95:.2f} ms")
+    print(f"index search:     p50 {index_p50:.2f} ms, p95 {index_p95:.2f} ms (top {SUGGESTION_LIMIT}, incl. typo matching)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Time every hot data path of the app against synthetic data, headless.
+
+    python -m benchmarks.suite [--items 100000] [--output results.json]
+                               [--save-baseline] [--tolerance 0.25]
+
+The database is generated by ``benchmarks.synthetic`` in a throwaway file.
+Each path is timed through the same mixin methods the GUI calls, on a
+window-less app object. Results are written as JSON and compared by median
+against ``benchmarks/baselines/hot_paths_<items>.json``; any path slower than
+the baseline by more than the tolerance, and by at least ``--min-delta-ms``
+so timer jitter on millisecond paths is not reported, exits with 1.
+
+The baseline for the default 100k items is checked in. After a deliberate
+performance change, refresh it on the reference machine with
+
+    python -m benchmarks.suite --save-baseline --repeat 21
+
+and commit ``benchmarks/baselines/hot_paths_100000.json`` with the change.
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from benchmarks.tempdb import DB_DIR  # noqa: F401  (sets the database URL; import first)
+import sqlalchemy
+from database import SessionLocal
+from migrations import run_migrations
+from models import Medicine
+from db_worker import Job
+from events import EventBus
+import services
+from report_cache import ReportCache
+from typeahead import TypeaheadIndex
+from sales_history import SalesHistoryFilter, recent_window
+from inventory import InventoryMixin
+from sales import SalesMixin
+from patients import PATIENT_HISTORY_PAGE_SIZE, PatientMixin
+from reports import ReportsMixin
+from alert import AlertMixin
+from benchmarks.synthetic import generate, patient_name
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+PAGE_SIZE = 200
+MEDICINE_QUERIES = ["p", "para", "amoxicillin", "cetamol 50", "ibuprofen", "azitromycin", "#12"]
+
+
+class HeadlessCombo(dict):
+    """Stands in for a ttk.Combobox: typed text plus the ``values`` item."""
+
+    def __init__(self, text=""):
+        super().__init__()
+        self.text = text
+
+    def get(self):
+        return self.text
+
+
+class HeadlessApp(InventoryMixin, SalesMixin, PatientMixin, ReportsMixin, AlertMixin):
+    """The app's mixins with only the state their data paths read; no window."""
+
+    def __init__(self):
+        self.services = services
+        self.events = EventBus()
+        self.sales_history_filter = recent_window()
+        self.report_cache = ReportCache()
+        self.alert_engine = None
+        self.medicine_index = TypeaheadIndex()
+        self.patient_index = TypeaheadIndex()
+        self.sale_combo = HeadlessCombo()
+        self.patient_combo = HeadlessCombo()
+        self._typeahead_jobs = {}
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": repeat,
+    }
+
+
+def hot_paths(app, session, scale, rng):
+    """name -> zero-argument callable, one per GUI data path."""
+    job = Job("bench", "bench")
+    today = date.today()
+    all_time = SalesHistoryFilter()
+    # Keyset position of the oldest page, as reached by scrolling to the end
+    oldest_cursor = session.execute(sqlalchemy.text(
+        "SELECT sale_date, id FROM sales ORDER BY sale_date, id LIMIT 1 OFFSET :n"
+    ), {"n": PAGE_SIZE}).first()
+    patient_ids = [rng.randint(1, scale.patients) for _ in range(50)]
+    in_stock = [
+        med for med in session.query(Medicine).filter(Medicine.quantity >= 1000).limit(50).all()
+    ]
+
+    def load_inventory():
+        app.count_inventory_rows()
+        app.fetch_inventory_rows(0, PAGE_SIZE)
+
+    def refresh_sales_tab():
+        app.fetch_sales_history(None, PAGE_SIZE, session)
+
+    def sales_history_last_page():
+        app.fetch_sales_history(tuple(oldest_cursor), PAGE_SIZE, session, all_time)
+
+    def sales_history_by_patient():
+        app.fetch_sales_history(None, PAGE_SIZE, session, SalesHistoryFilter(patient_id=rng.choice(patient_ids)))
+
+    def generate_report_cold():
+        app.report_cache = ReportCache()
+        app.compute_report(session, today - timedelta(days=365), today, job)
+
+    def generate_report_warm():
+        app.compute_report(session, today - timedelta(days=30), today, job)
+
+    def view_patient_history():
+        services.load_patient_history(session, rng.choice(patient_ids), PATIENT_HISTORY_PAGE_SIZE, job)
+
+    def patient_search():
+        app.fetch_patient_search_rows(patient_name(rng.choice(patient_ids)).split()[0], 0, PAGE_SIZE)
+
+    def random_cart():
+        lines = []
+        for med in rng.sample(in_stock, 3):
+            quantity = rng.randint(1, 3)
+            lines.append(services.CartLine(med.id, quantity, med.price * quantity, "1*2*3"))
+        return services.CheckoutRequest(rng.choice(patient_ids), lines)
+
+    def finalize_sale():
+        services.checkout(session, random_cart())
+
+    def checkout_batch_of_20():
+        services.checkout_many(session, [random_cart() for _ in range(20)])
+
+    def typeahead_medicines():
+        for query in MEDICINE_QUERIES:
+            for end in range(1, len(query) + 1):
+                app.sale_combo.text = query[:end]
+                app.apply_typeahead(app.sale_combo, app.medicine_index)
+
+    def typeahead_patients():
+        for query in (patient_name(pid) for pid in patient_ids[:5]):
+            for end in range(1, len(query) + 1):
+                app.patient_combo.text = query[:end]
+                app.apply_typeahead(app.patient_combo, app.patient_index)
+
+    generate_report_warm()
+    return {
+        "load_inventory": load_inventory,
+        "refresh_sales_tab": refresh_sales_tab,
+        "sales_history_last_page": sales_history_last_page,
+        "sales_history_by_patient": sales_history_by_patient,
+        "load_alerts": lambda: app.compute_alert_rows(session, job),
+        "generate_report_cold": generate_report_cold,
+        "generate_report_warm": generate_report_warm,
+        "view_patient_history": view_patient_history,
+        "patient_search": patient_search,
+        "finalize_sale": finalize_sale,
+        "checkout_batch_of_20": checkout_batch_of_20,
+        "load_medicines_for_sale": app.load_medicines_for_sale,
+        "load_patients_for_sale": app.load_patients_for_sale,
+        "typeahead_medicines": typeahead_medicines,
+        "typeahead_patients": typeahead_patients,
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["median_ms"] / max(previous["median_ms"], 0.001)
+        result["baseline_median_ms"] = previous["median_ms"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + tolerance and result["median_ms"] - previous["median_ms"] >= min_delta_ms:
+            regressions.append(f"{name}: {result['median_ms']:.2f} ms vs baseline {previous['median_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000, help="sale line items to generate (1k-10M)")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="run just these paths")
+    parser.add_argument("--output", help="write results JSON here (default: stdout only)")
+    parser.add_argument("--baseline", help="baseline JSON (default: baselines/hot_paths_<items>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this, however large the ratio")
+    args = parser.parse_args()
+
+    run_migrations()
+    started = time.perf_counter()
+    scale = generate(args.items, seed=args.seed)
+    print(f"generated {scale.as_dict()} in {time.perf_counter() - started:.1f} s")
+
+    rng = random.Random(args.seed)
+    with SessionLocal() as session:
+        app = HeadlessApp()
+        paths = hot_paths(app, session, scale, rng)
+        app.load_medicines_for_sale()
+        app.load_patients_for_sale()
+
+        results = {}
+        for name, fn in paths.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(fn, args.repeat)
+            print(f"{name:26} median {results[name]['median_ms']:9.2f} ms   min {results[name]['min_ms']:9.2f} ms")
+
+    baseline_path = Path(args.baseline) if args.baseline else BASELINE_DIR / f"hot_paths_{args.items}.json"
+    regressions = []
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"baseline saved to {baseline_path}")
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance, args.min_delta_ms)
+    else:
+        print(f"no baseline at {baseline_path}; nothing compared (run with --save-baseline to create one)")
+
+    report = {
+        "meta": {
+            "scale": scale.as_dict(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "date": date.today().isoformat(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "baseline": str(baseline_path) if baseline_path.exists() else None,
+        },
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+        print(f"results written to {args.output}")
+
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Deterministic synthetic data for the benchmarks.
+
+    PHARMACY_DATABASE_URL=sqlite:///bench.db python -m benchmarks.synthetic --items 1000000
+
+``generate(items)`` fills an empty database with users, medicines, patients,
+sales and sale_items sized from the number of line items (1k to 10M). The
+same seed and scale always produce the same rows. Rows are written in
+executemany chunks, so even the largest scales never sit in memory at once.
+
+Benchmarks that need a specific shape (a few hot medicines, patients only)
+use the building blocks ``seed_medicines``, ``seed_patients``, ``seed_sales``
+and ``clear`` directly.
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+CHUNK = 50_000
+HISTORY_DAYS = 3 * 365
+TYPES = ["Tablet", "Capsule", "Syrup", "Injection", "Cream", "Other"]
+WORDS = [
+    "Amoxi", "Para", "Ibu", "Cetiri", "Metfor", "Ome", "Losar", "Atorva", "Azithro", "Dexa",
+    "Predni", "Salbu", "Lora", "Diclo", "Cipro", "Fluco", "Genta", "Hydro", "Keto", "Napro",
+]
+SUFFIXES = ["cillin", "cetamol", "profen", "zine", "min", "prazole", "tan", "statin", "mycin", "sone"]
+FIRST_NAMES = ["Amos", "Grace", "John", "Mary", "Peter", "Ruth", "Daniel", "Esther", "Paul", "Sarah",
+               "David", "Joy", "James", "Faith", "Samuel", "Mercy", "Joseph", "Hope", "Isaac", "Ann"]
+LAST_NAMES = ["Mensah", "Owusu", "Banda", "Phiri", "Otieno", "Kamau", "Mwangi", "Okafor", "Adeyemi", "Nkosi",
+              "Dlamini", "Moyo", "Tembo", "Boateng", "Asante", "Kariuki", "Njoroge", "Chukwu", "Eze", "Bello"]
+CONDITIONS = ["hypertension", "diabetes", "asthma", "malaria", "allergy", "arthritis", "migraine", "ulcer"]
+
+
+class Scale:
+    """Row counts derived from the number of sale line items."""
+
+    def __init__(self, items):
+        self.items = items
+        self.sales = max(items * 2 // 7, 1)  # 3.5 items per sale on average
+        self.medicines = min(max(items // 200, 100), 50_000)
+        self.patients = min(max(items // 40, 50), 250_000)
+        self.users = 10
+
+    def as_dict(self):
+        return {
+            "items": self.items,
+            "sales": self.sales,
+            "medicines": self.medicines,
+            "patients": self.patients,
+            "users": self.users,
+        }
+
+
+def _insert(conn, table, rows):
+    from database import Base
+
+    if rows:
+        conn.execute(Base.metadata.tables[table].insert(), rows)
+
+
+def medicine_name(i):
+    return f"{WORDS[i % len(WORDS)]}{SUFFIXES[(i // len(WORDS)) % len(SUFFIXES)]} {i // 200 * 50 + 50}mg #{i}"
+
+
+def patient_name(i):
+    return f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]} {i}"
+
+
+def conditions(rng):
+    return ", ".join(rng.sample(CONDITIONS, rng.randint(0, 3)))
+
+
+# ---------------- BUILDING BLOCKS ----------------
+def _bind(bind):
+    from database import engine
+
+    return bind or engine
+
+
+def clear(bind=None):
+    """Delete every row of every table, children first."""
+    from database import Base
+
+    with _bind(bind).begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+def seed_medicines(count, bind=None, rng=None, price=None, quantity=None):
+    """Insert medicines 1..count and return {id: price}.
+
+    ``price`` and ``quantity`` fix those columns for every row (e.g. a known
+    starting stock to audit against); otherwise they are random.
+    """
+    rng = rng or random.Random(42)
+    today = date.today()
+    prices = {}
+    for offset in range(0, count, CHUNK):
+        rows = []
+        for i in range(offset + 1, min(offset + CHUNK, count) + 1):
+            prices[i] = round(rng.uniform(0.5, 80), 2) if price is None else price
+            rows.append({
+                "id": i,
+                "name": medicine_name(i),
+                "type": rng.choice(TYPES),
+                "expiry_date": None if rng.random() < 0.01 else today + timedelta(days=rng.randint(-60, 1500)),
+                "price": prices[i],
+                "quantity": rng.randint(0, 2000) if quantity is None else quantity,
+            })
+        with _bind(bind).begin() as conn:
+            _insert(conn, "medicines", rows)
+    return prices
+
+
+def seed_patients(count, bind=None, rng=None, medical_history=conditions):
+    """Insert patients 1..count; ``medical_history(rng)`` writes each history."""
+    rng = rng or random.Random(42)
+    for offset in range(0, count, CHUNK):
+        with _bind(bind).begin() as conn:
+            _insert(conn, "patients", [
+                {
+                    "id": i,
+                    "name": patient_name(i),
+                    "age": rng.randint(1, 95),
+                    "medical_history": medical_history(rng),
+                }
+                for i in range(offset + 1, min(offset + CHUNK, count) + 1)
+            ])
+
+
+def seed_sales(items, prices, patients, bind=None, rng=None, sales=None):
+    """Insert sales with exactly ``items`` line items; returns the number of sales.
+
+    Sales are spread evenly over the history window, oldest first, with 1-6
+    line items each, drawn from the medicines in ``prices`` ({id: price}).
+    ``sales`` is the expected sale count used to spread the dates.
+    """
+    rng = rng or random.Random(42)
+    sales = sales or max(items * 2 // 7, 1)
+    medicines = len(prices)
+    first_day = date.today() - timedelta(days=HISTORY_DAYS)
+    item_id = 0
+    sale_id = 0
+    while item_id < items:
+        sale_rows, lines = [], []
+        while item_id < items and len(lines) < CHUNK:
+            sale_id += 1
+            sale_date = first_day + timedelta(days=min(sale_id * HISTORY_DAYS // sales, HISTORY_DAYS))
+            total = 0.0
+            for _ in range(min(rng.randint(1, 6), items - item_id)):
+                item_id += 1
+                medicine_id = rng.randint(1, medicines)
+                quantity = rng.randint(1, 5)
+                subtotal = round(prices[medicine_id] * quantity, 2)
+                total += subtotal
+                lines.append({
+                    "id": item_id,
+                    "sale_id": sale_id,
+                    "medicine_id": medicine_id,
+                    "quantity": quantity,
+                    "subtotal": subtotal,
+                    "prescription": None,
+                })
+            sale_rows.append({
+                "id": sale_id,
+                "sale_date": sale_date,
+                "total_amount": round(total, 2),
+                "patient_id": rng.randint(1, patients) if patients and rng.random() < 0.9 else None,
+            })
+        with _bind(bind).begin() as conn:
+            _insert(conn, "sales", sale_rows)
+            _insert(conn, "sale_items", lines)
+    return sale_id
+
+
+def generate(items, bind=None, seed=42):
+    """Populate ``bind`` (an up-to-date, empty schema) and return the Scale used."""
+    from rollups import rebuild_patient_summaries, rebuild_rollups
+
+    bind = _bind(bind)
+    scale = Scale(items)
+    rng = random.Random(seed)
+
+    with bind.begin() as conn:
+        _insert(conn, "users", [
+            {"username": f"user{i}", "password": "bench", "role": "manager" if i == 0 else "staff"}
+            for i in range(scale.users)
+        ])
+    prices = seed_medicines(scale.medicines, bind, rng)
+    seed_patients(scale.patients, bind, rng)
+    scale.sales = seed_sales(items, prices, scale.patients, bind, rng, scale.sales)
+
+    with bind.begin() as conn:
+        rebuild_rollups(conn)
+        rebuild_patient_summaries(conn)
+    return scale
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Fill the configured database with synthetic data.")
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from database import engine
+    from migrations import run_migrations
+    from sqlalchemy import text
+
+    run_migrations()
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT EXISTS (SELECT 1 FROM medicines)")).scalar():
+            sys.exit(f"refusing to add synthetic rows to a non-empty database: {engine.url}")
+    started = time.perf_counter()
+    result = generate(args.items, seed=args.seed)
+    print(f"generated {result.as_dict()} in {time.perf_counter() - started:.1f} s")
@@ -0,0 +1,20 @@
+"""Throwaway database for one benchmark run.
+
+Import it before anything that imports ``database``:
+
+    from benchmarks.tempdb import DB_DIR
+
+PHARMACY_DATABASE_URL then points at ``bench.db`` in a temporary directory
+that is removed at exit, unless the variable is already set (by the user, or
+by the parent of a spawned worker process). DB_DIR also holds the run's
+other scratch files.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_DIR = tempfile.mkdtemp(prefix="pharmacy-bench-")
+atexit.register(shutil.rmtree, DB_DIR, ignore_errors=True)
+os.environ.setdefault("PHARMACY_DATABASE_URL", f"sqlite:///{os.path.join(DB_DIR, 'bench.db')}")
@@ -0,0 +1,151 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+# name -> (fade steps, ms between frames, resampling filter, seconds to hold each image)
+FADE_MODES = {
+    "quality": (20, 50, Image.Resampling.LANCZOS, 2.0),
+    "balanced": (12, 80, Image.Resampling.BILINEAR, 3.0),
+    "low": (6, 150, Image.Resampling.NEAREST, 5.0),
+}
+DEFAULT_FADE_MODE = os.environ.get("PHARMACY_FADE_MODE", "quality")
+DEFAULT_MAX_FRAMES = int(os.environ.get("PHARMACY_FADE_MAX_FRAMES", "24"))
+
+
+def build_fade_frames(first, second, steps):
+    """Blend sequence from ``first`` to ``second``, both endpoints included."""
+    return [Image.blend(first, second, step / steps) for step in range(steps + 1)]
+
+
+class BackgroundFader:
+    """Cross-fades the homepage background between a list of images.
+
+    Images are decoded and scaled to the window size once, and every blend
+    sequence is generated on a worker thread. Finished frames are cached per
+    window size and image pair (converted to PhotoImages when first shown), so
+    later cycles only swap images. A fade from B to A reuses the A to B frames
+    in reverse. The cache is cleared only when the window really changes size,
+    and it is capped at ``max_frames`` frames.
+    """
+
+    def __init__(self, root, label, image_paths, mode=DEFAULT_FADE_MODE, max_frames=DEFAULT_MAX_FRAMES):
+        self.root = root
+        self.label = label
+        self.image_paths = list(image_paths)
+        self.steps, self.delay, self.resample, hold = FADE_MODES[mode]
+        self.hold_ms = int(hold * 1000)
+        self.max_frames = max(max_frames, self.steps + 1)
+
+        self._size = None
+        self._current = 0
+        self._frames = OrderedDict()
+        self._requested = set()
+        self._after_id = None
+        self._resize_id = None
+
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        threading.Thread(target=self._render_worker, name="bg-fader", daemon=True).start()
+
+    def start(self):
+        self.root.bind("<Configure>", self._on_configure, add="+")
+        self._schedule(0, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._requests.put(None)
+
+    # ---------------- Tk Thread ----------------
+    def _window_size(self):
+        return max(self.root.winfo_width(), 1), max(self.root.winfo_height(), 1)
+
+    def _on_configure(self, event):
+        if event.widget is not self.root:
+            return
+        if self._resize_id is not None:
+            self.root.after_cancel(self._resize_id)
+        self._resize_id = self.root.after(200, self._apply_resize)
+
+    def _apply_resize(self):
+        self._resize_id = None
+        size = self._window_size()
+        if size != self._size:
+            self._size = size
+            self._frames.clear()
+            self._requested.clear()
+
+    def _schedule(self, delay, callback, *args):
+        self._after_id = self.root.after(delay, callback, *args)
+
+    def _tick(self):
+        self._drain_results()
+        if self._size is None:
+            self._size = self._window_size()
+
+        first, second = self._current, (self._current + 1) % len(self.image_paths)
+        key = (self._size, min(first, second), max(first, second))
+        frames = self._frames.get(key)
+        if frames is None:
+            if key not in self._requested:
+                self._requested.add(key)
+                self._requests.put(key)
+            self._schedule(self.delay, self._tick)
+            return
+
+        self._frames.move_to_end(key)
+        self._play(frames, first > second, 0, second)
+
+    def _play(self, frames, reverse, step, next_image):
+        index = len(frames) - 1 - step if reverse else step
+        # Frames arrive as PIL images and are converted once, when first shown
+        if not isinstance(frames[index], ImageTk.PhotoImage):
+            frames[index] = ImageTk.PhotoImage(frames[index])
+        self.label.config(image=frames[index])
+        self.label.image = frames[index]
+
+        if step < len(frames) - 1:
+            self._schedule(self.delay, self._play, frames, reverse, step + 1, next_image)
+        else:
+            self._current = next_image
+            self._schedule(self.hold_ms, self._tick)
+
+    def _drain_results(self):
+        while True:
+            try:
+                key, images = self._results.get_nowait()
+            except queue.Empty:
+                return
+            self._requested.discard(key)
+            if key[0] != self._size:
+                continue
+
+            self._frames[key] = images
+            while sum(len(frames) for frames in self._frames.values()) > self.max_frames:
+                self._frames.popitem(last=False)
+
+    # ---------------- Worker Thread ----------------
+    def _render_worker(self):
+        decoded = {}
+        scaled = {}
+        while True:
+            key = self._requests.get()
+            if key is None:
+                return
+
+            size, first, second = key
+            for index in (first, second):
+                if index not in decoded:
+                    decoded[index] = Image.open(self.image_paths[index]).convert("RGB")
+                if (size, index) not in scaled:
+                    scaled[(size, index)] = decoded[index].resize(size, self.resample)
+
+            # Only the newest window size is worth keeping scaled copies for
+            for stale in [k for k in scaled if k[0] != size]:
+                del scaled[stale]
+
+            frames = build_fade_frames(scaled[(size, first)], scaled[(size, second)], self.steps)
+            self._results.put((key, frames))
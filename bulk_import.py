@@ -0,0 +1,301 @@
+import argparse
+import csv
+import sys
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import List, Set, Tuple
+from sqlalchemy import bindparam, func, select, update
+from database import engine
+from models import Medicine, StockEntry
+from retry import DEFAULT_RETRY_POLICY
+
+CHUNK_SIZE = 2000
+CATALOG_COLUMNS = ("name", "type", "expiry_date", "price", "quantity")
+DELIVERY_COLUMNS = ("name", "quantity")
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    dry_run: bool
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    stock_entries: int = 0
+    medicine_ids: Set[int] = field(default_factory=set)
+    # (line number, message) per rejected row
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def rows_ok(self):
+        return self.rows_read - len(self.errors)
+
+    def summary(self):
+        verb = "Would import" if self.dry_run else "Imported"
+        lines = [
+            f"{verb} {self.rows_ok} of {self.rows_read} {self.kind} row(s): "
+            f"{self.inserted} new, {self.updated} updated, {self.stock_entries} stock entr(ies)."
+        ]
+        if self.errors:
+            lines.append(f"{len(self.errors)} row(s) rejected:")
+            lines.extend(f"  line {line_no}: {message}" for line_no, message in self.errors)
+        return "\n".join(lines)
+
+
+# ---------------- VALIDATION ----------------
+def _text(row, column, required=True):
+    value = (row.get(column) or "").strip()
+    if required and not value:
+        raise RowError(f"{column} is required")
+    return value
+
+
+def _positive_int(row, column, allow_zero=True):
+    try:
+        value = int(_text(row, column))
+    except ValueError:
+        raise RowError(f"{column} must be a whole number")
+    if value < 0 or (value == 0 and not allow_zero):
+        raise RowError(f"{column} must be {'zero or more' if allow_zero else 'greater than 0'}")
+    return value
+
+
+def _date(row, column, required=True):
+    value = _text(row, column, required)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise RowError(f"{column} must be YYYY-MM-DD")
+
+
+def parse_catalog_row(row, today):
+    expiry = _date(row, "expiry_date")
+    if expiry < today:
+        raise RowError("cannot add expired medicine")
+    try:
+        price = float(_text(row, "price"))
+    except ValueError:
+        raise RowError("price must be a number")
+    if price < 0:
+        raise RowError("price cannot be negative")
+
+    return {
+        "name": _text(row, "name"),
+        "type": _text(row, "type", required=False) or "Tablet",
+        "expiry_date": expiry,
+        "price": price,
+        "quantity": _positive_int(row, "quantity"),
+    }
+
+
+def parse_delivery_row(row, today):
+    expiry = _date(row, "expiry_date", required=False)
+    if expiry is not None and expiry < today:
+        raise RowError("cannot add expired medicine")
+
+    return {
+        "name": _text(row, "name"),
+        "quantity": _positive_int(row, "quantity", allow_zero=False),
+        "entry_date": _date(row, "entry_date", required=False) or today,
+        "expiry_date": expiry,
+    }
+
+
+# ---------------- STREAMING ----------------
+def _chunks(reader, size):
+    # Line 1 is the header, so data starts on line 2
+    numbered = enumerate(reader, start=2)
+    while True:
+        chunk = list(islice(numbered, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _open_reader(source, required_columns):
+    reader = csv.DictReader(source)
+    columns = {(name or "").strip().lower() for name in reader.fieldnames or ()}
+    missing = [column for column in required_columns if column not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    reader.fieldnames = [(name or "").strip().lower() for name in reader.fieldnames]
+    return reader
+
+
+def _existing_ids(conn, names):
+    # Duplicate names resolve to the newest medicine, as in the sales medicine_map
+    rows = conn.execute(
+        select(Medicine.name, Medicine.id).where(Medicine.name.in_(names)).order_by(Medicine.id)
+    )
+    return dict(rows.all())
+
+
+def _validated(chunk, parse, report, today):
+    valid = {}
+    for line_no, row in chunk:
+        report.rows_read += 1
+        try:
+            values = parse(row, today)
+        except RowError as e:
+            report.errors.append((line_no, str(e)))
+            continue
+        valid[line_no] = values
+    return valid
+
+
+def import_catalog(source, dry_run=False, chunk_size=CHUNK_SIZE, bind=engine, job=None):
+    """Upsert medicines by name from a CSV with name,type,expiry_date,price,quantity."""
+    report = ImportReport("catalog", dry_run)
+    reader = _open_reader(source, CATALOG_COLUMNS)
+    today = date.today()
+
+    update_stmt = (
+        update(Medicine.__table__)
+        .where(Medicine.__table__.c.id == bindparam("medicine_id"))
+        .values(
+            type=bindparam("type"),
+            expiry_date=bindparam("expiry_date"),
+            price=bindparam("price"),
+            quantity=bindparam("quantity"),
+            version=Medicine.__table__.c.version + 1,
+        )
+    )
+
+    def write_chunk(by_name):
+        with bind.begin() as conn:
+            existing = _existing_ids(conn, list(by_name))
+            updates = [dict(values, medicine_id=existing[name]) for name, values in by_name.items() if name in existing]
+            inserts = [values for name, values in by_name.items() if name not in existing]
+            inserted_ids = []
+            if not dry_run:
+                if updates:
+                    conn.execute(update_stmt, updates)
+                if inserts:
+                    conn.execute(Medicine.__table__.insert(), inserts)
+                    inserted_ids = _existing_ids(conn, [values["name"] for values in inserts]).values()
+            return existing, len(updates), len(inserts), inserted_ids
+
+    # Dry run only: names an earlier chunk would have inserted
+    planned = set()
+    for chunk in _chunks(reader, chunk_size):
+        if job is not None:
+            job.check()
+        valid = _validated(chunk, parse_catalog_row, report, today)
+        # A name repeated within the chunk keeps its last row
+        by_name = {values["name"]: values for values in valid.values()}
+        if not by_name:
+            continue
+
+        # Another terminal holding the write lock only delays the chunk
+        existing, updated, inserted, inserted_ids = DEFAULT_RETRY_POLICY.run(lambda: write_chunk(by_name))
+        if dry_run:
+            # Nothing was written, so those names still look new; the real run updates them
+            new_names = [name for name in by_name if name not in existing]
+            repeated = sum(name in planned for name in new_names)
+            planned.update(new_names)
+            updated += repeated
+            inserted -= repeated
+        report.updated += updated
+        report.inserted += inserted
+        report.medicine_ids.update(existing.values())
+        report.medicine_ids.update(inserted_ids)
+
+    return report
+
+
+def import_deliveries(source, dry_run=False, chunk_size=CHUNK_SIZE, bind=engine, job=None):
+    """Add delivered stock from a CSV with name,quantity[,entry_date][,expiry_date]."""
+    report = ImportReport("delivery", dry_run)
+    reader = _open_reader(source, DELIVERY_COLUMNS)
+    today = date.today()
+
+    table = Medicine.__table__
+    add_stock = (
+        update(table)
+        .where(table.c.id == bindparam("medicine_id"))
+        .values(quantity=func.coalesce(table.c.quantity, 0) + bindparam("added"), version=table.c.version + 1)
+    )
+    set_expiry = (
+        update(table)
+        .where(table.c.id == bindparam("medicine_id"))
+        .values(expiry_date=bindparam("new_expiry"), version=table.c.version + 1)
+    )
+
+    def write_chunk(valid):
+        with bind.begin() as conn:
+            existing = _existing_ids(conn, list({values["name"] for values in valid.values()}))
+            entries, unknown = [], []
+            for line_no, values in valid.items():
+                medicine_id = existing.get(values["name"])
+                if medicine_id is None:
+                    unknown.append((line_no, f"unknown medicine {values['name']!r}"))
+                    continue
+                entries.append(dict(values, medicine_id=medicine_id))
+            if dry_run or not entries:
+                return entries, unknown
+
+            conn.execute(add_stock, [{"medicine_id": e["medicine_id"], "added": e["quantity"]} for e in entries])
+            expiries = [
+                {"medicine_id": e["medicine_id"], "new_expiry": e["expiry_date"]}
+                for e in entries if e["expiry_date"] is not None
+            ]
+            if expiries:
+                conn.execute(set_expiry, expiries)
+            conn.execute(
+                StockEntry.__table__.insert(),
+                [
+                    {"medicine_id": e["medicine_id"], "quantity_added": e["quantity"], "entry_date": e["entry_date"]}
+                    for e in entries
+                ],
+            )
+            return entries, unknown
+
+    for chunk in _chunks(reader, chunk_size):
+        if job is not None:
+            job.check()
+        valid = _validated(chunk, parse_delivery_row, report, today)
+        if not valid:
+            continue
+
+        entries, unknown = DEFAULT_RETRY_POLICY.run(lambda: write_chunk(valid))
+        report.errors.extend(unknown)
+        report.updated += len({entry["medicine_id"] for entry in entries})
+        report.stock_entries += len(entries)
+        report.medicine_ids.update(entry["medicine_id"] for entry in entries)
+
+    report.errors.sort()
+    return report
+
+
+IMPORTERS = {
+    "catalog": import_catalog,
+    "deliveries": import_deliveries,
+}
+
+
+def import_file(kind, path, dry_run=False, chunk_size=CHUNK_SIZE, job=None):
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        return IMPORTERS[kind](source, dry_run=dry_run, chunk_size=chunk_size, job=job)
+
+
+if __name__ == "__main__":
+    from migrations import run_migrations
+
+    parser = argparse.ArgumentParser(description="Bulk import medicines or stock deliveries from CSV.")
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("path")
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    run_migrations()
+    result = import_file(args.kind, args.path, dry_run=args.dry_run, chunk_size=args.chunk_size)
+    print(result.summary())
+    sys.exit(1 if result.errors else 0)
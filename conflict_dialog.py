@@ -0,0 +1,22 @@
+from tkinter import messagebox
+
+OVERWRITE = "overwrite"
+RELOAD = "reload"
+
+
+def ask_conflict_resolution(what, error):
+    """Ask how to settle a ``services.ConflictError``: OVERWRITE, RELOAD or None (cancel)."""
+    if error.current is None:
+        messagebox.showwarning("Changed Elsewhere", f"{error}\n\nThe {what} list will be reloaded.")
+        return RELOAD
+
+    answer = messagebox.askyesnocancel(
+        "Changed Elsewhere",
+        f"This {what} was changed on another terminal after you opened it.\n\n"
+        "Yes: save your version over theirs\n"
+        "No: discard your changes and load theirs\n"
+        "Cancel: keep editing",
+    )
+    if answer is None:
+        return None
+    return OVERWRITE if answer else RELOAD
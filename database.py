@@ -1,9 +1,80 @@
-from sqlalchemy import create_engine
+import os
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///pharmacy.db"
+DATABASE_URL = os.environ.get("PHARMACY_DATABASE_URL", "sqlite:///pharmacy.db")
+
+# ---------------- SQLITE PRAGMA PROFILES ----------------
+# Applied to every pooled connection. "performance" lets reports and
+# checkouts on the same file overlap (WAL + busy timeout); "safe" trades
+# throughput for a full fsync on every commit.
+PRAGMA_PROFILES = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "foreign_keys": "ON",
+    },
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -16 * 1024,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 10000,
+        "foreign_keys": "ON",
+    },
+    "legacy": {},
+}
+
+DB_PROFILE = os.environ.get("PHARMACY_DB_PROFILE", "performance")
+if DB_PROFILE not in PRAGMA_PROFILES:
+    raise ValueError(f"Unknown PHARMACY_DB_PROFILE {DB_PROFILE!r}; expected one of {sorted(PRAGMA_PROFILES)}")
 
 engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def apply_pragma_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in PRAGMA_PROFILES[DB_PROFILE].items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def read_pragmas(bind=engine):
+    """Return the settings actually in effect on a pooled connection."""
+    names = PRAGMA_PROFILES["performance"].keys() | PRAGMA_PROFILES[DB_PROFILE].keys()
+    with bind.connect() as conn:
+        return {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name in sorted(names)}
+
+
+# ---------------- SESSIONS ----------------
+# Sessions live for one unit of work (``session_scope``) and hand back plain
+# data, so objects need not be expired and re-SELECTed after each commit.
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+
+@contextmanager
+def session_scope():
+    """A session for one operation; closing it drops its identity map."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
 
 Base = declarative_base()
+
+
+if __name__ == "__main__":
+    print(f"Profile: {DB_PROFILE}")
+    for name, value in read_pragmas().items():
+        print(f"  {name} = {value}")
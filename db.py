@@ -1,7 +1,5 @@
-from database import engine, Base
-import models
+from migrations import run_migrations
 
-Base.metadata.drop_all(engine)
-Base.metadata.create_all(engine)
+version = run_migrations()
 
-print("Database reset successfully.")
+print(f"Database schema is up to date (version {version}).")
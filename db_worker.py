@@ -0,0 +1,165 @@
+import queue
+import sys
+import threading
+from database import SessionLocal
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle for one unit of background DB work.
+
+    Work functions receive the job and should call ``job.check()`` between
+    queries so a cancelled or superseded request stops early. A job submitted
+    with ``cancellable=False`` ignores ``cancel()`` and always runs to the end.
+    """
+
+    def __init__(self, key, label, cancellable=True):
+        self.key = key
+        self.label = label
+        self.cancellable = cancellable
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        if self.cancellable:
+            self._cancelled.set()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+
+class DBWorker:
+    """Runs DB work on a worker thread with its own session.
+
+    ``submit(key, work, on_done)`` queues ``work(session, job)``; its return
+    value is handed to ``on_done`` on the Tk thread via ``root.after``. A newer
+    submission with the same key cancels the older one, and results of
+    cancelled or superseded jobs are dropped. Jobs submitted with
+    ``cancellable=False`` (writes that commit as they go) are neither cancelled
+    nor superseded, and their callbacks always run. Work functions must return
+    plain data, never ORM objects bound to the worker session.
+    """
+
+    def __init__(self, root, on_busy_change=None, on_error=None, poll_ms=30):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {}
+        self._pending = []
+        self._poll_id = None
+
+        self._thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+        self._thread.start()
+
+    # ---------------- Tk Thread ----------------
+    def submit(self, key, work, on_done, on_error=None, label=None, cancellable=True):
+        previous = self._latest.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        job = Job(key, label or key, cancellable)
+        self._latest[key] = job
+        self._pending.append(job)
+        self._requests.put((job, work, on_done, on_error))
+
+        self._notify_busy()
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+        return job
+
+    def cancel(self, key):
+        job = self._latest.get(key)
+        if job is not None and job.cancellable:
+            del self._latest[key]
+            job.cancel()
+        self._notify_busy()
+
+    def cancel_all(self):
+        for key in list(self._latest):
+            self.cancel(key)
+
+    @property
+    def busy_labels(self):
+        return [job.label for job in self._pending if not job.cancelled]
+
+    def stop(self):
+        self.cancel_all()
+        self._requests.put(None)
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except Exception:
+                pass
+            self._poll_id = None
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                job, status, payload, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if job in self._pending:
+                self._pending.remove(job)
+
+            current = self._latest.get(job.key) is job
+            if current:
+                del self._latest[job.key]
+            if job.cancelled or status == "cancelled" or (not current and job.cancellable):
+                continue
+
+            self._dispatch(status, payload, on_done, on_error or self.on_error)
+
+        self._notify_busy()
+        if self._pending:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+    def _dispatch(self, status, payload, on_done, handle_error):
+        # A failing callback is reported like any Tk callback error; the poll
+        # carries on so later results are still delivered
+        try:
+            if status == "ok":
+                on_done(payload)
+            elif handle_error is not None:
+                handle_error(payload)
+            else:
+                raise payload
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def _notify_busy(self):
+        if self.on_busy_change is not None:
+            self.on_busy_change(self.busy_labels)
+
+    # ---------------- Worker Thread ----------------
+    def _run(self):
+        session = SessionLocal()
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+
+            job, work, on_done, on_error = request
+            try:
+                job.check()
+                result = ("ok", work(session, job))
+            except Cancelled:
+                result = ("cancelled", None)
+            except Exception as e:
+                result = ("error", e)
+            finally:
+                session.close()
+
+            self._results.put((job, *result, on_done, on_error))
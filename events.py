@@ -0,0 +1,84 @@
+"""In-process change notifications between the tabs of one terminal.
+
+Code that writes publishes a typed event once the write has committed;
+tabs subscribe to the events that make their lists stale. Events published
+in one burst (a checkout touches stock and sales at once, an import touches
+thousands of medicines) are delivered together on the next idle turn of the
+Tk loop, so each subscriber refreshes once per frame rather than once per
+event.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+
+# ---------------- EVENTS ----------------
+@dataclass(frozen=True)
+class StockChanged:
+    """Quantities of these medicines changed (sale, delivery, import)."""
+    medicine_ids: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class MedicinesEdited:
+    """Medicines were added, edited or deleted; names and prices may differ."""
+    medicine_ids: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class SaleCreated:
+    sale_id: int
+    patient_id: int
+    medicine_ids: Tuple[int, ...] = ()
+
+
+@dataclass(frozen=True)
+class PatientsChanged:
+    """Patients were added, edited or deleted."""
+    patient_ids: Tuple[int, ...] = ()
+
+
+# ---------------- BUS ----------------
+class EventBus:
+    """Publish/subscribe with per-frame coalescing.
+
+    ``schedule(callback)`` arranges for ``callback`` to run once the current
+    burst is over (``root.after_idle`` in the app). Without one, events are
+    delivered as soon as they are published.
+    """
+
+    def __init__(self, schedule=None):
+        self.schedule = schedule
+        self.published = 0
+        self.deliveries = 0
+        self._subscribers = []
+        self._pending = []
+        self._scheduled = False
+
+    def subscribe(self, event_types, handler):
+        """Call ``handler(events)`` with the matching events of each burst; returns an unsubscribe function."""
+        subscription = (tuple(event_types), handler)
+        self._subscribers.append(subscription)
+
+        def unsubscribe():
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+        return unsubscribe
+
+    def publish(self, event):
+        self.published += 1
+        self._pending.append(event)
+        if self.schedule is None:
+            self.flush()
+        elif not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.flush)
+
+    def flush(self):
+        self._scheduled = False
+        events, self._pending = self._pending, []
+        for event_types, handler in list(self._subscribers):
+            matching = [event for event in events if isinstance(event, event_types)]
+            if matching:
+                self.deliveries += 1
+                handler(matching)
@@ -0,0 +1,239 @@
+import argparse
+import csv
+import os
+from datetime import datetime
+from sqlalchemy import select
+from database import engine
+from models import Medicine, Patient, Sale, SaleItem, DailySales, DailyMedicineSales
+
+BATCH_SIZE = 10_000
+
+# Column types, used for the Arrow schema (CSV writes everything as text)
+INT, FLOAT, TEXT, DATE = "int", "float", "text", "date"
+
+
+# ---------------- DATASETS ----------------
+def _sales_query():
+    return (
+        select(
+            Sale.id.label("sale_id"),
+            Sale.sale_date,
+            Sale.patient_id,
+            Patient.name.label("patient_name"),
+            Sale.total_amount,
+        )
+        .outerjoin(Patient, Patient.id == Sale.patient_id)
+        .order_by(Sale.id)
+    )
+
+
+def _sale_items_query():
+    return (
+        select(
+            SaleItem.id.label("item_id"),
+            SaleItem.sale_id,
+            Sale.sale_date,
+            SaleItem.medicine_id,
+            Medicine.name.label("medicine_name"),
+            Medicine.type.label("medicine_type"),
+            SaleItem.quantity,
+            SaleItem.subtotal,
+            SaleItem.prescription,
+        )
+        .join(Sale, Sale.id == SaleItem.sale_id)
+        .outerjoin(Medicine, Medicine.id == SaleItem.medicine_id)
+        .order_by(SaleItem.id)
+    )
+
+
+def _medicines_query():
+    return select(
+        Medicine.id.label("medicine_id"),
+        Medicine.name,
+        Medicine.type,
+        Medicine.expiry_date,
+        Medicine.price,
+        Medicine.quantity,
+    ).order_by(Medicine.id)
+
+
+def _daily_sales_query():
+    return select(
+        DailySales.sale_date,
+        DailySales.transaction_count,
+        DailySales.amount,
+    ).order_by(DailySales.sale_date)
+
+
+def _daily_medicine_sales_query():
+    return (
+        select(
+            DailyMedicineSales.sale_date,
+            DailyMedicineSales.medicine_id,
+            Medicine.name.label("medicine_name"),
+            DailyMedicineSales.quantity,
+            DailyMedicineSales.amount,
+            DailyMedicineSales.transaction_count,
+        )
+        .outerjoin(Medicine, Medicine.id == DailyMedicineSales.medicine_id)
+        .order_by(DailyMedicineSales.sale_date, DailyMedicineSales.medicine_id)
+    )
+
+
+# name -> (query builder, date column used by the filters or None, column types)
+DATASETS = {
+    "sales": (
+        _sales_query, Sale.sale_date,
+        [INT, DATE, INT, TEXT, FLOAT],
+    ),
+    "sale_items": (
+        _sale_items_query, Sale.sale_date,
+        [INT, INT, DATE, INT, TEXT, TEXT, INT, FLOAT, TEXT],
+    ),
+    "medicines": (
+        _medicines_query, None,
+        [INT, TEXT, TEXT, DATE, FLOAT, INT],
+    ),
+    "daily_sales": (
+        _daily_sales_query, DailySales.sale_date,
+        [DATE, INT, FLOAT],
+    ),
+    "daily_medicine_sales": (
+        _daily_medicine_sales_query, DailyMedicineSales.sale_date,
+        [DATE, INT, TEXT, INT, FLOAT, INT],
+    ),
+}
+
+
+def build_query(dataset, start=None, end=None):
+    make_query, date_column, _ = DATASETS[dataset]
+    query = make_query()
+    if date_column is not None:
+        if start is not None:
+            query = query.where(date_column >= start)
+        if end is not None:
+            query = query.where(date_column <= end)
+    return query
+
+
+# ---------------- FORMATS ----------------
+def pyarrow_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_formats():
+    return ["csv", "parquet", "arrow"] if pyarrow_available() else ["csv"]
+
+
+def format_for_path(path):
+    extension = os.path.splitext(path)[1].lower()
+    return {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}.get(extension, "csv")
+
+
+class CsvWriter:
+    def __init__(self, path, columns, types):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowWriter:
+    """Writes each batch as one Parquet row group or Arrow IPC record batch."""
+
+    def __init__(self, path, columns, types, fmt):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {INT: pa.int64(), FLOAT: pa.float64(), TEXT: pa.string(), DATE: pa.date32()}
+        self._pa = pa
+        self._schema = pa.schema([(name, arrow_types[kind]) for name, kind in zip(columns, types)])
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, rows):
+        arrays = [
+            self._pa.array(values, type=field.type)
+            for values, field in zip(zip(*rows), self._schema)
+        ]
+        self._writer.write_batch(self._pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def open_writer(path, fmt, columns, types):
+    if fmt == "csv":
+        return CsvWriter(path, columns, types)
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    if not pyarrow_available():
+        raise RuntimeError(f"{fmt} export needs pyarrow; install it or export to CSV")
+    return ArrowWriter(path, columns, types, fmt)
+
+
+# ---------------- EXPORT ----------------
+def export_dataset(dataset, path, fmt=None, start=None, end=None,
+                   batch_size=BATCH_SIZE, bind=engine, job=None):
+    """Stream ``dataset`` into ``path`` one batch at a time; returns the row count.
+
+    Rows are fetched with ``yield_per`` so only one batch is held in memory.
+    The file is written next to ``path`` and moved into place when complete,
+    so a failed or cancelled export never leaves a truncated file behind.
+    """
+    fmt = fmt or format_for_path(path)
+    query = build_query(dataset, start, end)
+    columns = [column.name for column in query.selected_columns]
+    types = DATASETS[dataset][2]
+
+    partial = f"{path}.part"
+    writer = open_writer(partial, fmt, columns, types)
+    count = 0
+    try:
+        with bind.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+            for rows in result.partitions():
+                if job is not None:
+                    job.check()
+                writer.write(rows)
+                count += len(rows)
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(partial)
+        raise
+
+    os.replace(partial, path)
+    return count
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pharmacy data to CSV, Parquet or Arrow IPC.")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("path", help="output file; the extension picks the format unless --format is given")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"])
+    parser.add_argument("--from", dest="start", type=_parse_date, help="first sale date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=_parse_date, help="last sale date (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    rows = export_dataset(
+        args.dataset, args.path, fmt=args.format,
+        start=args.start, end=args.end, batch_size=args.batch_size,
+    )
+    print(f"Exported {rows} {args.dataset} row(s) to {args.path}")
@@ -1,7 +1,12 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime, date
-from models import Medicine
+from tkinter import ttk, messagebox, filedialog
+from dataclasses import replace
+from datetime import datetime
+from database import session_scope
+import services
+from conflict_dialog import OVERWRITE, RELOAD, ask_conflict_resolution
+from virtual_tree import VirtualTreeview
+from events import MedicinesEdited, StockChanged
 
 class InventoryMixin:
 
@@ -53,15 +58,29 @@ class InventoryMixin:
         )
         self.save_btn.grid(row=5, column=0, columnspan=2, pady=10)
 
+        import_frame = ttk.Frame(form)
+        import_frame.grid(row=6, column=0, columnspan=2)
+        ttk.Button(
+            import_frame, text="Import Catalog CSV", command=lambda: self.import_csv("catalog")
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            import_frame, text="Import Deliveries CSV", command=lambda: self.import_csv("deliveries")
+        ).pack(side="left", padx=5)
+
         self.selected_medicine_id = None
+        self.selected_medicine_version = None
 
         # -------- TABLE --------
         table_frame = ttk.LabelFrame(frame, text="Inventory List", padding=20)
         table_frame.pack(fill="both", expand=True)
 
         columns = ("ID", "Name", "Type", "Price", "Quantity", "Expiry", "Edit", "Delete")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
-        self.tree.pack(fill="both", expand=True)
+        self.tree = VirtualTreeview(table_frame, columns=columns, show="headings")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=scrollbar.set)
 
         for col in columns:
             self.tree.heading(col, text=col)
@@ -75,70 +94,104 @@ class InventoryMixin:
         self.load_inventory()
 
 
+    def inventory_tab_events(self):
+        return [((StockChanged, MedicinesEdited), self.load_inventory)]
+
+
     def add_medicine(self):
         try:
-            name = self.name_entry.get()
-            med_type = self.type_combo.get()
-            expiry = datetime.strptime(self.expiry_entry.get(), "%Y-%m-%d").date()
-            price = float(self.price_entry.get())
-            quantity = int(self.qty_entry.get())
-
-            if expiry < date.today():
-                messagebox.showerror("Error", "Cannot add expired medicine.")
-                return
-
-            if self.selected_medicine_id:
-                medicine = self.session.query(Medicine).get(self.selected_medicine_id)
-                medicine.name = name
-                medicine.type = med_type
-                medicine.expiry_date = expiry
-                medicine.price = price
-                medicine.quantity = quantity
-                self.selected_medicine_id = None
-            else:
-                medicine = Medicine(
-                    name=name,
-                    type=med_type,
-                    expiry_date=expiry,
-                    price=price,
-                    quantity=quantity
-                )
-                self.session.add(medicine)
-
-            self.session.commit()
+            request = services.MedicineInput(
+                name=self.name_entry.get(),
+                type=self.type_combo.get(),
+                expiry_date=datetime.strptime(self.expiry_entry.get(), "%Y-%m-%d").date(),
+                price=float(self.price_entry.get()),
+                quantity=int(self.qty_entry.get()),
+                medicine_id=int(self.selected_medicine_id) if self.selected_medicine_id else None,
+                version=self.selected_medicine_version,
+            )
+
+            try:
+                with session_scope() as session:
+                    medicine = self.services.save_medicine(session, request)
+            except services.ConflictError as e:
+                choice = ask_conflict_resolution("medicine", e)
+                if choice != OVERWRITE:
+                    if choice == RELOAD:
+                        self.reload_medicine_form(e.current)
+                    return
+                with session_scope() as session:
+                    medicine = self.services.save_medicine(session, replace(request, version=e.current.version))
+            self.refresh_medicine_alerts([medicine.id])
+            self.events.publish(MedicinesEdited((medicine.id,)))
             messagebox.showinfo("Success", "Medicine saved successfully.")
             self.clear_inventory_form()
-            self.load_inventory()
-
-            # Refresh sales dropdown if available
-            if hasattr(self, "load_medicines_for_sale"):
-                self.load_medicines_for_sale()
 
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
 
+    # ---------------- BULK IMPORT ----------------
+    def import_csv(self, kind):
+        path = filedialog.askopenfilename(
+            title=f"Import {kind} CSV",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        # Validate the whole file first; nothing is written until confirmed
+        self.db_worker.submit(
+            "bulk_import",
+            lambda session, job: self.read_csv_import(session, kind, path, dry_run=True, job=job),
+            lambda report: self.confirm_csv_import(kind, path, report),
+            label="Checking CSV",
+        )
+
+    def confirm_csv_import(self, kind, path, report):
+        lines = report.summary().splitlines()
+        if len(lines) > 22:
+            lines = lines[:22] + [f"  ... and {len(lines) - 22} more"]
+        if not report.rows_ok:
+            messagebox.showerror("Import", "\n".join(lines))
+            return
+        if not messagebox.askyesno("Import", "\n".join(lines) + "\n\nImport the valid rows now?"):
+            return
+
+        # Not cancellable: chunks already committed would otherwise be left unseen
+        self.db_worker.submit(
+            "bulk_import",
+            lambda session, job: self.read_csv_import(session, kind, path),
+            lambda report: self.finish_csv_import(kind, report),
+            label="Importing CSV",
+            cancellable=False,
+        )
+
+    def read_csv_import(self, session, kind, path, dry_run=False, job=None):
+        with open(path, newline="", encoding="utf-8-sig") as source:
+            return self.services.import_csv(session, kind, source, dry_run=dry_run, job=job)
+
+    def finish_csv_import(self, kind, report):
+        self.refresh_medicine_alerts(report.medicine_ids)
+        # Deliveries only move stock; a catalog import can add or rename medicines
+        event = StockChanged if kind == "deliveries" else MedicinesEdited
+        self.events.publish(event(tuple(report.medicine_ids)))
+        messagebox.showinfo("Import", report.summary().splitlines()[0])
+
+
     def load_inventory(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        medicines = self.session.query(Medicine).all()
-
-        for med in medicines:
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    med.id,
-                    med.name,
-                    med.type,
-                    med.price,
-                    med.quantity,
-                    med.expiry_date,
-                    "Edit",
-                    "Delete"
-                )
-            )
+        self.tree.set_source(self.count_inventory_rows, self.fetch_inventory_rows)
+
+    def count_inventory_rows(self):
+        with session_scope() as session:
+            return self.services.count_medicines(session)
+
+    def fetch_inventory_rows(self, offset, limit):
+        with session_scope() as session:
+            medicines = self.services.list_medicines(session, offset, limit)
+        return [
+            (med.id, med.name, med.type, med.price, med.quantity, med.expiry_date, "Edit", "Delete")
+            for med in medicines
+        ]
 
 
     def handle_inventory_click(self, event):
@@ -162,11 +215,25 @@ class InventoryMixin:
 
 
     def edit_medicine(self, med_id):
-        medicine = self.session.query(Medicine).get(med_id)
-        if not medicine:
+        try:
+            with session_scope() as session:
+                medicine = self.services.get_medicine(session, int(med_id))
+        except services.NotFoundError:
             return
+        self.fill_medicine_form(medicine)
 
-        self.selected_medicine_id = med_id
+
+    def reload_medicine_form(self, medicine):
+        if medicine is None:
+            self.clear_inventory_form()
+        else:
+            self.fill_medicine_form(medicine)
+        self.load_inventory()
+
+
+    def fill_medicine_form(self, medicine):
+        self.selected_medicine_id = medicine.id
+        self.selected_medicine_version = medicine.version
 
         self.name_entry.delete(0, tk.END)
         self.name_entry.insert(0, medicine.name)
@@ -188,12 +255,14 @@ class InventoryMixin:
         if not confirm:
             return
 
-        medicine = self.session.query(Medicine).get(med_id)
-        if medicine:
-            self.session.delete(medicine)
-            self.session.commit()
-
-        self.load_inventory()
+        try:
+            with session_scope() as session:
+                self.services.delete_medicine(session, int(med_id))
+        except (services.NotFoundError, services.ConflictError):
+            self.load_inventory()
+        else:
+            self.refresh_medicine_alerts([med_id])
+            self.events.publish(MedicinesEdited((int(med_id),)))
 
 
     def clear_inventory_form(self):
@@ -203,3 +272,4 @@ class InventoryMixin:
         self.price_entry.delete(0, tk.END)
         self.qty_entry.delete(0, tk.END)
         self.selected_medicine_id = None
+        self.selected_medicine_version = None
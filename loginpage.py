@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import SessionLocal
-from models import User
+from startup import warmup
 
 
 class LoginForm(ttk.Frame):
@@ -19,16 +18,27 @@ class LoginForm(ttk.Frame):
         ttk.Button(self, text="Login", command=self.login).pack(pady=(18, 0), fill="x")
 
     def login(self):
-        session = SessionLocal()
+        # Usually already done while the user was typing
         try:
-            user = session.query(User).filter_by(
-                username=self.username.get().strip(),
-                password=self.password.get().strip(),
-            ).first()
-        finally:
-            session.close()
+            warmup.wait("database")
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open the database:\n{e}")
+            return
+
+        from database import session_scope
+        from api_client import backend
+
+        try:
+            with session_scope() as session:
+                user = backend().authenticate(
+                    session, self.username.get().strip(), self.password.get().strip()
+                )
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not sign in:\n{e}")
+            return
 
         if user:
+            warmup.wait("pharmacy")
             root = self.winfo_toplevel()
             root.destroy()
             from pharmacy import PharmacyApp
@@ -1,12 +1,14 @@
 import tkinter as tk
-from itertools import cycle
 from pathlib import Path
-from PIL import Image, ImageTk
 from homepg import Homepage
 from loginpage import LoginPage
+from startup import warmup
 
 
 def launch_homepage():
+    # PIL, SQLAlchemy, migrations and the main app load in the background
+    warmup.start()
+
     root = tk.Tk()
     root.title("Groly Pharma Ltd")
     root.geometry("1920x1080")
@@ -43,49 +45,30 @@ def launch_homepage():
 
     bg_images = ["bg1.jpg", "bg.jpg"]
     base_path = Path(__file__).resolve().parent
-    loaded_images = []
-
-    for img_name in bg_images:
-        img_path = base_path / img_name
-        if img_path.exists():
-            loaded_images.append(Image.open(img_path))
-
-    if loaded_images:
-        bg_cycle = cycle(loaded_images)
-        current_img = loaded_images[0]
-        fade_steps = 20
-        fade_delay = 50
-
-        def fade_to_next(step=0, next_img=None):
-            nonlocal_current = fade_to_next.current_image
-            w, h = max(root.winfo_width(), 1), max(root.winfo_height(), 1)
-            if next_img is None:
-                next_img = next(bg_cycle)
-            alpha = step / fade_steps
-            blended = Image.blend(
-                nonlocal_current.resize((w, h), Image.Resampling.LANCZOS),
-                next_img.resize((w, h), Image.Resampling.LANCZOS),
-                alpha,
-            )
-            photo = ImageTk.PhotoImage(blended)
-            bg_label.config(image=photo)
-            bg_label.image = photo
-
-            if step < fade_steps:
-                root.after(fade_delay, fade_to_next, step + 1, next_img)
-            else:
-                fade_to_next.current_image = next_img
-                root.after(2000, fade_to_next)
-
-        fade_to_next.current_image = current_img
-        fade_to_next()
-    else:
-        bg_label.config(bg="#f0f4ff")
+    image_paths = [base_path / name for name in bg_images if (base_path / name).exists()]
+
+    bg_label.config(bg="#f0f4ff")
+
+    def start_background_fade():
+        if not warmup.is_ready("images"):
+            root.after(50, start_background_fade)
+            return
+        if "images" in warmup.errors:
+            return
+
+        from bg_fader import BackgroundFader
+
+        fader = BackgroundFader(root, bg_label, image_paths)
+        fader.start()
+        root.bind("<Destroy>", lambda e: fader.stop() if e.widget is root else None, add="+")
+
+    if image_paths:
+        start_background_fade()
 
     def center_frames(_event=None):
         container.place(relx=0.5, rely=0.5, anchor="center", relwidth=0.4, relheight=0.55)
 
-    root.bind("<Configure>", center_frames)
+    root.bind("<Configure>", center_frames, add="+")
     root.mainloop()
 
 
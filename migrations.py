@@ -0,0 +1,108 @@
+from sqlalchemy import text
+from database import engine, Base
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from rollups import rebuild_patient_summaries, rebuild_rollups
+from patient_search import create_patient_index
+from report_cache import create_report_versions
+
+
+# ---------------- HELPERS ----------------
+def add_column_if_missing(conn, table, column, ddl):
+    rows = conn.execute(text(f"PRAGMA table_info({table})")).fetchall()
+    if column not in {row[1] for row in rows}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index(conn, name, table, columns):
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+# ---------------- MIGRATIONS ----------------
+def migration_001_legacy_columns(conn):
+    add_column_if_missing(conn, "patients", "age", "INTEGER")
+    add_column_if_missing(conn, "sale_items", "prescription", "VARCHAR")
+
+
+def migration_002_hot_query_indexes(conn):
+    create_index(conn, "ix_sales_sale_date", "sales", "sale_date")
+    create_index(conn, "ix_sales_patient_id", "sales", "patient_id")
+    create_index(conn, "ix_sale_items_sale_id", "sale_items", "sale_id")
+    create_index(conn, "ix_sale_items_medicine_id", "sale_items", "medicine_id")
+    create_index(conn, "ix_medicines_expiry_date", "medicines", "expiry_date")
+
+
+def migration_003_daily_sales_rollups(conn):
+    # Tables are created by create_all(); backfill them from existing sales.
+    rebuild_rollups(conn)
+
+
+def migration_004_alert_indexes(conn):
+    create_index(conn, "ix_medicines_quantity", "medicines", "quantity")
+
+
+def migration_005_patient_search(conn):
+    # Skipped when SQLite lacks FTS5; patient search then falls back to LIKE
+    create_patient_index(conn)
+
+
+def migration_006_medicine_name_index(conn):
+    # Bulk CSV import upserts medicines by name
+    create_index(conn, "ix_medicines_name", "medicines", "name")
+
+
+def migration_007_version_columns(conn):
+    # Optimistic locking: every UPDATE bumps the row version (see models)
+    for table in ("medicines", "patients", "users"):
+        add_column_if_missing(conn, table, "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def migration_008_sales_history_indexes(conn):
+    # Keyset pages of one patient's or one medicine's sales (see sales_history)
+    create_index(conn, "ix_sales_patient_id_sale_date", "sales", "patient_id, sale_date")
+    create_index(conn, "ix_sale_items_medicine_id_sale_id", "sale_items", "medicine_id, sale_id")
+
+
+def migration_009_patient_summaries(conn):
+    # Tables are created by create_all(); backfill them from existing sales.
+    rebuild_patient_summaries(conn)
+
+
+def migration_010_report_versions(conn):
+    # Shared report cache invalidation, maintained by triggers (see report_cache)
+    create_report_versions(conn)
+
+
+# Append new migrations here; never renumber or edit one that has shipped.
+MIGRATIONS = [
+    (1, migration_001_legacy_columns),
+    (2, migration_002_hot_query_indexes),
+    (3, migration_003_daily_sales_rollups),
+    (4, migration_004_alert_indexes),
+    (5, migration_005_patient_search),
+    (6, migration_006_medicine_name_index),
+    (7, migration_007_version_columns),
+    (8, migration_008_sales_history_indexes),
+    (9, migration_009_patient_summaries),
+    (10, migration_010_report_versions),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+
+def run_migrations(bind=engine):
+    Base.metadata.create_all(bind)
+
+    with bind.begin() as conn:
+        version = get_schema_version(conn)
+        for target, migration in MIGRATIONS:
+            if target <= version:
+                continue
+            migration(conn)
+            conn.execute(text(f"PRAGMA user_version = {target}"))
+            version = target
+
+    return version
@@ -10,21 +10,27 @@ class User(Base):
     username = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
     role = Column(String, nullable=False)  # "manager" or "staff"
+    version = Column(Integer, nullable=False, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
 # ---------------- MEDICINE ----------------
 class Medicine(Base):
     __tablename__ = "medicines"
 
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     type = Column(String, nullable=False, default="Tablet")  # e.g., Tablet, Capsule, Syrup
-    expiry_date = Column(Date)
+    expiry_date = Column(Date, index=True)
     price = Column(Float)
-    quantity = Column(Integer)
+    quantity = Column(Integer, index=True)
+    version = Column(Integer, nullable=False, server_default="1")
 
     sale_items = relationship("SaleItem", back_populates="medicine")
     stock_entries = relationship("StockEntry", back_populates="medicine")
 
+    __mapper_args__ = {"version_id_col": version}
+
 # ---------------- PATIENT ----------------
 class Patient(Base):
     __tablename__ = "patients"
@@ -33,17 +39,20 @@ class Patient(Base):
     name = Column(String, nullable=False)
     age = Column(Integer)
     medical_history = Column(String)
+    version = Column(Integer, nullable=False, server_default="1")
 
     sales = relationship("Sale", back_populates="patient")
 
+    __mapper_args__ = {"version_id_col": version}
+
 # ---------------- SALE ----------------
 class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True)
-    sale_date = Column(Date)
+    sale_date = Column(Date, index=True)
     total_amount = Column(Float)
-    patient_id = Column(Integer, ForeignKey("patients.id"))
+    patient_id = Column(Integer, ForeignKey("patients.id"), index=True)
 
     patient = relationship("Patient", back_populates="sales")
     items = relationship("SaleItem", back_populates="sale")
@@ -53,8 +62,8 @@ class SaleItem(Base):
     __tablename__ = "sale_items"
 
     id = Column(Integer, primary_key=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
-    medicine_id = Column(Integer, ForeignKey("medicines.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), index=True)
+    medicine_id = Column(Integer, ForeignKey("medicines.id"), index=True)
     quantity = Column(Integer)
     subtotal = Column(Float)
     prescription = Column(String)
@@ -71,4 +80,46 @@ class StockEntry(Base):
     quantity_added = Column(Integer)
     entry_date = Column(Date)
 
-    medicine = relationship("Medicine", back_populates="stock_entries")
\ No newline at end of file
+    medicine = relationship("Medicine", back_populates="stock_entries")
+
+# ---------------- DAILY SALES ROLLUPS ----------------
+# Maintained by rollups.record_sale() at checkout; rebuild with `python rollups.py`.
+# medicine_id is deliberately not a foreign key so deleting a medicine keeps its history.
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+
+    sale_date = Column(Date, primary_key=True)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0)
+
+
+class DailyMedicineSales(Base):
+    __tablename__ = "daily_medicine_sales"
+
+    sale_date = Column(Date, primary_key=True)
+    medicine_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+
+# ---------------- PATIENT SUMMARIES ----------------
+# Maintained by rollups.record_sale() at checkout alongside the daily rollups,
+# so the patient history header is a primary-key read however long the history.
+class PatientSummary(Base):
+    __tablename__ = "patient_summaries"
+
+    patient_id = Column(Integer, primary_key=True)
+    visit_count = Column(Integer, nullable=False, default=0)
+    lifetime_spend = Column(Float, nullable=False, default=0)
+    last_visit = Column(Date)
+
+
+class PatientMedicineTotals(Base):
+    __tablename__ = "patient_medicine_totals"
+
+    patient_id = Column(Integer, primary_key=True)
+    medicine_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0)
+    transaction_count = Column(Integer, nullable=False, default=0)
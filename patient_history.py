@@ -0,0 +1,106 @@
+"""One patient's purchase history: a summary header and keyset pages of line items.
+
+The header comes from ``patient_summaries`` and ``patient_medicine_totals``,
+which checkout keeps current (see rollups), so it is two primary-key reads
+however many years of refills the patient has. The grid is one joined query
+per page, newest first, continuing from the last ``(sale_date, sale id,
+item id)`` shown; ``ix_sales_patient_id_sale_date`` finds the patient's
+sales in date order and ``ix_sale_items_sale_id`` their lines.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Tuple
+from sqlalchemy import tuple_
+from models import Medicine, PatientMedicineTotals, PatientSummary, Sale, SaleItem
+
+TOP_MEDICINES = 3
+
+
+@dataclass(frozen=True)
+class PatientHistorySummary:
+    visit_count: int = 0
+    lifetime_spend: float = 0.0
+    last_visit: Optional[date] = None
+    # (medicine name, quantity) for the patient's most bought medicines
+    top_medicines: List[Tuple[str, int]] = field(default_factory=list)
+
+
+def load_patient_summary(session, patient_id, top=TOP_MEDICINES):
+    summary = session.get(PatientSummary, patient_id)
+    if summary is None:
+        return PatientHistorySummary()
+
+    top_medicines = (
+        session.query(Medicine.name, PatientMedicineTotals.quantity)
+        .select_from(PatientMedicineTotals)
+        .outerjoin(Medicine, Medicine.id == PatientMedicineTotals.medicine_id)
+        .filter(PatientMedicineTotals.patient_id == patient_id)
+        .order_by(PatientMedicineTotals.quantity.desc(), PatientMedicineTotals.medicine_id)
+        .limit(top)
+        .all()
+    )
+    return PatientHistorySummary(
+        summary.visit_count,
+        summary.lifetime_spend,
+        summary.last_visit,
+        [(name or "N/A", quantity) for name, quantity in top_medicines],
+    )
+
+
+def row_cursor(row):
+    """The ``(sale_date, sale id, item id)`` keyset position of a row returned by ``fetch_history_page``."""
+    return row[2], row[1], row[0]
+
+
+def fetch_history_page(session, patient_id, after=None, limit=200):
+    """Up to ``limit`` line items of the patient's sales older than the ``after`` cursor, newest first.
+
+    Rows are ``(item id, sale id, date, medicine, quantity, prescription,
+    subtotal, total)``; the item id keys the grid and is not shown. Undated
+    legacy sales come after every dated one, by id.
+    """
+    rows = []
+    if after is None or after[0] is not None:
+        dated = _items_query(session, patient_id).filter(Sale.sale_date.isnot(None))
+        if after is not None:
+            dated = dated.filter(tuple_(Sale.sale_date, Sale.id, SaleItem.id) < tuple_(*after))
+        rows = dated.order_by(Sale.sale_date.desc(), Sale.id.desc(), SaleItem.id.desc()).limit(limit).all()
+
+    if len(rows) < limit:
+        undated = _items_query(session, patient_id).filter(Sale.sale_date.is_(None))
+        if after is not None and after[0] is None:
+            undated = undated.filter(tuple_(Sale.id, SaleItem.id) < tuple_(*after[1:]))
+        rows += undated.order_by(Sale.id.desc(), SaleItem.id.desc()).limit(limit - len(rows)).all()
+
+    return [
+        (
+            item_id,
+            sale_id,
+            sale_date,
+            medicine_name or "N/A",
+            quantity,
+            prescription or "-",
+            f"${subtotal:.2f}" if subtotal else "-",
+            f"${total_amount:.2f}" if total_amount else "-",
+        )
+        for item_id, sale_id, sale_date, medicine_name, quantity, prescription, subtotal, total_amount in rows
+    ]
+
+
+def _items_query(session, patient_id):
+    return (
+        session.query(
+            SaleItem.id,
+            Sale.id,
+            Sale.sale_date,
+            Medicine.name,
+            SaleItem.quantity,
+            SaleItem.prescription,
+            SaleItem.subtotal,
+            Sale.total_amount,
+        )
+        .select_from(Sale)
+        .join(SaleItem, SaleItem.sale_id == Sale.id)
+        .outerjoin(Medicine, Medicine.id == SaleItem.medicine_id)
+        .filter(Sale.patient_id == patient_id)
+    )
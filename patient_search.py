@@ -0,0 +1,139 @@
+import re
+import sys
+from sqlalchemy import text
+
+# External-content FTS5 index over patients(name, medical_history), kept in
+# sync by triggers. Created by migration 5; see rebuild_patient_index().
+FTS_TABLE = "patients_fts"
+
+CREATE_STATEMENTS = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, medical_history, content='patients', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, medical_history)
+        VALUES (new.id, new.name, new.medical_history);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, medical_history)
+        VALUES ('delete', old.id, old.name, old.medical_history);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF name, medical_history ON patients BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, medical_history)
+        VALUES ('delete', old.id, old.name, old.medical_history);
+        INSERT INTO {FTS_TABLE}(rowid, name, medical_history)
+        VALUES (new.id, new.name, new.medical_history);
+    END
+    """,
+]
+
+
+def fts_available(conn):
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first() is not None
+
+
+def create_patient_index(conn):
+    """Create the FTS table and triggers and fill them. Returns False if FTS5 is not compiled in."""
+    try:
+        conn.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)"))
+        conn.execute(text("DROP TABLE temp.fts5_probe"))
+    except Exception:
+        return False
+
+    for statement in CREATE_STATEMENTS:
+        conn.execute(text(statement))
+    rebuild_patient_index(conn)
+    return True
+
+
+def rebuild_patient_index(conn):
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def to_match_query(search_text):
+    # Quote every word and make the last one a prefix so typing "asth" finds "asthma"
+    words = re.findall(r"\w+", search_text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def count_patients(conn, search_text):
+    match = to_match_query(search_text)
+    if match is None:
+        return 0
+    if not fts_available(conn):
+        return conn.execute(
+            text("SELECT COUNT(*) FROM patients WHERE name LIKE :pattern OR medical_history LIKE :pattern"),
+            {"pattern": f"%{search_text.strip()}%"},
+        ).scalar()
+    return conn.execute(
+        text(f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"),
+        {"match": match},
+    ).scalar()
+
+
+def search_patients(conn, search_text, offset=0, limit=50):
+    """Return (id, name, age, snippet) ranked by bm25, name matches weighted higher."""
+    match = to_match_query(search_text)
+    if match is None:
+        return []
+
+    if not fts_available(conn):
+        return conn.execute(
+            text("""
+                SELECT id, name, age, substr(COALESCE(medical_history, ''), 1, 60)
+                FROM patients
+                WHERE name LIKE :pattern OR medical_history LIKE :pattern
+                ORDER BY name
+                LIMIT :limit OFFSET :offset
+            """),
+            {"pattern": f"%{search_text.strip()}%", "limit": limit, "offset": offset},
+        ).fetchall()
+
+    return conn.execute(
+        text(f"""
+            SELECT p.id, p.name, p.age,
+                   snippet({FTS_TABLE}, 1, '[', ']', '...', 8)
+            FROM {FTS_TABLE}
+            JOIN patients p ON p.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match
+            ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+            LIMIT :limit OFFSET :offset
+        """),
+        {"match": match, "limit": limit, "offset": offset},
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    from database import engine
+    from migrations import run_migrations
+
+    run_migrations()
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+    if command == "rebuild":
+        with engine.begin() as conn:
+            if not fts_available(conn):
+                sys.exit("FTS5 is not available in this SQLite build.")
+            rebuild_patient_index(conn)
+        print("Patient search index rebuilt.")
+    elif command == "search" and len(sys.argv) > 2:
+        with engine.connect() as conn:
+            for patient_id, name, age, snippet in search_patients(conn, " ".join(sys.argv[2:])):
+                print(f"{patient_id:>8}  {name}  ({age if age is not None else '-'})  {snippet}")
+    else:
+        sys.exit("usage: python patient_search.py rebuild | search <terms>")
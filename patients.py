@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from sqlalchemy import text
-from models import Patient, Sale
+from dataclasses import replace
+from database import session_scope
+from virtual_tree import KeysetRows, VirtualTreeview
+from patient_history import row_cursor
+from events import PatientsChanged
+import services
+from conflict_dialog import OVERWRITE, RELOAD, ask_conflict_resolution
+
+PATIENT_HISTORY_PAGE_SIZE = 100
 
 class PatientMixin:
 
     def build_patients_tab(self):
-        self.ensure_patient_age_column()
-
         frame = ttk.Frame(self.patients_tab, padding=20)
         frame.pack(fill="both", expand=True)
 
@@ -37,12 +42,27 @@ class PatientMixin:
         )
         add_btn.grid(row=3, column=0, columnspan=2, pady=10)
 
+        # -------- SEARCH --------
+        search_frame = ttk.Frame(frame)
+        search_frame.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(search_frame, text="Search name / medical history").pack(side="left", padx=(0, 8))
+        self.patient_search_entry = ttk.Entry(search_frame, width=40)
+        self.patient_search_entry.pack(side="left")
+        self.patient_search_entry.bind("<Return>", lambda e: self.load_patients())
+
+        ttk.Button(search_frame, text="Search", command=self.load_patients).pack(side="left", padx=5)
+        ttk.Button(search_frame, text="Clear", command=self.clear_patient_search).pack(side="left")
+
+        self.patient_search_status = ttk.Label(search_frame, foreground="#6c757d")
+        self.patient_search_status.pack(side="left", padx=10)
+
         # -------- TABLE --------
         table_frame = ttk.LabelFrame(frame, text="Patients List", padding=10)
         table_frame.pack(fill="both", expand=True)
 
         columns = ("ID", "Name", "Age", "History", "Edit", "Delete")
-        self.patient_list = ttk.Treeview(table_frame, columns=columns, show="headings")
+        self.patient_list = VirtualTreeview(table_frame, columns=columns, show="headings")
 
         for col in columns:
             self.patient_list.heading(col, text=col)
@@ -65,6 +85,10 @@ class PatientMixin:
         self.load_patients()
 
 
+    def patients_tab_events(self):
+        return [((PatientsChanged,), self.load_patients)]
+
+
     def add_patient(self):
         try:
             name = self.patient_name.get().strip()
@@ -75,19 +99,9 @@ class PatientMixin:
                 messagebox.showerror("Error", "Name and age required.")
                 return
 
-            age = int(age_text)
-            if age <= 0:
-                messagebox.showerror("Error", "Age must be greater than 0.")
-                return
-
-            patient = Patient(
-                name=name,
-                age=age,
-                medical_history=history
-            )
-
-            self.session.add(patient)
-            self.session.commit()
+            with session_scope() as session:
+                patient = self.services.save_patient(session, services.PatientInput(name=name, age=int(age_text), medical_history=history))
+            self.events.publish(PatientsChanged((patient.id,)))
 
             messagebox.showinfo("Success", "Patient added successfully.")
 
@@ -95,26 +109,51 @@ class PatientMixin:
             self.patient_age.delete(0, tk.END)
             self.patient_history.delete(0, tk.END)
 
-            self.load_patients()
-            self.load_patients_for_sale()
-
         except Exception as e:
-            self.session.rollback()
             messagebox.showerror("Error", str(e))
 
 
     def load_patients(self):
-        for row in self.patient_list.get_children():
-            self.patient_list.delete(row)
+        search_text = self.patient_search_entry.get().strip()
+        if not search_text:
+            self.patient_list.set_source(self.count_patient_rows, self.fetch_patient_rows)
+            self.patient_search_status.config(text="")
+            return
 
-        patients = self.session.query(Patient).all()
+        self.patient_list.set_source(
+            lambda: self.count_patient_search_rows(search_text),
+            lambda offset, limit: self.fetch_patient_search_rows(search_text, offset, limit),
+        )
+        self.patient_search_status.config(text=f"{self.patient_list.total_rows} match(es)")
 
-        for p in patients:
-            self.patient_list.insert(
-                "",
-                "end",
-                values=(p.id, p.name, p.age if p.age is not None else "-", "View", "Edit", "Delete")
-            )
+    def clear_patient_search(self):
+        self.patient_search_entry.delete(0, tk.END)
+        self.load_patients()
+
+    def count_patient_search_rows(self, search_text):
+        with session_scope() as session:
+            return self.services.count_patient_matches(session, search_text)
+
+    def fetch_patient_search_rows(self, search_text, offset, limit):
+        with session_scope() as session:
+            matches = self.services.search_patients(session, search_text, offset, limit)
+        return [
+            (match.id, match.name, match.age if match.age is not None else "-",
+             f"View  {match.snippet}" if match.snippet else "View", "Edit", "Delete")
+            for match in matches
+        ]
+
+    def count_patient_rows(self):
+        with session_scope() as session:
+            return self.services.count_patients(session)
+
+    def fetch_patient_rows(self, offset, limit):
+        with session_scope() as session:
+            patients = self.services.list_patients(session, offset, limit)
+        return [
+            (patient.id, patient.name, patient.age if patient.age is not None else "-", "View", "Edit", "Delete")
+            for patient in patients
+        ]
 
 
     def handle_patient_action(self, event):
@@ -140,33 +179,65 @@ class PatientMixin:
 
 
     def view_patient_history(self, patient_id):
-        patient = self.session.query(Patient).get(patient_id)
-        if not patient:
+        self.db_worker.submit(
+            f"patient_history:{patient_id}",
+            lambda session, job: self.services.load_patient_history(
+                session, int(patient_id), PATIENT_HISTORY_PAGE_SIZE, job
+            ),
+            self.show_patient_history,
+            label="Loading patient history",
+        )
+
+    def fetch_patient_history(self, patient_id, after, limit):
+        with session_scope() as session:
+            return self.services.patient_history_page(session, patient_id, after, limit)
+
+    def show_patient_history(self, history):
+        if history is None:
             messagebox.showerror("Error", "Patient not found.")
             return
 
         history_window = tk.Toplevel(self.root)
-        history_window.title(f"Sales History - {patient.name}")
-        history_window.geometry("900x500")
+        history_window.title(f"Sales History - {history.name}")
+        history_window.geometry("900x600")
 
         frame = ttk.Frame(history_window, padding=20)
         frame.pack(fill="both", expand=True)
 
-        ttk.Label(frame, text=f"Patient: {patient.name} (Age: {patient.age if patient.age else 'N/A'})", font=("Arial", 12, "bold")).pack(pady=10)
+        ttk.Label(frame, text=f"Patient: {history.name} (Age: {history.age if history.age else 'N/A'})", font=("Arial", 12, "bold")).pack(pady=10)
 
         # Medical History section
         med_history_frame = ttk.LabelFrame(frame, text="Medical History", padding=10)
         med_history_frame.pack(fill="x", pady=(0, 15))
         
-        med_history_text = patient.medical_history if patient.medical_history else "No medical history recorded."
+        med_history_text = history.medical_history if history.medical_history else "No medical history recorded."
         ttk.Label(med_history_frame, text=med_history_text, wraplength=800, justify="left").pack()
 
+        # Summary section
+        summary = history.summary
+        summary_frame = ttk.LabelFrame(frame, text="Summary", padding=10)
+        summary_frame.pack(fill="x", pady=(0, 15))
+
+        last_visit = summary.last_visit.isoformat() if summary.last_visit else "N/A"
+        ttk.Label(
+            summary_frame,
+            text=f"Visits: {summary.visit_count}    Lifetime spend: ${summary.lifetime_spend:.2f}    Last visit: {last_visit}",
+        ).pack(anchor="w")
+        top_medicines = ", ".join(f"{name} ({quantity})" for name, quantity in summary.top_medicines)
+        ttk.Label(summary_frame, text=f"Top medicines: {top_medicines or 'None'}").pack(anchor="w")
+
         # Sales History section
         ttk.Label(frame, text="Sales History", font=("Arial", 11, "bold")).pack(pady=(5, 5))
 
-        # Create treeview
-        columns = ("Sale ID", "Date", "Medicine", "Quantity", "Prescription", "Subtotal", "Total")
-        tree = ttk.Treeview(frame, columns=columns, show="headings")
+        # Create treeview; the sale item id keys the rows but is not shown
+        columns = ("Item", "Sale ID", "Date", "Medicine", "Quantity", "Prescription", "Subtotal", "Total")
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill="both", expand=True)
+
+        tree = VirtualTreeview(
+            table_frame, columns=columns, displaycolumns=columns[1:], show="headings",
+            page_size=PATIENT_HISTORY_PAGE_SIZE,
+        )
 
         for col in columns:
             tree.heading(col, text=col)
@@ -180,29 +251,25 @@ class PatientMixin:
         tree.column("Subtotal", width=100)
         tree.column("Total", width=100)
 
-        tree.pack(fill="both", expand=True)
+        tree.pack(side="left", fill="both", expand=True)
 
-        # Load sales history
-        sales = self.session.query(Sale).filter_by(patient_id=patient_id).order_by(Sale.sale_date.desc()).all()
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        tree.configure(yscrollcommand=scrollbar.set)
 
-        if not sales:
+        if not history.first_page:
             ttk.Label(frame, text="No sales history found.", font=("Arial", 10)).pack(pady=20)
         else:
-            for sale in sales:
-                for item in sale.items:
-                    tree.insert(
-                        "",
-                        "end",
-                        values=(
-                            sale.id,
-                            sale.sale_date,
-                            item.medicine.name if item.medicine else "N/A",
-                            item.quantity,
-                            item.prescription if item.prescription else "-",
-                            f"${item.subtotal:.2f}" if item.subtotal else "-",
-                            f"${sale.total_amount:.2f}" if sale.total_amount else "-"
-                        )
-                    )
+            patient_id = history.patient_id
+            source = KeysetRows(
+                lambda after, limit: self.fetch_patient_history(patient_id, after, limit),
+                row_cursor,
+                PATIENT_HISTORY_PAGE_SIZE,
+                history.first_page,
+            )
+            tree.set_source(
+                source.count, source.fetch, total=source.count(), first_page=history.first_page, growing=True
+            )
 
         close_btn = tk.Button(
             frame,
@@ -215,55 +282,57 @@ class PatientMixin:
 
     def delete_patient(self, patient_id):
         try:
-            patient = self.session.query(Patient).get(patient_id)
-            if not patient:
-                return
-
             confirm = messagebox.askyesno("Confirm", "Delete this patient?")
             if not confirm:
                 return
 
-            self.session.delete(patient)
-            self.session.commit()
+            with session_scope() as session:
+                self.services.delete_patient(session, int(patient_id))
+            self.events.publish(PatientsChanged((int(patient_id),)))
 
             messagebox.showinfo("Success", "Patient deleted.")
-            self.load_patients()
-            self.load_patients_for_sale()
 
         except Exception as e:
-            self.session.rollback()
             messagebox.showerror("Error", str(e))
 
 
     def edit_patient(self, patient_id):
-        patient = self.session.query(Patient).get(patient_id)
-        if not patient:
+        try:
+            with session_scope() as session:
+                patient = self.services.get_patient(session, int(patient_id))
+        except services.NotFoundError:
             return
 
-        self.patient_name.delete(0, tk.END)
-        self.patient_name.insert(0, patient.name)
-
-        self.patient_age.delete(0, tk.END)
-        self.patient_age.insert(0, str(patient.age if patient.age is not None else ""))
-
-        self.patient_history.delete(0, tk.END)
-        self.patient_history.insert(0, patient.medical_history)
+        self.fill_patient_form(patient)
+        version = patient.version
 
         def update():
+            nonlocal version
             try:
-                patient.name = self.patient_name.get()
-                patient.age = int(self.patient_age.get())
-                if patient.age <= 0:
-                    messagebox.showerror("Error", "Age must be greater than 0.")
-                    return
-                patient.medical_history = self.patient_history.get()
-
-                self.session.commit()
+                request = services.PatientInput(
+                    name=self.patient_name.get(),
+                    age=int(self.patient_age.get()),
+                    medical_history=self.patient_history.get(),
+                    patient_id=patient.id,
+                    version=version,
+                )
+                try:
+                    with session_scope() as session:
+                        saved = self.services.save_patient(session, request)
+                except services.ConflictError as e:
+                    choice = ask_conflict_resolution("patient", e)
+                    if choice == RELOAD and e.current is not None:
+                        self.fill_patient_form(e.current)
+                        version = e.current.version
+                    if choice != OVERWRITE:
+                        self.load_patients()
+                        return
+                    with session_scope() as session:
+                        saved = self.services.save_patient(session, replace(request, version=e.current.version))
+                version = saved.version
+                self.events.publish(PatientsChanged((saved.id,)))
                 messagebox.showinfo("Success", "Patient updated.")
-                self.load_patients()
-                self.load_patients_for_sale()
             except Exception as e:
-                self.session.rollback()
                 messagebox.showerror("Error", str(e))
 
         update_btn = tk.Button(
@@ -281,12 +350,13 @@ class PatientMixin:
         )
         update_btn.pack(pady=5)
 
-    def ensure_patient_age_column(self):
-        try:
-            rows = self.session.execute(text("PRAGMA table_info(patients)")).fetchall()
-            existing_columns = {row[1] for row in rows}
-            if "age" not in existing_columns:
-                self.session.execute(text("ALTER TABLE patients ADD COLUMN age INTEGER"))
-                self.session.commit()
-        except Exception:
-            self.session.rollback()
+
+    def fill_patient_form(self, patient):
+        self.patient_name.delete(0, tk.END)
+        self.patient_name.insert(0, patient.name)
+
+        self.patient_age.delete(0, tk.END)
+        self.patient_age.insert(0, str(patient.age if patient.age is not None else ""))
+
+        self.patient_history.delete(0, tk.END)
+        self.patient_history.insert(0, patient.medical_history or "")
@@ -1,13 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database import SessionLocal
-from models import Medicine, Sale, SaleItem, StockEntry, Patient, User
+from database import session_scope
 from inventory import InventoryMixin
 from users import UserMixin
 from sales import SalesMixin
 from patients import PatientMixin
 from reports import ReportsMixin
 from alert import AlertMixin
+from db_worker import DBWorker
+from report_cache import ReportCache
+from alert_engine import AlertEngine
+from events import EventBus
+import api_client
+import services
 
 class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, ReportsMixin, AlertMixin):
 
@@ -17,7 +22,16 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
         self.root.geometry("1920x1080")
         self.root.state("zoomed")
 
-        self.session = SessionLocal()
+        # No session lives for the shift: each operation opens its own
+        # (session_scope), and lists keep plain rows, so memory stays flat.
+        # Business operations go to the local API server instead when
+        # PHARMACY_SERVER_URL is set.
+        self.services = api_client.backend()
+        self.report_cache = ReportCache("report_cache.json")
+        self.db_worker = DBWorker(self.root, on_busy_change=self._set_busy, on_error=self._show_background_error)
+        # Writes publish change events; built tabs refresh on them, hidden
+        # ones once they are shown again (see _show_tab)
+        self.events = EventBus(schedule=self.root.after_idle)
         self.role = role
         self.username = username
 
@@ -49,8 +63,9 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
                 ("Alerts", self.show_alerts_tab),
                 ("Staff Management", self.show_users_tab)
             ]
+        self.sidebar_buttons = {}
         for text, cmd in menu_buttons:
-            tk.Button(
+            self.sidebar_buttons[text] = tk.Button(
                 sidebar,
                 text=text,
                 width=22,
@@ -64,7 +79,8 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
                 padx=8,
                 pady=8,
                 cursor="hand2"
-            ).pack(pady=6, padx=12, fill="x")
+            )
+            self.sidebar_buttons[text].pack(pady=6, padx=12, fill="x")
 
         tk.Button(
             sidebar,
@@ -90,6 +106,14 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
         header_bar.pack(side="top", fill="x")
         header_bar.pack_propagate(False)
 
+        # Background work indicator, shown while the DB worker has jobs
+        self.busy_frame = tk.Frame(header_bar, bg="#f8f9fa")
+        self.busy_label = tk.Label(self.busy_frame, bg="#f8f9fa", fg="#6c757d", font=("Arial", 10))
+        self.busy_label.pack(side="left", padx=(0, 8))
+        self.busy_bar = ttk.Progressbar(self.busy_frame, mode="indeterminate", length=120)
+        self.busy_bar.pack(side="left", padx=(0, 8))
+        ttk.Button(self.busy_frame, text="Cancel", command=self.cancel_background_work).pack(side="left")
+
         tk.Label(
             header_bar,
             text="Pharmacy Management System",
@@ -137,35 +161,94 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
             self.notebook.add(self.users_tab, text="Staff Management")
 
         self._tab_builders = {
-            "sales": (self.sales_tab, self.build_sales_tab, "Sales"),
-            "patients": (self.patients_tab, self.build_patients_tab, "Patients"),
+            "sales": (self.sales_tab, self.build_sales_tab, "Sales", self.sales_tab_events),
+            "patients": (self.patients_tab, self.build_patients_tab, "Patients", self.patients_tab_events),
         }
 
         if self.role == "manager":
             self._tab_builders.update({
-                "inventory": (self.inventory_tab, self.build_inventory_tab, "Inventory"),
-                "reports": (self.reports_tab, self.build_reports_tab, "Reports"),
-                "alerts": (self.alerts_tab, self.build_alerts_tab, "Alerts"),
-                "users": (self.users_tab, self.build_users_tab, "Staff Management"),
+                "inventory": (self.inventory_tab, self.build_inventory_tab, "Inventory", self.inventory_tab_events),
+                "reports": (self.reports_tab, self.build_reports_tab, "Reports", None),
+                "alerts": (self.alerts_tab, self.build_alerts_tab, "Alerts", self.alerts_tab_events),
+                "users": (self.users_tab, self.build_users_tab, "Staff Management", None),
             })
 
         self._built_tabs = set()
+        self._current_tab = None
+        self._stale_tabs = {}
+
+        self.alert_engine = None
+        if self.role == "manager":
+            self.alert_engine = AlertEngine(
+                self.root, self.db_worker, on_change=self._update_alert_badge, backend=self.services
+            )
+            self.alert_engine.start()
+
         self.show_sales_tab()
 
     def _safe_build_tab(self, builder, tab_name):
         try:
             builder()
+            return True
         except Exception as e:
             messagebox.showerror("Tab Error", f"Failed to load {tab_name} tab:\n{e}")
+            return False
+
+    # ---------------- Background Work ----------------
+    def _set_busy(self, labels):
+        if labels:
+            self.busy_label.config(text=f"{labels[-1]}...")
+            if not self.busy_frame.winfo_manager():
+                self.busy_frame.pack(side="right", padx=12)
+                self.busy_bar.start(15)
+        elif self.busy_frame.winfo_manager():
+            self.busy_bar.stop()
+            self.busy_frame.pack_forget()
+
+    def _show_background_error(self, error):
+        messagebox.showerror("Error", str(error))
+
+    def cancel_background_work(self):
+        self.db_worker.cancel_all()
+
+    def _update_alert_badge(self, count):
+        button = self.sidebar_buttons.get("Alerts")
+        if button is None:
+            return
+        if count:
+            button.config(text=f"Alerts ({count})", bg="#dc3545", activebackground="#bb2d3b")
+        else:
+            button.config(text="Alerts", bg="#0b5ed7", activebackground="#0a58ca")
 
     # ---------------- Sidebar Tab Switching ----------------
     def _show_tab(self, tab_key):
-        tab_widget, builder, tab_name = self._tab_builders[tab_key]
+        tab_widget, builder, tab_name, tab_events = self._tab_builders[tab_key]
         if tab_key not in self._built_tabs:
-            self._safe_build_tab(builder, tab_name)
+            if self._safe_build_tab(builder, tab_name) and tab_events is not None:
+                self._subscribe_tab(tab_key, tab_events())
             self._built_tabs.add(tab_key)
+        self._current_tab = tab_key
         self.notebook.select(tab_widget)
 
+        # Catch up on whatever changed while the tab was hidden
+        for refresh in self._stale_tabs.pop(tab_key, []):
+            refresh()
+
+    def _subscribe_tab(self, tab_key, subscriptions):
+        for event_types, refresh in subscriptions:
+            self.events.subscribe(
+                event_types,
+                lambda events, refresh=refresh: self._tab_changed(tab_key, refresh),
+            )
+
+    def _tab_changed(self, tab_key, refresh):
+        if tab_key == self._current_tab:
+            refresh()
+            return
+        pending = self._stale_tabs.setdefault(tab_key, [])
+        if refresh not in pending:
+            pending.append(refresh)
+
     def show_sales_tab(self):
         self._show_tab("sales")
 
@@ -277,17 +360,13 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
                 messagebox.showerror("Error", "New password and confirmation do not match.")
                 return
 
-            user = self.session.query(User).filter_by(username=self.username).first()
-            if not user:
-                messagebox.showerror("Error", "User account not found.")
-                return
-
-            if user.password != current_pwd:
-                messagebox.showerror("Error", "Current password is incorrect.")
+            try:
+                with session_scope() as session:
+                    self.services.change_password(session, self.username, current_pwd, new_pwd)
+            except services.ServiceError as e:
+                messagebox.showerror("Error", str(e))
                 return
 
-            user.password = new_pwd
-            self.session.commit()
             messagebox.showinfo("Success", "Password changed successfully.")
             pwd_win.destroy()
 
@@ -310,6 +389,9 @@ class PharmacyApp(tk.Tk, InventoryMixin, UserMixin, SalesMixin, PatientMixin, Re
         if not confirm:
             return
 
+        if self.alert_engine is not None:
+            self.alert_engine.stop()
+        self.db_worker.stop()
         self.root.destroy()
         from main import launch_homepage
         launch_homepage()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from sqlalchemy import text
+
+# Sections built only from past sales never change once their period is over,
+# so they are also kept on disk. Inventory reflects current stock and is not.
+PERSISTENT_SECTIONS = ("summary", "medicine_sales", "quantity_per_day")
+
+# ---------------- DATA VERSIONS ----------------
+# Counters in the database, bumped by triggers on everything a report reads, so
+# writes from any terminal, the API server, bulk imports and rollup rebuilds all
+# invalidate the cache. "current" moves on every such write; "closed" only when
+# a day before today or a medicine name changes, which is what can make a
+# persisted closed-period section wrong. Created by migration 10.
+VERSIONS_TABLE = "report_versions"
+
+_BUMP = f"UPDATE {VERSIONS_TABLE} SET version = version + 1 WHERE name = 'current'"
+_BUMP_PAST = _BUMP + " OR (name = 'closed' AND {day} < date('now', 'localtime'))"
+
+CREATE_VERSION_STATEMENTS = [
+    f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (name VARCHAR PRIMARY KEY, version INTEGER NOT NULL)",
+    f"INSERT OR IGNORE INTO {VERSIONS_TABLE} (name, version) VALUES ('current', 0), ('closed', 0)",
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {table}_report_version_{suffix} AFTER {event} ON {table} BEGIN
+        {_BUMP_PAST.format(day=row + ".sale_date")};
+    END
+    """
+    for table in ("daily_sales", "daily_medicine_sales")
+    for suffix, event, row in (("ai", "INSERT", "new"), ("au", "UPDATE", "new"), ("ad", "DELETE", "old"))
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS medicines_report_version_ai AFTER INSERT ON medicines BEGIN
+        {_BUMP};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS medicines_report_version_au AFTER UPDATE ON medicines BEGIN
+        {_BUMP} OR (name = 'closed' AND old.name IS NOT new.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS medicines_report_version_ad AFTER DELETE ON medicines BEGIN
+        UPDATE {VERSIONS_TABLE} SET version = version + 1;
+    END
+    """,
+]
+
+
+def create_report_versions(conn):
+    for statement in CREATE_VERSION_STATEMENTS:
+        conn.execute(text(statement))
+
+
+def read_report_versions(session):
+    """The database's (current, closed) report data versions."""
+    versions = dict(session.execute(text(f"SELECT name, version FROM {VERSIONS_TABLE}")).all())
+    return versions.get("current", 0), versions.get("closed", 0)
+
+
+# ---------------- CACHE ----------------
+class ReportCache:
+    """In-process LRU of computed report sections, tagged with a data version.
+
+    Entries are keyed by (start, end, section). ``sync()`` is given the
+    database's report versions before each report; entries computed under an
+    older "current" version are treated as misses. Sections of closed periods
+    (ending before today) are additionally persisted to ``path`` so they
+    survive a restart, and dropped when the "closed" version moves.
+    """
+
+    def __init__(self, path=None, max_entries=64):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._closed_version, self._closed = self._load()
+
+    def sync(self, versions):
+        """Adopt the (current, closed) versions from ``read_report_versions``."""
+        current, closed = versions
+        with self._lock:
+            self.version = current
+            if closed != self._closed_version:
+                self._closed_version = closed
+                self._closed.clear()
+                self._save()
+
+    def get_or_compute(self, start, end, section, compute):
+        key = self._key(start, end, section)
+        closed = section in PERSISTENT_SECTIONS and end is not None and end < date.today()
+
+        with self._lock:
+            if closed and key in self._closed:
+                self.hits += 1
+                return self._closed[key]
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == self.version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            version = self.version
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if closed and version == self.version:
+                self._closed[key] = value
+                self._save()
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._closed.clear()
+            self._save()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "persisted": len(self._closed),
+                "version": self.version,
+                "closed_version": self._closed_version,
+            }
+
+    @staticmethod
+    def _key(start, end, section):
+        return "|".join((start.isoformat() if start else "", end.isoformat() if end else "", section))
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None, {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None, {}
+        # Files written before data versions existed hold bare entries; drop them
+        if not isinstance(saved, dict) or "entries" not in saved:
+            return None, {}
+        return saved.get("closed_version"), saved["entries"]
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"closed_version": self._closed_version, "entries": self._closed}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
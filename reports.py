@@ -1,8 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from datetime import date, timedelta, datetime
-from sqlalchemy import func
-from models import Sale, SaleItem, Medicine
+import services
+from export import DATASETS, export_formats
 
 class ReportsMixin:
 
@@ -28,117 +28,111 @@ class ReportsMixin:
         self.generate_btn = ttk.Button(frame, text="Generate Report", command=self.generate_selected_report)
         self.generate_btn.pack(pady=10)
 
+        export_frame = ttk.Frame(frame)
+        export_frame.pack(pady=(0, 10))
+        ttk.Label(export_frame, text="Export").pack(side="left", padx=5)
+        self.export_dataset_combo = ttk.Combobox(
+            export_frame, values=list(DATASETS), width=22, state="readonly"
+        )
+        self.export_dataset_combo.pack(side="left", padx=5)
+        self.export_dataset_combo.set("sale_items")
+        self.export_format_combo = ttk.Combobox(
+            export_frame, values=export_formats(), width=8, state="readonly"
+        )
+        self.export_format_combo.pack(side="left", padx=5)
+        self.export_format_combo.set("csv")
+        ttk.Button(export_frame, text="Export Selected Period...", command=self.export_selected_period).pack(side="left", padx=5)
+
         self.report_box = tk.Text(frame, height=20)
         self.report_box.pack(fill="both", expand=True)
 
+        self.cache_stats_label = ttk.Label(frame, foreground="#6c757d")
+        self.cache_stats_label.pack(anchor="e", pady=(5, 0))
+        self.update_cache_stats()
+
     def on_report_type_change(self, event):
         if self.report_type.get() == "Custom":
             self.custom_frame.pack(pady=5)
         else:
             self.custom_frame.pack_forget()
 
-    def generate_selected_report(self):
+    def selected_report_period(self):
         rtype = self.report_type.get()
-        if rtype == "Weekly":
-            self.generate_period_report(7)
-        elif rtype == "Monthly":
-            self.generate_period_report(30)
-        elif rtype == "Yearly":
-            self.generate_period_report(365)
-        elif rtype == "Custom":
-            self.custom_report()
-
-    def generate_period_report(self, days):
+        if rtype == "Custom":
+            start = datetime.strptime(self.from_entry.get(), "%Y-%m-%d").date()
+            end = datetime.strptime(self.to_entry.get(), "%Y-%m-%d").date()
+            return start, end
+
+        days = {"Weekly": 7, "Monthly": 30, "Yearly": 365}[rtype]
         end = date.today()
-        start = end - timedelta(days=days)
-        self.generate_report(start, end)
+        return end - timedelta(days=days), end
 
-    def custom_report(self):
+    def generate_selected_report(self):
         try:
-            start = datetime.strptime(self.from_entry.get(), "%Y-%m-%d").date()
-            end = datetime.strptime(self.to_entry.get(), "%Y-%m-%d").date()
-            self.generate_report(start, end)
-        except:
+            start, end = self.selected_report_period()
+        except (ValueError, KeyError):
             messagebox.showerror("Error", "Invalid date format.")
+            return
+        self.generate_report(start, end)
 
     def generate_report(self, start, end):
-        total = self.session.query(func.sum(Sale.total_amount)).filter(Sale.sale_date.between(start, end)).scalar() or 0
-        count = self.session.query(func.count(Sale.id)).filter(Sale.sale_date.between(start, end)).scalar()
-
-        medicine_sales = (
-            self.session.query(
-                Medicine.name,
-                func.sum(SaleItem.quantity).label("qty_sold"),
-                func.sum(SaleItem.subtotal).label("amount_sold")
-            )
-            .join(SaleItem, Medicine.id == SaleItem.medicine_id)
-            .join(Sale, Sale.id == SaleItem.sale_id)
-            .filter(Sale.sale_date.between(start, end))
-            .group_by(Medicine.id, Medicine.name)
-            .order_by(func.sum(SaleItem.quantity).desc(), Medicine.name.asc())
-            .all()
+        self.report_box.delete("1.0", tk.END)
+        self.report_box.insert(tk.END, f"Generating report for {start} to {end}...")
+
+        self.db_worker.submit(
+            "report",
+            lambda session, job: self.compute_report(session, start, end, job),
+            self.show_report,
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate report:\n{e}"),
+            label="Generating report",
         )
 
-        quantity_per_day = (
-            self.session.query(
-                Sale.sale_date,
-                func.sum(SaleItem.quantity).label("qty")
-            )
-            .join(SaleItem, Sale.id == SaleItem.sale_id)
-            .filter(Sale.sale_date.between(start, end))
-            .group_by(Sale.sale_date)
-            .order_by(Sale.sale_date.asc())
-            .all()
+    # ---------------- Export ----------------
+    def export_selected_period(self):
+        dataset = self.export_dataset_combo.get()
+        fmt = self.export_format_combo.get()
+        try:
+            start, end = self.selected_report_period()
+        except (ValueError, KeyError):
+            messagebox.showerror("Error", "Invalid date format.")
+            return
+
+        filetypes = {
+            "csv": ("CSV files", "*.csv"),
+            "parquet": ("Parquet files", "*.parquet"),
+            "arrow": ("Arrow IPC files", "*.arrow"),
+        }
+        # Datasets without a date column are exported whole, so only dated ones name the period
+        name = f"{dataset}_{start}_{end}" if DATASETS[dataset][1] is not None else dataset
+        path = filedialog.asksaveasfilename(
+            title=f"Export {dataset}",
+            initialfile=f"{name}.{fmt}",
+            defaultextension=f".{fmt}",
+            filetypes=[filetypes[fmt]],
         )
-
-        inventory_left = (
-            self.session.query(Medicine.name, Medicine.quantity)
-            .order_by(Medicine.name.asc())
-            .all()
+        if not path:
+            return
+
+        self.db_worker.submit(
+            "export",
+            lambda session, job: self.services.export_data(session, dataset, path, fmt, start, end, job),
+            lambda rows: messagebox.showinfo("Export", f"Exported {rows} {dataset} row(s) to\n{path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Export failed:\n{e}"),
+            label="Exporting data",
         )
 
-        if medicine_sales:
-            top_name, top_qty, top_amount = medicine_sales[0]
-            top_line = f"Most Sold Drug: {top_name} (Qty: {int(top_qty)}, Amount: {float(top_amount):.2f})"
-        else:
-            top_line = "Most Sold Drug: No sales in selected period"
-
-        sold_lines = "\n".join(
-            f"- {name}: Qty Sold={int(qty)}, Amount={float(amount):.2f}"
-            for name, qty, amount in medicine_sales
-        ) or "- No medicine sales in selected period"
-
-        qty_time_lines = "\n".join(
-            f"- {sale_day}: Qty Sold={int(qty)}"
-            for sale_day, qty in quantity_per_day
-        ) or "- No quantity movement in selected period"
-
-        inventory_lines = "\n".join(
-            f"- {name}: Left={qty if qty is not None else 0}"
-            for name, qty in inventory_left
-        ) or "- No medicines in inventory"
-
-        report = f"""
-SALES REPORT
-From: {start}
-To: {end}
-
-Transactions: {count}
-Total Amount: {float(total):.2f}
-
-{top_line}
-
-Quantity Sold Per Medicine (Selected Period):
-{sold_lines}
-
-Quantity Sold Per Day (Selected Period):
-{qty_time_lines}
-
-Inventory Left (Current):
-{inventory_lines}
-"""
+    def show_report(self, report):
         self.report_box.delete("1.0", tk.END)
         self.report_box.insert(tk.END, report)
+        self.update_cache_stats()
 
+    def update_cache_stats(self):
+        stats = self.report_cache.stats()
+        self.cache_stats_label.config(
+            text=f"Report cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+                 f"{stats['entries']} in memory, {stats['persisted']} saved"
+        )
 
-
+    def compute_report(self, session, start, end, job):
+        report = self.services.build_report(session, services.ReportRequest(start, end), self.report_cache, job)
+        return services.format_report(report)
@@ -0,0 +1,52 @@
+import random
+import sqlite3
+import time
+from sqlalchemy.exc import OperationalError
+
+# Raw driver errors surface from statements run on the DBAPI connection
+LOCK_ERRORS = (OperationalError, sqlite3.OperationalError)
+
+# sqlite3 reports SQLITE_BUSY / SQLITE_LOCKED with these messages
+RETRYABLE_MESSAGES = ("database is locked", "database is busy", "database table is locked")
+
+
+def is_lock_error(error):
+    return isinstance(error, LOCK_ERRORS) and any(
+        message in str(getattr(error, "orig", error)).lower() for message in RETRYABLE_MESSAGES
+    )
+
+
+class RetryPolicy:
+    """Re-runs a write transaction that lost the SQLite lock to another terminal.
+
+    ``busy_timeout`` already waits for a held lock; this covers what it cannot
+    (lock upgrades and waits longer than the timeout). The wait before retry
+    ``n`` is uniform in [0, min(max_delay, base_delay * 2**n)] ("full jitter"),
+    so terminals that collided do not retry in lockstep. The work passed to
+    ``run`` must roll back its own failed transaction.
+    """
+
+    def __init__(self, attempts=6, base_delay=0.02, max_delay=1.0, sleep=time.sleep, rng=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.retries = 0
+
+    def delay(self, attempt):
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def run(self, work):
+        for attempt in range(self.attempts - 1):
+            try:
+                return work()
+            except LOCK_ERRORS as e:
+                if not is_lock_error(e):
+                    raise
+                self.retries += 1
+                self.sleep(self.delay(attempt))
+        return work()
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,217 @@
+from collections import defaultdict
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert
+from models import DailySales, DailyMedicineSales, PatientSummary, PatientMedicineTotals
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM daily_sales",
+    "DELETE FROM daily_medicine_sales",
+    """
+    INSERT INTO daily_sales (sale_date, transaction_count, amount)
+    SELECT sale_date, COUNT(*), COALESCE(SUM(total_amount), 0)
+    FROM sales
+    WHERE sale_date IS NOT NULL
+    GROUP BY sale_date
+    """,
+    """
+    INSERT INTO daily_medicine_sales (sale_date, medicine_id, quantity, amount, transaction_count)
+    SELECT s.sale_date, COALESCE(si.medicine_id, 0), COALESCE(SUM(si.quantity), 0),
+           COALESCE(SUM(si.subtotal), 0), COUNT(DISTINCT s.id)
+    FROM sale_items si
+    JOIN sales s ON s.id = si.sale_id
+    WHERE s.sale_date IS NOT NULL
+    GROUP BY s.sale_date, COALESCE(si.medicine_id, 0)
+    """,
+]
+
+# Sales of deleted patients are left out, as checkout's incremental upkeep leaves them
+PATIENT_REBUILD_STATEMENTS = [
+    "DELETE FROM patient_summaries",
+    "DELETE FROM patient_medicine_totals",
+    """
+    INSERT INTO patient_summaries (patient_id, visit_count, lifetime_spend, last_visit)
+    SELECT patient_id, COUNT(*), COALESCE(SUM(total_amount), 0), MAX(sale_date)
+    FROM sales
+    WHERE patient_id IN (SELECT id FROM patients)
+    GROUP BY patient_id
+    """,
+    """
+    INSERT INTO patient_medicine_totals (patient_id, medicine_id, quantity, amount, transaction_count)
+    SELECT s.patient_id, COALESCE(si.medicine_id, 0), COALESCE(SUM(si.quantity), 0),
+           COALESCE(SUM(si.subtotal), 0), COUNT(DISTINCT s.id)
+    FROM sale_items si
+    JOIN sales s ON s.id = si.sale_id
+    WHERE s.patient_id IN (SELECT id FROM patients)
+    GROUP BY s.patient_id, COALESCE(si.medicine_id, 0)
+    """,
+]
+
+
+# A deleted medicine's sale items lose their medicine_id, and a rebuild files
+# them under medicine 0. Recompute the medicine-0 rows of the days and patients
+# it touched from those items, then drop its own rows.
+FORGET_MEDICINE_STATEMENTS = [
+    """
+    DELETE FROM daily_medicine_sales
+    WHERE medicine_id = 0
+      AND sale_date IN (SELECT sale_date FROM daily_medicine_sales WHERE medicine_id = :medicine_id)
+    """,
+    """
+    INSERT INTO daily_medicine_sales (sale_date, medicine_id, quantity, amount, transaction_count)
+    SELECT s.sale_date, 0, COALESCE(SUM(si.quantity), 0), COALESCE(SUM(si.subtotal), 0), COUNT(DISTINCT s.id)
+    FROM sale_items si
+    JOIN sales s ON s.id = si.sale_id
+    WHERE si.medicine_id IS NULL
+      AND s.sale_date IN (SELECT sale_date FROM daily_medicine_sales WHERE medicine_id = :medicine_id)
+    GROUP BY s.sale_date
+    """,
+    "DELETE FROM daily_medicine_sales WHERE medicine_id = :medicine_id",
+    """
+    DELETE FROM patient_medicine_totals
+    WHERE medicine_id = 0
+      AND patient_id IN (SELECT patient_id FROM patient_medicine_totals WHERE medicine_id = :medicine_id)
+    """,
+    """
+    INSERT INTO patient_medicine_totals (patient_id, medicine_id, quantity, amount, transaction_count)
+    SELECT s.patient_id, 0, COALESCE(SUM(si.quantity), 0), COALESCE(SUM(si.subtotal), 0), COUNT(DISTINCT s.id)
+    FROM sale_items si
+    JOIN sales s ON s.id = si.sale_id
+    WHERE si.medicine_id IS NULL
+      AND s.patient_id IN (SELECT patient_id FROM patient_medicine_totals WHERE medicine_id = :medicine_id)
+    GROUP BY s.patient_id
+    """,
+    "DELETE FROM patient_medicine_totals WHERE medicine_id = :medicine_id",
+]
+
+
+# Upserts are built once; compiling them per sale cost more than running them
+_days = DailySales.__table__
+_day = insert(_days)
+RECORD_DAY = _day.on_conflict_do_update(
+    index_elements=[_days.c.sale_date],
+    set_={
+        "transaction_count": _days.c.transaction_count + _day.excluded.transaction_count,
+        "amount": _days.c.amount + _day.excluded.amount,
+    },
+)
+_items = DailyMedicineSales.__table__
+_item = insert(_items)
+RECORD_MEDICINE_DAY = _item.on_conflict_do_update(
+    index_elements=[_items.c.sale_date, _items.c.medicine_id],
+    set_={
+        "quantity": _items.c.quantity + _item.excluded.quantity,
+        "amount": _items.c.amount + _item.excluded.amount,
+        "transaction_count": _items.c.transaction_count + _item.excluded.transaction_count,
+    },
+)
+_patients = PatientSummary.__table__
+_patient = insert(_patients)
+RECORD_PATIENT = _patient.on_conflict_do_update(
+    index_elements=[_patients.c.patient_id],
+    set_={
+        "visit_count": _patients.c.visit_count + _patient.excluded.visit_count,
+        "lifetime_spend": _patients.c.lifetime_spend + _patient.excluded.lifetime_spend,
+        # Two-argument max() is NULL if either date is; an undated sale keeps the last visit
+        "last_visit": func.coalesce(
+            func.max(_patients.c.last_visit, _patient.excluded.last_visit),
+            _patients.c.last_visit,
+            _patient.excluded.last_visit,
+        ),
+    },
+)
+_totals = PatientMedicineTotals.__table__
+_total = insert(_totals)
+RECORD_PATIENT_MEDICINE = _total.on_conflict_do_update(
+    index_elements=[_totals.c.patient_id, _totals.c.medicine_id],
+    set_={
+        "quantity": _totals.c.quantity + _total.excluded.quantity,
+        "amount": _totals.c.amount + _total.excluded.amount,
+        "transaction_count": _totals.c.transaction_count + _total.excluded.transaction_count,
+    },
+)
+
+
+def record_sale(session, sale_date, total_amount, lines, patient_id=None):
+    """Add one committed-to-be sale to the rollups inside the caller's transaction.
+
+    ``lines`` is an iterable of (medicine_id, quantity, subtotal); repeated
+    medicines are merged so each counts as a single transaction. With a
+    ``patient_id`` the sale is added to that patient's summary too.
+    """
+    per_medicine = defaultdict(lambda: [0, 0.0])
+    for medicine_id, quantity, subtotal in lines:
+        per_medicine[medicine_id][0] += quantity
+        per_medicine[medicine_id][1] += subtotal
+
+    session.execute(RECORD_DAY, {"sale_date": sale_date, "transaction_count": 1, "amount": total_amount})
+    if per_medicine:
+        session.execute(
+            RECORD_MEDICINE_DAY,
+            [
+                {
+                    "sale_date": sale_date,
+                    "medicine_id": medicine_id,
+                    "quantity": quantity,
+                    "amount": amount,
+                    "transaction_count": 1,
+                }
+                for medicine_id, (quantity, amount) in per_medicine.items()
+            ],
+        )
+
+    if patient_id is None:
+        return
+
+    session.execute(
+        RECORD_PATIENT,
+        {"patient_id": patient_id, "visit_count": 1, "lifetime_spend": total_amount, "last_visit": sale_date},
+    )
+    if per_medicine:
+        session.execute(
+            RECORD_PATIENT_MEDICINE,
+            [
+                {
+                    "patient_id": patient_id,
+                    "medicine_id": medicine_id,
+                    "quantity": quantity,
+                    "amount": amount,
+                    "transaction_count": 1,
+                }
+                for medicine_id, (quantity, amount) in per_medicine.items()
+            ],
+        )
+
+
+def forget_medicine(session, medicine_id):
+    """Refile a deleted medicine's rollup rows under medicine 0, as a rebuild would.
+
+    Call after the delete is flushed, when its sale items no longer point at it.
+    """
+    for statement in FORGET_MEDICINE_STATEMENTS:
+        session.execute(text(statement), {"medicine_id": medicine_id})
+
+
+def rebuild_rollups(conn):
+    """Recompute both daily rollup tables from sales/sale_items (Connection or Session)."""
+    for statement in REBUILD_STATEMENTS:
+        conn.execute(text(statement))
+
+
+def rebuild_patient_summaries(conn):
+    """Recompute the per-patient summaries from sales/sale_items."""
+    for statement in PATIENT_REBUILD_STATEMENTS:
+        conn.execute(text(statement))
+
+
+if __name__ == "__main__":
+    from database import engine
+    from migrations import run_migrations
+
+    run_migrations()
+    with engine.begin() as conn:
+        rebuild_rollups(conn)
+        rebuild_patient_summaries(conn)
+        days = conn.execute(text("SELECT COUNT(*) FROM daily_sales")).scalar()
+        patients = conn.execute(text("SELECT COUNT(*) FROM patient_summaries")).scalar()
+
+    print(f"Sales rollups rebuilt ({days} day(s), {patients} patient(s)).")
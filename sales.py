@@ -1,9 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import date
 import re
-from sqlalchemy import text
-from models import Sale, SaleItem, Patient, Medicine
+from datetime import datetime
+from database import session_scope
+from virtual_tree import KeysetRows, VirtualTreeview
+from sales_history import DEFAULT_WINDOW_DAYS, WINDOWS, SalesHistoryFilter, recent_window, row_cursor
+from events import MedicinesEdited, PatientsChanged, SaleCreated, StockChanged
+import services
+from typeahead import TypeaheadIndex
+
+TYPEAHEAD_DELAY_MS = 150
 
 
 class SalesMixin:
@@ -13,7 +19,9 @@ class SalesMixin:
         frame.pack(fill="both", expand=True)
 
         self.cart = []
-        self.ensure_sale_item_prescription_column()
+        self.medicine_index = TypeaheadIndex()
+        self.patient_index = TypeaheadIndex()
+        self._typeahead_jobs = {}
 
         form = ttk.LabelFrame(frame, text="Create Sale", padding=15)
         form.pack(fill="x", pady=10)
@@ -89,9 +97,53 @@ class SalesMixin:
         history_frame = ttk.LabelFrame(frame, text="Sales History", padding=15)
         history_frame.pack(fill="both", expand=True)
 
+        # Filters; the tab opens on a recent window so it loads the same
+        # amount however old the database is
+        filter_bar = ttk.Frame(history_frame)
+        filter_bar.pack(fill="x", pady=(0, 10))
+
+        ttk.Label(filter_bar, text="Show").pack(side="left")
+        self.history_window = ttk.Combobox(filter_bar, values=list(WINDOWS), state="readonly", width=13)
+        self.history_window.pack(side="left", padx=(5, 15))
+        self.history_window.bind("<<ComboboxSelected>>", self.select_history_window)
+
+        ttk.Label(filter_bar, text="From").pack(side="left")
+        self.history_from = ttk.Entry(filter_bar, width=12)
+        self.history_from.pack(side="left", padx=5)
+        ttk.Label(filter_bar, text="To").pack(side="left")
+        self.history_to = ttk.Entry(filter_bar, width=12)
+        self.history_to.pack(side="left", padx=(5, 15))
+
+        ttk.Label(filter_bar, text="Patient").pack(side="left")
+        self.history_patient = ttk.Combobox(filter_bar, width=24)
+        self.history_patient.pack(side="left", padx=(5, 15))
+        self.history_patient.bind(
+            "<KeyRelease>", lambda e: self.schedule_typeahead(self.history_patient, self.patient_index)
+        )
+
+        ttk.Label(filter_bar, text="Medicine").pack(side="left")
+        self.history_medicine = ttk.Combobox(filter_bar, width=24)
+        self.history_medicine.pack(side="left", padx=(5, 15))
+        self.history_medicine.bind(
+            "<KeyRelease>", lambda e: self.schedule_typeahead(self.history_medicine, self.medicine_index)
+        )
+
+        ttk.Button(filter_bar, text="Apply", command=self.apply_history_filters).pack(side="left", padx=5)
+        ttk.Button(filter_bar, text="Clear", command=self.clear_history_filters).pack(side="left")
+
+        self.history_status = ttk.Label(filter_bar, text="")
+        self.history_status.pack(side="right")
+
+        table_frame = ttk.Frame(history_frame)
+        table_frame.pack(fill="both", expand=True)
+
         columns = ("ID", "Patient", "Date", "Prescription", "Total")
-        self.sales_tree = ttk.Treeview(history_frame, columns=columns, show="headings")
-        self.sales_tree.pack(fill="both", expand=True)
+        self.sales_tree = VirtualTreeview(table_frame, columns=columns, show="headings")
+        self.sales_tree.pack(side="left", fill="both", expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.sales_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.sales_tree.configure(yscrollcommand=scrollbar.set)
 
         for col in columns:
             self.sales_tree.heading(col, text=col)
@@ -99,17 +151,14 @@ class SalesMixin:
 
         self.load_medicines_for_sale()
         self.load_patients_for_sale()
-        self.refresh_sales_tab()  # now safe
+        self.clear_history_filters()
 
-    def ensure_sale_item_prescription_column(self):
-        try:
-            rows = self.session.execute(text("PRAGMA table_info(sale_items)")).fetchall()
-            existing_columns = {row[1] for row in rows}
-            if "prescription" not in existing_columns:
-                self.session.execute(text("ALTER TABLE sale_items ADD COLUMN prescription VARCHAR"))
-                self.session.commit()
-        except Exception:
-            self.session.rollback()
+    def sales_tab_events(self):
+        return [
+            ((MedicinesEdited,), self.load_medicines_for_sale),
+            ((PatientsChanged,), self.load_patients_for_sale),
+            ((SaleCreated,), self.refresh_sales_tab),
+        ]
 
     def add_item_to_cart(self):
         med_name = self.sale_combo.get().strip()
@@ -145,7 +194,15 @@ class SalesMixin:
             )
             return
 
-        if medicine.quantity is None or medicine.quantity <= 0:
+        # Stock moves on every terminal; check the current figure, not the one loaded with the list
+        try:
+            with session_scope() as session:
+                in_stock = self.services.get_medicine(session, medicine.id).quantity
+        except services.ServiceError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        if in_stock is None or in_stock <= 0:
             messagebox.showerror("Error", "Medicine is out of stock.")
             return
 
@@ -154,8 +211,8 @@ class SalesMixin:
             if item["medicine"].id == medicine.id:
                 existing_qty += item["quantity"]
 
-        if existing_qty + quantity > medicine.quantity:
-            messagebox.showerror("Error", f"Only {medicine.quantity - existing_qty} unit(s) left for this item.")
+        if existing_qty + quantity > in_stock:
+            messagebox.showerror("Error", f"Only {in_stock - existing_qty} unit(s) left for this item.")
             return
 
         for item in self.cart:
@@ -288,117 +345,177 @@ class SalesMixin:
             return
 
         patient_name = self.patient_combo.get().strip()
-        patient = self.patient_map.get(patient_name)
-        if not patient:
+        patient_id = self.patient_map.get(patient_name)
+        if patient_id is None:
             messagebox.showerror("Error", "Please select a valid patient.")
             return
 
-        try:
-            for item in self.cart:
-                med = self.session.query(Medicine).get(item["medicine"].id)
-                if not med or med.quantity < item["quantity"]:
-                    raise ValueError(f"Insufficient stock for {item['medicine'].name}.")
-
-            total = sum(item["subtotal"] for item in self.cart)
-            sale = Sale(
-                sale_date=date.today(),
-                total_amount=total,
-                patient_id=patient.id,
-            )
-            self.session.add(sale)
-            self.session.flush()
-
-            for item in self.cart:
-                med = self.session.query(Medicine).get(item["medicine"].id)
-                med.quantity -= item["quantity"]
-
-                self.session.add(
-                    SaleItem(
-                        sale_id=sale.id,
-                        medicine_id=med.id,
-                        quantity=item["quantity"],
-                        subtotal=item["subtotal"],
-                        prescription=item.get("prescription"),
-                    )
-                )
+        request = services.CheckoutRequest(
+            patient_id=patient_id,
+            lines=[
+                services.CartLine(item["medicine"].id, item["quantity"], item["subtotal"], item.get("prescription"))
+                for item in self.cart
+            ],
+        )
 
-            self.session.commit()
+        try:
+            with session_scope() as session:
+                result = self.services.checkout(session, request)
+            self.refresh_medicine_alerts(result.medicine_ids)
+            # Names and prices are unchanged and stock is checked live when
+            # adding to the cart, so the sale's medicine list is not stale
+            medicine_ids = tuple(result.medicine_ids)
+            self.events.publish(SaleCreated(result.sale_id, patient_id, medicine_ids))
+            self.events.publish(StockChanged(medicine_ids))
 
             self.cart = []
             self.sale_qty.delete(0, tk.END)
             self.prescription_entry.delete(0, tk.END)
 
-            self.load_medicines_for_sale()
-            self.refresh_sales_tab()
-
-            if hasattr(self, "load_inventory"):
-                self.load_inventory()
-
             if cart_window is not None:
                 cart_window.destroy()
 
             messagebox.showinfo("Success", "Sale completed successfully.")
 
         except Exception as e:
-            self.session.rollback()
             messagebox.showerror("Error", str(e))
 
     def refresh_sales_tab(self):
-        # Clear sales tree
-        for item in self.sales_tree.get_children():
-            self.sales_tree.delete(item)
-
-        # Load sales
-        sales = self.session.query(Sale).order_by(Sale.id.desc()).all()
-        for sale in sales:
-            patient_name = sale.patient.name if sale.patient else "N/A"
-            prescriptions = []
-            for item in sale.items:
-                if getattr(item, "prescription", None):
-                    med_name = item.medicine.name if item.medicine else "Medicine"
-                    prescriptions.append(f"{med_name}:{item.prescription}")
-
-            prescription_text = " ; ".join(prescriptions) if prescriptions else "-"
-            self.sales_tree.insert(
-                "",
-                "end",
-                values=(sale.id, patient_name, sale.sale_date, prescription_text, sale.total_amount)
+        page_size = self.sales_tree.page_size
+        history_filter = self.sales_history_filter
+
+        def load_first_page(session, job):
+            return self.fetch_sales_history(None, page_size, session, history_filter)
+
+        def show_first_page(first_page):
+            # Later pages are loaded by keyset as the user scrolls into them
+            source = KeysetRows(
+                lambda after, limit: self.fetch_sales_history(after, limit, history_filter=history_filter),
+                row_cursor,
+                page_size,
+                first_page,
+            )
+            self.sales_tree.set_source(
+                source.count,
+                source.fetch,
+                total=source.count(),
+                first_page=first_page,
+                growing=True,
+            )
+            shown = len(first_page)
+            self.history_status.config(
+                text=f"{shown} sale(s)" if source.exhausted else f"{shown}+ sales, scroll for more"
             )
 
+        self.db_worker.submit("sales_history", load_first_page, show_first_page, label="Loading sales history")
+
+    def fetch_sales_history(self, after, limit, session=None, history_filter=None):
+        history_filter = history_filter or self.sales_history_filter
+        if session is None:
+            with session_scope() as session:
+                return self.services.sales_history_page(session, history_filter, after, limit)
+        return self.services.sales_history_page(session, history_filter, after, limit)
+
+    # ---------------- History Filters ----------------
+    def select_history_window(self, event=None):
+        days = WINDOWS.get(self.history_window.get())
+        window = recent_window(days)
+        self.history_from.delete(0, tk.END)
+        self.history_to.delete(0, tk.END)
+        if window.start is not None:
+            self.history_from.insert(0, window.start.isoformat())
+        self.apply_history_filters()
+
+    def apply_history_filters(self):
+        try:
+            start = self.parse_history_date(self.history_from.get())
+            end = self.parse_history_date(self.history_to.get())
+        except ValueError:
+            messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.")
+            return
+
+        patient_name = self.history_patient.get().strip()
+        patient_id = self.patient_map.get(patient_name) if patient_name else None
+        if patient_name and patient_id is None:
+            messagebox.showerror("Error", "Please select a valid patient.")
+            return
+
+        medicine_name = self.history_medicine.get().strip()
+        medicine = self.medicine_map.get(medicine_name) if medicine_name else None
+        if medicine_name and medicine is None:
+            messagebox.showerror("Error", "Please select a valid medicine.")
+            return
+
+        self.sales_history_filter = SalesHistoryFilter(
+            start=start,
+            end=end,
+            patient_id=patient_id,
+            medicine_id=medicine.id if medicine else None,
+        )
+        self.refresh_sales_tab()
+
+    def clear_history_filters(self):
+        self.history_patient.set("")
+        self.history_medicine.set("")
+        default = next((name for name, days in WINDOWS.items() if days == DEFAULT_WINDOW_DAYS), None)
+        if default is not None:
+            self.history_window.set(default)
+            self.select_history_window()
+            return
+
+        # A configured window that is not one of the presets
+        self.history_window.set("")
+        self.history_from.delete(0, tk.END)
+        self.history_from.insert(0, recent_window().start.isoformat())
+        self.history_to.delete(0, tk.END)
+        self.apply_history_filters()
+
+    @staticmethod
+    def parse_history_date(text):
+        text = text.strip()
+        return datetime.strptime(text, "%Y-%m-%d").date() if text else None
+
     def load_medicines_for_sale(self):
         self.medicine_map = {}
         self.all_medicine_names = []
 
-        medicines = self.session.query(Medicine).all()
+        # Plain records, not ORM objects: the map outlives the session that
+        # loaded it and must not pin an identity map or lazy-load on access
+        with session_scope() as session:
+            medicines = self.services.list_medicines(session)
         for med in medicines:
             self.medicine_map[med.name] = med
             self.all_medicine_names.append(med.name)
 
-        self.sale_combo['values'] = tuple(self.all_medicine_names)
+        self.medicine_index.sync(self.all_medicine_names)
+        self.sale_combo['values'] = tuple(self.medicine_index.search(""))
 
     def load_patients_for_sale(self):
         self.patient_map = {}
         self.all_patient_names = []
 
-        patients = self.session.query(Patient).all()
-        for patient in patients:
-            self.patient_map[patient.name] = patient
-            self.all_patient_names.append(patient.name)
+        with session_scope() as session:
+            rows = self.services.list_patient_names(session)
+        for patient_id, name in rows:
+            self.patient_map[name] = patient_id
+            self.all_patient_names.append(name)
 
-        self.patient_combo['values'] = tuple(self.all_patient_names)
+        self.patient_index.sync(self.all_patient_names)
+        self.patient_combo['values'] = tuple(self.patient_index.search(""))
 
     def filter_medicines_for_sale(self, event=None):
-        query = self.sale_combo.get().strip().lower()
-        if not query:
-            matches = self.all_medicine_names
-        else:
-            matches = [name for name in self.all_medicine_names if query in name.lower()]
-        self.sale_combo["values"] = tuple(matches)
+        self.schedule_typeahead(self.sale_combo, self.medicine_index)
 
     def filter_patients_for_sale(self, event=None):
-        query = self.patient_combo.get().strip().lower()
-        if not query:
-            matches = self.all_patient_names
-        else:
-            matches = [name for name in self.all_patient_names if query in name.lower()]
-        self.patient_combo["values"] = tuple(matches)
\ No newline at end of file
+        self.schedule_typeahead(self.patient_combo, self.patient_index)
+
+    def schedule_typeahead(self, combo, index):
+        # Debounce: only search once typing pauses
+        pending = self._typeahead_jobs.pop(combo, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        self._typeahead_jobs[combo] = self.root.after(TYPEAHEAD_DELAY_MS, self.apply_typeahead, combo, index)
+
+    def apply_typeahead(self, combo, index):
+        self._typeahead_jobs.pop(combo, None)
+        combo["values"] = tuple(index.search(combo.get()))
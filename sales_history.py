@@ -0,0 +1,115 @@
+"""Sales history for the Sales tab: newest first, one keyset page at a time.
+
+Each page continues from the last ``(sale_date, id)`` already shown instead
+of an OFFSET, so the hundredth page costs what the first does, and the tab
+opens on a recent date window with no COUNT, so opening it reads the same
+few rows however many years of sales the file holds. Every filter is
+served by an index: ``ix_sales_sale_date`` (which carries the rowid, i.e.
+``(sale_date, id)``), ``ix_sales_patient_id_sale_date`` and
+``ix_sale_items_medicine_id_sale_id``.
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+from sqlalchemy import func, select, tuple_
+from models import Medicine, Patient, Sale, SaleItem
+
+# Days of history the tab opens on, today included; "All time" is one click away
+DEFAULT_WINDOW_DAYS = int(os.environ.get("PHARMACY_SALES_HISTORY_DAYS", 7))
+
+WINDOWS = {
+    "Today": 1,
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "All time": None,
+}
+
+
+@dataclass(frozen=True)
+class SalesHistoryFilter:
+    start: Optional[date] = None
+    end: Optional[date] = None
+    patient_id: Optional[int] = None
+    medicine_id: Optional[int] = None
+
+
+def recent_window(days=DEFAULT_WINDOW_DAYS, today=None):
+    """The last ``days`` days, today included; ``None`` means all time."""
+    if days is None:
+        return SalesHistoryFilter()
+    today = today or date.today()
+    return SalesHistoryFilter(start=today - timedelta(days=max(days, 1) - 1))
+
+
+def row_cursor(row):
+    """The ``(sale_date, id)`` keyset position of a row returned by ``fetch_sales_page``."""
+    return row[2], row[0]
+
+
+def fetch_sales_page(session, history_filter, after=None, limit=200):
+    """Up to ``limit`` table rows of sales older than the ``after`` cursor, newest first.
+
+    Rows are ``(id, patient, date, prescriptions, total)``. Undated legacy
+    sales come after every dated one when no start date is set, by id.
+    """
+    rows = []
+    if after is None or after[0] is not None:
+        dated = _sales_query(session, history_filter).filter(Sale.sale_date.isnot(None))
+        if after is not None:
+            # A row-value comparison is a range seek on (sale_date, rowid)
+            dated = dated.filter(tuple_(Sale.sale_date, Sale.id) < tuple_(*after))
+        rows = dated.order_by(Sale.sale_date.desc(), Sale.id.desc()).limit(limit).all()
+
+    if len(rows) < limit and history_filter.start is None:
+        undated = _sales_query(session, history_filter).filter(Sale.sale_date.is_(None))
+        if after is not None and after[0] is None:
+            undated = undated.filter(Sale.id < after[1])
+        rows += undated.order_by(Sale.id.desc()).limit(limit - len(rows)).all()
+
+    return [
+        (sale_id, patient_name or "N/A", sale_date, prescriptions or "-", total_amount)
+        for sale_id, patient_name, sale_date, prescriptions, total_amount in rows
+    ]
+
+
+def _sales_query(session, history_filter):
+    # Prescriptions are aggregated in SQL for just the sales on this page
+    prescription_text = (
+        select(
+            func.group_concat(
+                func.coalesce(Medicine.name, "Medicine") + ":" + SaleItem.prescription,
+                " ; "
+            )
+        )
+        .select_from(SaleItem)
+        .outerjoin(Medicine, Medicine.id == SaleItem.medicine_id)
+        .where(
+            SaleItem.sale_id == Sale.id,
+            SaleItem.prescription.isnot(None),
+            SaleItem.prescription != "",
+        )
+        .correlate(Sale)
+        .scalar_subquery()
+    )
+
+    query = session.query(
+        Sale.id,
+        Patient.name,
+        Sale.sale_date,
+        prescription_text,
+        Sale.total_amount,
+    ).outerjoin(Patient, Patient.id == Sale.patient_id)
+
+    if history_filter.start is not None:
+        query = query.filter(Sale.sale_date >= history_filter.start)
+    if history_filter.end is not None:
+        query = query.filter(Sale.sale_date <= history_filter.end)
+    if history_filter.patient_id is not None:
+        query = query.filter(Sale.patient_id == history_filter.patient_id)
+    if history_filter.medicine_id is not None:
+        query = query.filter(Sale.id.in_(
+            select(SaleItem.sale_id).where(SaleItem.medicine_id == history_filter.medicine_id)
+        ))
+    return query
@@ -0,0 +1,891 @@
+"""Business operations of the pharmacy, independent of Tk.
+
+Every operation takes an explicit SQLAlchemy session and typed request
+objects, and returns plain dataclasses rather than ORM objects. Single
+operations run in their own transaction via ``transaction(session)``.
+Batch variants run every request in one transaction, each inside a
+savepoint, so one invalid cart or record is reported without undoing the
+others. Rule violations raise ``ServiceError`` subclasses.
+
+Medicines, patients and users carry a ``version`` that every UPDATE bumps.
+Saving with the version the form was loaded at fails with ``ConflictError``
+when another terminal changed the row in the meantime. Transactions that
+lose the database lock are retried with jittered backoff (``retry``).
+
+``WRITE_OPERATIONS`` names every write so a caller that owns the database
+(``api_server``) can queue requests from many terminals and commit them
+together through ``apply_batch``. The reads behind every list, count,
+history page and alert are operations too, so a client-mode terminal
+(``api_client.RemoteServices``) can serve its whole UI from the server.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm.exc import StaleDataError
+from models import (
+    Medicine, Patient, Sale, SaleItem, StockEntry, User, DailySales, DailyMedicineSales,
+    PatientSummary, PatientMedicineTotals,
+)
+from retry import DEFAULT_RETRY_POLICY
+from rollups import forget_medicine, record_sale
+from report_cache import read_report_versions
+from patient_search import count_patients as _count_patient_rows, search_patients as _search_patient_rows
+from patient_history import PatientHistorySummary, fetch_history_page, load_patient_summary
+from sales_history import SalesHistoryFilter, fetch_sales_page
+from alert_rules import crossed_since, next_crossing, query_alerts
+from bulk_import import IMPORTERS, ImportReport
+from export import DATASETS, export_dataset
+
+
+# ---------------- ERRORS ----------------
+class ServiceError(ValueError):
+    pass
+
+
+class ValidationError(ServiceError):
+    pass
+
+
+class NotFoundError(ServiceError):
+    pass
+
+
+class InsufficientStockError(ServiceError):
+    pass
+
+
+class ConflictError(ServiceError):
+    """The row changed since it was read; ``current`` holds its latest state if known."""
+
+    def __init__(self, message, current=None):
+        super().__init__(message)
+        self.current = current
+
+
+# ---------------- REQUESTS / RESPONSES ----------------
+@dataclass(frozen=True)
+class CartLine:
+    medicine_id: int
+    quantity: int
+    subtotal: float
+    prescription: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CheckoutRequest:
+    patient_id: int
+    lines: List[CartLine]
+    sale_date: date = field(default_factory=date.today)
+
+
+@dataclass(frozen=True)
+class CheckoutResult:
+    sale_id: int
+    sale_date: date
+    total: float
+    medicine_ids: List[int]
+
+
+@dataclass(frozen=True)
+class MedicineInput:
+    name: str
+    type: str
+    expiry_date: Optional[date]
+    price: float
+    quantity: int
+    medicine_id: Optional[int] = None
+    version: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class MedicineRecord:
+    model = Medicine
+
+    id: int
+    name: str
+    type: str
+    expiry_date: Optional[date]
+    price: float
+    quantity: int
+    version: int
+
+    @classmethod
+    def from_model(cls, medicine):
+        return cls(
+            medicine.id, medicine.name, medicine.type, medicine.expiry_date,
+            medicine.price, medicine.quantity, medicine.version,
+        )
+
+
+@dataclass(frozen=True)
+class StockAdjustment:
+    medicine_id: int
+    delta: int
+    entry_date: date = field(default_factory=date.today)
+
+
+@dataclass(frozen=True)
+class PatientInput:
+    name: str
+    age: int
+    medical_history: str = ""
+    patient_id: Optional[int] = None
+    version: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class PatientRecord:
+    model = Patient
+
+    id: int
+    name: str
+    age: Optional[int]
+    medical_history: Optional[str]
+    version: int
+
+    @classmethod
+    def from_model(cls, patient):
+        return cls(patient.id, patient.name, patient.age, patient.medical_history, patient.version)
+
+
+@dataclass(frozen=True)
+class PatientMatch:
+    id: int
+    name: str
+    age: Optional[int]
+    snippet: Optional[str]
+
+
+@dataclass(frozen=True)
+class UserInput:
+    username: str
+    password: str
+    role: str
+    user_id: Optional[int] = None
+    version: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class UserRecord:
+    model = User
+
+    id: int
+    username: str
+    role: str
+    version: int
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.id, user.username, user.role, user.version)
+
+
+@dataclass(frozen=True)
+class LoginRequest:
+    username: str
+    password: str
+
+
+@dataclass(frozen=True)
+class PasswordChange:
+    username: str
+    current_password: str
+    new_password: str
+
+
+@dataclass(frozen=True)
+class ReportRequest:
+    start: date
+    end: date
+
+
+@dataclass(frozen=True)
+class SalesReport:
+    start: date
+    end: date
+    total: float
+    transactions: int
+    medicine_sales: list
+    quantity_per_day: list
+    inventory: list
+
+
+# Table rows, as the keyset pages and the Alerts tab show them
+SalesHistoryRow = Tuple[int, str, Optional[date], str, Optional[float]]
+PatientHistoryRow = Tuple[int, int, Optional[date], str, int, str, str, str]
+AlertRow = Tuple[int, str, Optional[str], int, str, str, str]
+
+
+@dataclass(frozen=True)
+class PatientHistory:
+    """The patient history window: details, summary header and the first page of line items."""
+
+    patient_id: int
+    name: str
+    age: Optional[int]
+    medical_history: Optional[str]
+    summary: PatientHistorySummary
+    first_page: List[PatientHistoryRow]
+
+
+@dataclass
+class BatchResult:
+    """Per-request outcome of a batch: a result, or None plus an error message."""
+
+    results: list = field(default_factory=list)
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def succeeded(self):
+        return len(self.results) - len(self.errors)
+
+
+# ---------------- TRANSACTIONS ----------------
+@contextmanager
+def transaction(session):
+    """Commit on success, roll back on any error."""
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+
+
+def _begin_write(session):
+    # pysqlite only opens a transaction on the first INSERT/UPDATE/DELETE, so
+    # a SAVEPOINT issued earlier would commit on RELEASE. Open it up front, and
+    # take the write lock now: a read snapshot upgraded to a writer later
+    # fails at once with SQLITE_BUSY instead of waiting out busy_timeout.
+    dbapi_connection = session.connection().connection.driver_connection
+    if not dbapi_connection.in_transaction:
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+
+def apply_batch(session, calls, retry=DEFAULT_RETRY_POLICY):
+    """Run ``(operation, request)`` pairs in one transaction, each in a savepoint.
+
+    Returns one outcome per call: the operation's result, or the
+    ``ServiceError`` it raised. Any other error rolls back the whole batch.
+    """
+    def attempt():
+        outcomes = []
+        with transaction(session):
+            _begin_write(session)
+            for operation, request in calls:
+                try:
+                    with session.begin_nested():
+                        outcomes.append(operation(session, request))
+                except ServiceError as e:
+                    outcomes.append(e)
+        return outcomes
+
+    return retry.run(attempt)
+
+
+def _run_batch(session, operation, requests, retry=DEFAULT_RETRY_POLICY):
+    batch = BatchResult()
+    for index, outcome in enumerate(apply_batch(session, [(operation, request) for request in requests], retry)):
+        if isinstance(outcome, ServiceError):
+            batch.results.append(None)
+            batch.errors[index] = str(outcome)
+        else:
+            batch.results.append(outcome)
+    return batch
+
+
+def _single(session, operation, request, retry=DEFAULT_RETRY_POLICY):
+    def attempt():
+        with transaction(session):
+            _begin_write(session)
+            return operation(session, request)
+
+    return retry.run(attempt)
+
+
+def _load_for_update(session, record_type, row_id, expected_version, label):
+    """Fresh copy of a versioned row, checked against the version the caller saw."""
+    row = session.get(record_type.model, row_id, populate_existing=True)
+    if row is None:
+        raise NotFoundError(f"{label} not found.")
+    if expected_version is not None and row.version != expected_version:
+        raise ConflictError(f"{label} was changed on another terminal.", current=record_type.from_model(row))
+    return row
+
+
+def _flush_versioned(session, label):
+    # The UPDATE/DELETE matched no row at the version we read: a concurrent edit
+    try:
+        session.flush()
+    except StaleDataError:
+        raise ConflictError(f"{label} was changed on another terminal.")
+
+
+# ---------------- CHECKOUT ----------------
+_medicines = Medicine.__table__
+DECREMENT_STOCK = (
+    update(_medicines)
+    .where(_medicines.c.id == bindparam("medicine_id"), _medicines.c.quantity >= bindparam("needed"))
+    .values(quantity=_medicines.c.quantity - bindparam("needed"), version=_medicines.c.version + 1)
+)
+ADJUST_STOCK = (
+    update(_medicines)
+    .where(
+        _medicines.c.id == bindparam("medicine_id"),
+        func.coalesce(_medicines.c.quantity, 0) + bindparam("delta") >= 0,
+    )
+    .values(
+        quantity=func.coalesce(_medicines.c.quantity, 0) + bindparam("delta"),
+        version=_medicines.c.version + 1,
+    )
+)
+INSERT_SALE = insert(Sale.__table__)
+INSERT_SALE_ITEMS = insert(SaleItem.__table__)
+PATIENT_EXISTS = select(Patient.__table__.c.id).where(Patient.__table__.c.id == bindparam("patient_id"))
+
+
+def _checkout(session, request):
+    if not request.lines:
+        raise ValidationError("Cart is empty.")
+    if session.execute(PATIENT_EXISTS, {"patient_id": request.patient_id}).first() is None:
+        raise NotFoundError("Please select a valid patient.")
+
+    needed = {}
+    for line in request.lines:
+        if line.quantity <= 0:
+            raise ValidationError("Quantity must be a positive integer.")
+        needed[line.medicine_id] = needed.get(line.medicine_id, 0) + line.quantity
+
+    # Check and decrement in one statement per medicine, so two terminals
+    # selling the last units cannot both succeed.
+    for medicine_id, quantity in needed.items():
+        result = session.execute(DECREMENT_STOCK, {"medicine_id": medicine_id, "needed": quantity})
+        if result.rowcount != 1:
+            name = session.query(Medicine.name).filter(Medicine.id == medicine_id).scalar()
+            if name is None:
+                raise NotFoundError("Selected medicine is not available.")
+            raise InsufficientStockError(f"Insufficient stock for {name}.")
+
+    total = sum(line.subtotal for line in request.lines)
+    sale_id = session.execute(
+        INSERT_SALE, {"sale_date": request.sale_date, "total_amount": total, "patient_id": request.patient_id}
+    ).inserted_primary_key[0]
+
+    session.execute(INSERT_SALE_ITEMS, [
+        {
+            "sale_id": sale_id,
+            "medicine_id": line.medicine_id,
+            "quantity": line.quantity,
+            "subtotal": line.subtotal,
+            "prescription": line.prescription,
+        }
+        for line in request.lines
+    ])
+
+    record_sale(
+        session,
+        request.sale_date,
+        total,
+        [(line.medicine_id, line.quantity, line.subtotal) for line in request.lines],
+        request.patient_id,
+    )
+    return CheckoutResult(sale_id, request.sale_date, total, list(needed))
+
+
+def checkout(session, request: CheckoutRequest) -> CheckoutResult:
+    return _single(session, _checkout, request)
+
+
+def checkout_many(session, requests: List[CheckoutRequest]) -> BatchResult:
+    return _run_batch(session, _checkout, requests)
+
+
+def sales_history_page(session, history_filter: SalesHistoryFilter, after=None, limit=200) -> List[SalesHistoryRow]:
+    """One keyset page of the Sales tab history; see ``sales_history.fetch_sales_page``."""
+    return fetch_sales_page(session, history_filter, after, limit)
+
+
+# ---------------- INVENTORY ----------------
+def get_medicine(session, medicine_id) -> MedicineRecord:
+    medicine = session.get(Medicine, medicine_id, populate_existing=True)
+    if medicine is None:
+        raise NotFoundError("Medicine not found.")
+    return MedicineRecord.from_model(medicine)
+
+
+def _save_medicine(session, request):
+    if not request.name.strip():
+        raise ValidationError("Medicine name is required.")
+    if request.expiry_date is not None and request.expiry_date < date.today():
+        raise ValidationError("Cannot add expired medicine.")
+    if request.price < 0 or request.quantity < 0:
+        raise ValidationError("Price and quantity cannot be negative.")
+
+    if request.medicine_id is not None:
+        medicine = _load_for_update(session, MedicineRecord, request.medicine_id, request.version, "Medicine")
+    else:
+        medicine = Medicine()
+        session.add(medicine)
+
+    medicine.name = request.name.strip()
+    medicine.type = request.type
+    medicine.expiry_date = request.expiry_date
+    medicine.price = request.price
+    medicine.quantity = request.quantity
+    _flush_versioned(session, "Medicine")
+    return MedicineRecord.from_model(medicine)
+
+
+def save_medicine(session, request: MedicineInput) -> MedicineRecord:
+    return _single(session, _save_medicine, request)
+
+
+def save_medicines(session, requests: List[MedicineInput]) -> BatchResult:
+    return _run_batch(session, _save_medicine, requests)
+
+
+def _adjust_stock(session, request):
+    result = session.execute(ADJUST_STOCK, {"medicine_id": request.medicine_id, "delta": request.delta})
+    medicine = session.get(Medicine, request.medicine_id, populate_existing=True)
+    if medicine is None:
+        raise NotFoundError("Medicine not found.")
+    if result.rowcount != 1:
+        raise InsufficientStockError(f"Insufficient stock for {medicine.name}.")
+
+    if request.delta > 0:
+        session.execute(insert(StockEntry.__table__).values(
+            medicine_id=medicine.id, quantity_added=request.delta, entry_date=request.entry_date
+        ))
+    return MedicineRecord.from_model(medicine)
+
+
+def adjust_stock(session, request: StockAdjustment) -> MedicineRecord:
+    return _single(session, _adjust_stock, request)
+
+
+def adjust_stock_many(session, requests: List[StockAdjustment]) -> BatchResult:
+    return _run_batch(session, _adjust_stock, requests)
+
+
+def _delete_medicine(session, medicine_id):
+    medicine = _load_for_update(session, MedicineRecord, medicine_id, None, "Medicine")
+    session.delete(medicine)
+    _flush_versioned(session, "Medicine")
+    forget_medicine(session, medicine_id)
+    return medicine_id
+
+
+def delete_medicine(session, medicine_id: int) -> int:
+    return _single(session, _delete_medicine, medicine_id)
+
+
+def delete_medicines(session, medicine_ids: List[int]) -> BatchResult:
+    return _run_batch(session, _delete_medicine, medicine_ids)
+
+
+def search_medicines(session, search_text, limit=50) -> List[MedicineRecord]:
+    """Stock lookup by name fragment, in name order."""
+    medicines = (
+        session.query(Medicine)
+        .filter(Medicine.name.ilike(f"%{search_text.strip()}%"))
+        .order_by(Medicine.name.asc())
+        .limit(limit)
+        .populate_existing()
+        .all()
+    )
+    return [MedicineRecord.from_model(medicine) for medicine in medicines]
+
+
+def count_medicines(session) -> int:
+    return session.query(func.count(Medicine.id)).scalar() or 0
+
+
+def list_medicines(session, offset=0, limit=None) -> List[MedicineRecord]:
+    """Medicines in id order, one page at a time; ``limit=None`` reads them all."""
+    rows = (
+        session.query(
+            Medicine.id, Medicine.name, Medicine.type, Medicine.expiry_date,
+            Medicine.price, Medicine.quantity, Medicine.version,
+        )
+        .order_by(Medicine.id.asc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [MedicineRecord(*row) for row in rows]
+
+
+def import_csv(session, kind, source, dry_run=False, job=None) -> ImportReport:
+    """Validate and, unless ``dry_run``, import a catalog or deliveries CSV read from ``source``.
+
+    Chunks commit on their own connections (see ``bulk_import``); the
+    session only names the database they go to.
+    """
+    if kind not in IMPORTERS:
+        raise ValidationError(f"Unknown import kind: {kind}")
+    try:
+        return IMPORTERS[kind](source, dry_run=dry_run, bind=session.get_bind(), job=job)
+    except ServiceError:
+        raise
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
+# ---------------- PATIENTS ----------------
+def get_patient(session, patient_id) -> PatientRecord:
+    patient = session.get(Patient, patient_id, populate_existing=True)
+    if patient is None:
+        raise NotFoundError("Patient not found.")
+    return PatientRecord.from_model(patient)
+
+
+def _save_patient(session, request):
+    if not request.name.strip():
+        raise ValidationError("Name and age required.")
+    if request.age is None or request.age <= 0:
+        raise ValidationError("Age must be greater than 0.")
+
+    if request.patient_id is not None:
+        patient = _load_for_update(session, PatientRecord, request.patient_id, request.version, "Patient")
+    else:
+        patient = Patient()
+        session.add(patient)
+
+    patient.name = request.name.strip()
+    patient.age = request.age
+    patient.medical_history = request.medical_history
+    _flush_versioned(session, "Patient")
+    return PatientRecord.from_model(patient)
+
+
+def save_patient(session, request: PatientInput) -> PatientRecord:
+    return _single(session, _save_patient, request)
+
+
+def save_patients(session, requests: List[PatientInput]) -> BatchResult:
+    return _run_batch(session, _save_patient, requests)
+
+
+def _delete_patient(session, patient_id):
+    patient = _load_for_update(session, PatientRecord, patient_id, None, "Patient")
+    session.delete(patient)
+    _flush_versioned(session, "Patient")
+    session.query(PatientSummary).filter(PatientSummary.patient_id == patient_id).delete()
+    session.query(PatientMedicineTotals).filter(PatientMedicineTotals.patient_id == patient_id).delete()
+    return patient_id
+
+
+def delete_patient(session, patient_id: int) -> int:
+    return _single(session, _delete_patient, patient_id)
+
+
+def delete_patients(session, patient_ids: List[int]) -> BatchResult:
+    return _run_batch(session, _delete_patient, patient_ids)
+
+
+def search_patients(session, search_text, offset=0, limit=50) -> List[PatientMatch]:
+    return [PatientMatch(*row) for row in _search_patient_rows(session, search_text, offset, limit)]
+
+
+def count_patient_matches(session, search_text) -> int:
+    return _count_patient_rows(session, search_text)
+
+
+def count_patients(session) -> int:
+    return session.query(func.count(Patient.id)).scalar() or 0
+
+
+def list_patients(session, offset=0, limit=None) -> List[PatientMatch]:
+    """Patients in id order, with no snippet; ``limit=None`` reads them all."""
+    rows = (
+        session.query(Patient.id, Patient.name, Patient.age)
+        .order_by(Patient.id.asc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [PatientMatch(patient_id, name, age, None) for patient_id, name, age in rows]
+
+
+def list_patient_names(session) -> List[Tuple[int, str]]:
+    """Every patient's (id, name), for the Sales tab's patient picker."""
+    return [tuple(row) for row in session.query(Patient.id, Patient.name).order_by(Patient.id.asc())]
+
+
+def load_patient_history(session, patient_id, page_size=200, job=None) -> Optional[PatientHistory]:
+    """The summary header and first page of line items; None if the patient is gone."""
+    patient = (
+        session.query(Patient.name, Patient.age, Patient.medical_history)
+        .filter(Patient.id == patient_id)
+        .first()
+    )
+    if not patient:
+        return None
+
+    summary = load_patient_summary(session, patient_id)
+    if job is not None:
+        job.check()
+    return PatientHistory(
+        patient_id,
+        patient.name,
+        patient.age,
+        patient.medical_history,
+        summary,
+        fetch_history_page(session, patient_id, None, page_size),
+    )
+
+
+def patient_history_page(session, patient_id, after=None, limit=200) -> List[PatientHistoryRow]:
+    """One keyset page of a patient's line items; see ``patient_history.fetch_history_page``."""
+    return fetch_history_page(session, patient_id, after, limit)
+
+
+# ---------------- USERS ----------------
+def get_user(session, user_id) -> UserRecord:
+    user = session.get(User, user_id, populate_existing=True)
+    if user is None:
+        raise NotFoundError("User not found.")
+    return UserRecord.from_model(user)
+
+
+def _save_user(session, request):
+    if not request.username:
+        raise ValidationError("Username is required.")
+
+    if request.user_id is not None:
+        user = _load_for_update(session, UserRecord, request.user_id, request.version, "User")
+    else:
+        if not request.password:
+            raise ValidationError("Password is required for new user.")
+        user = User()
+        session.add(user)
+
+    user.username = request.username
+    if request.password:
+        user.password = request.password
+    user.role = request.role
+    _flush_versioned(session, "User")
+    return UserRecord.from_model(user)
+
+
+def save_user(session, request: UserInput) -> UserRecord:
+    return _single(session, _save_user, request)
+
+
+def save_users(session, requests: List[UserInput]) -> BatchResult:
+    return _run_batch(session, _save_user, requests)
+
+
+def _delete_user(session, user_id):
+    user = _load_for_update(session, UserRecord, user_id, None, "User")
+    if user.role == "manager":
+        raise ValidationError("Cannot delete manager accounts.")
+    session.delete(user)
+    _flush_versioned(session, "User")
+    return user_id
+
+
+def delete_user(session, user_id: int) -> int:
+    return _single(session, _delete_user, user_id)
+
+
+def _change_password(session, request):
+    user = session.query(User).filter_by(username=request.username).populate_existing().first()
+    if user is None:
+        raise NotFoundError("User account not found.")
+    if user.password != request.current_password:
+        raise ValidationError("Current password is incorrect.")
+    user.password = request.new_password
+    _flush_versioned(session, "User")
+    return UserRecord.from_model(user)
+
+
+def change_password(session, username, current_password, new_password) -> UserRecord:
+    return _single(session, _change_password, PasswordChange(username, current_password, new_password))
+
+
+def count_users(session) -> int:
+    return session.query(func.count(User.id)).scalar() or 0
+
+
+def list_users(session, offset=0, limit=None) -> List[UserRecord]:
+    rows = (
+        session.query(User.id, User.username, User.role, User.version)
+        .order_by(User.id.asc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+    return [UserRecord(*row) for row in rows]
+
+
+def authenticate(session, username, password) -> Optional[UserRecord]:
+    """The account these credentials log in to, or None."""
+    user = session.query(User).filter_by(username=username, password=password).first()
+    return UserRecord.from_model(user) if user else None
+
+
+# ---------------- ALERTS ----------------
+def alert_rows(session, today, medicine_ids=None) -> List[AlertRow]:
+    """Alerting medicines as of ``today``, optionally only among ``medicine_ids``; see ``alert_rules``."""
+    return query_alerts(session, today, medicine_ids)
+
+
+def next_alert_crossing(session, today) -> Optional[date]:
+    return next_crossing(session, today)
+
+
+def medicines_crossing(session, previous, today) -> Tuple[List[int], Optional[date]]:
+    """Ids whose expiry state changed after ``previous``, or the next crossing day if none did."""
+    return crossed_since(session, previous, today)
+
+
+# ---------------- REPORTS ----------------
+# Each section returns plain JSON-friendly lists so it can be cached.
+# Sales figures come from the daily rollups, so cost grows with days, not line items.
+def report_summary(session, start, end):
+    total, count = (
+        session.query(
+            func.coalesce(func.sum(DailySales.amount), 0),
+            func.coalesce(func.sum(DailySales.transaction_count), 0),
+        )
+        .filter(DailySales.sale_date.between(start, end))
+        .one()
+    )
+    return [float(total), int(count)]
+
+
+def report_medicine_sales(session, start, end):
+    rows = (
+        session.query(
+            Medicine.name,
+            func.sum(DailyMedicineSales.quantity).label("qty_sold"),
+            func.sum(DailyMedicineSales.amount).label("amount_sold")
+        )
+        .join(DailyMedicineSales, Medicine.id == DailyMedicineSales.medicine_id)
+        .filter(DailyMedicineSales.sale_date.between(start, end))
+        .group_by(Medicine.id, Medicine.name)
+        .order_by(func.sum(DailyMedicineSales.quantity).desc(), Medicine.name.asc())
+        .all()
+    )
+    return [[name, int(qty), float(amount)] for name, qty, amount in rows]
+
+
+def report_quantity_per_day(session, start, end):
+    rows = (
+        session.query(
+            DailyMedicineSales.sale_date,
+            func.sum(DailyMedicineSales.quantity).label("qty")
+        )
+        .filter(DailyMedicineSales.sale_date.between(start, end))
+        .group_by(DailyMedicineSales.sale_date)
+        .order_by(DailyMedicineSales.sale_date.asc())
+        .all()
+    )
+    return [[sale_day.isoformat(), int(qty)] for sale_day, qty in rows]
+
+
+def report_inventory(session):
+    rows = (
+        session.query(Medicine.name, Medicine.quantity)
+        .order_by(Medicine.name.asc())
+        .all()
+    )
+    return [[name, qty] for name, qty in rows]
+
+
+def _no_cache(start, end, section, compute):
+    return compute()
+
+
+def build_report(session, request: ReportRequest, cache=None, job=None) -> SalesReport:
+    """Compute every report section, through ``cache`` (a ReportCache) when given."""
+    get_or_compute = cache.get_or_compute if cache is not None else _no_cache
+    check = job.check if job is not None else (lambda: None)
+    start, end = request.start, request.end
+    if cache is not None:
+        cache.sync(read_report_versions(session))
+
+    total, count = get_or_compute(start, end, "summary", lambda: report_summary(session, start, end))
+    check()
+    medicine_sales = get_or_compute(
+        start, end, "medicine_sales", lambda: report_medicine_sales(session, start, end)
+    )
+    check()
+    quantity_per_day = get_or_compute(
+        start, end, "quantity_per_day", lambda: report_quantity_per_day(session, start, end)
+    )
+    check()
+    inventory = get_or_compute(None, None, "inventory", lambda: report_inventory(session))
+
+    return SalesReport(start, end, total, count, medicine_sales, quantity_per_day, inventory)
+
+
+def build_reports(session, requests: List[ReportRequest], cache=None, job=None) -> List[SalesReport]:
+    return [build_report(session, request, cache, job) for request in requests]
+
+
+def export_data(session, dataset, path, fmt=None, start=None, end=None, job=None) -> int:
+    """Stream ``dataset`` into the file at ``path``; returns the row count. See ``export``."""
+    if dataset not in DATASETS:
+        raise ValidationError(f"Unknown export dataset: {dataset}")
+    return export_dataset(dataset, path, fmt, start=start, end=end, bind=session.get_bind(), job=job)
+
+
+def format_report(report: SalesReport) -> str:
+    if report.medicine_sales:
+        top_name, top_qty, top_amount = report.medicine_sales[0]
+        top_line = f"Most Sold Drug: {top_name} (Qty: {int(top_qty)}, Amount: {float(top_amount):.2f})"
+    else:
+        top_line = "Most Sold Drug: No sales in selected period"
+
+    sold_lines = "\n".join(
+        f"- {name}: Qty Sold={int(qty)}, Amount={float(amount):.2f}"
+        for name, qty, amount in report.medicine_sales
+    ) or "- No medicine sales in selected period"
+
+    qty_time_lines = "\n".join(
+        f"- {sale_day}: Qty Sold={int(qty)}"
+        for sale_day, qty in report.quantity_per_day
+    ) or "- No quantity movement in selected period"
+
+    inventory_lines = "\n".join(
+        f"- {name}: Left={qty if qty is not None else 0}"
+        for name, qty in report.inventory
+    ) or "- No medicines in inventory"
+
+    return f"""
+SALES REPORT
+From: {report.start}
+To: {report.end}
+
+Transactions: {report.transactions}
+Total Amount: {float(report.total):.2f}
+
+{top_line}
+
+Quantity Sold Per Medicine (Selected Period):
+{sold_lines}
+
+Quantity Sold Per Day (Selected Period):
+{qty_time_lines}
+
+Inventory Left (Current):
+{inventory_lines}
+"""
+
+
+# ---------------- OPERATION REGISTRY ----------------
+# name -> (operation, request type) for every write, as used by apply_batch
+WRITE_OPERATIONS = {
+    "checkout": (_checkout, CheckoutRequest),
+    "adjust_stock": (_adjust_stock, StockAdjustment),
+    "save_medicine": (_save_medicine, MedicineInput),
+    "delete_medicine": (_delete_medicine, int),
+    "save_patient": (_save_patient, PatientInput),
+    "delete_patient": (_delete_patient, int),
+    "save_user": (_save_user, UserInput),
+    "delete_user": (_delete_user, int),
+    "change_password": (_change_password, PasswordChange),
+}
@@ -0,0 +1,79 @@
+import importlib
+import threading
+import time
+
+
+def _import(module_name):
+    return lambda: importlib.import_module(module_name)
+
+
+def _open_database():
+    import api_client
+    if api_client.SERVER_URL:
+        # Client mode: the server owns the file and its schema
+        api_client.backend().health()
+        return
+    from migrations import run_migrations
+    run_migrations()
+
+
+def _configure_mappers():
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+
+
+# Ordered: the background images are needed first, the main app only after login.
+WARMUP_STEPS = [
+    ("images", _import("bg_fader")),
+    ("database", _open_database),
+    ("mappers", _configure_mappers),
+    ("pharmacy", _import("pharmacy")),
+]
+
+
+class StartupWarmup:
+    """Does the slow start-up work on a background thread.
+
+    The login window appears before PIL or SQLAlchemy are imported. While the
+    user types credentials, this thread imports them, brings the schema up to
+    date, configures the mappers and imports the ``pharmacy`` module with all
+    its mixins. Anything that needs a step waits for it with ``wait(name)``.
+    """
+
+    def __init__(self, steps=WARMUP_STEPS):
+        self.steps = steps
+        self.timings = {}
+        self.errors = {}
+        self._events = {name: threading.Event() for name, _ in steps}
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="startup-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def is_ready(self, name):
+        return self._events[name].is_set()
+
+    def wait(self, name=None):
+        """Block until ``name`` (or every step) has run; re-raise its failure."""
+        self.start()
+        names = [name] if name else list(self._events)
+        for step_name in names:
+            self._events[step_name].wait()
+            if step_name in self.errors:
+                raise self.errors[step_name]
+
+    def _run(self):
+        for name, step in self.steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.errors[name] = e
+            self.timings[name] = time.perf_counter() - started
+            self._events[name].set()
+
+
+warmup = StartupWarmup()
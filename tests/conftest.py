@@ -0,0 +1,67 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Tests run against a throwaway database, never the pharmacy.db in the tree
+DB_DIR = tempfile.mkdtemp(prefix="pharmacy-tests-")
+atexit.register(shutil.rmtree, DB_DIR, ignore_errors=True)
+os.environ["PHARMACY_DATABASE_URL"] = f"sqlite:///{os.path.join(DB_DIR, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A migrated, empty database of its own."""
+    from migrations import run_migrations
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'pharmacy.db'}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    from sqlalchemy.orm import sessionmaker
+
+    with sessionmaker(bind=engine)() as session:
+        yield session
+
+
+class FakeRoot:
+    """Stands in for Tk. ``drain`` runs the worker's polls until its jobs are
+    done; longer timers (like the alert engine's day rollover) stay pending."""
+
+    POLL_LIMIT_MS = 1000
+
+    def __init__(self):
+        self.timers = {}
+        self.errors = []
+        self._next_id = 0
+
+    def after(self, ms, callback):
+        self._next_id += 1
+        self.timers[self._next_id] = (ms, callback)
+        return self._next_id
+
+    def after_cancel(self, timer_id):
+        self.timers.pop(timer_id, None)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        self.errors.append(exc)
+
+    def drain(self, worker):
+        while worker._pending:
+            polls = [timer_id for timer_id, (ms, _) in self.timers.items() if ms < self.POLL_LIMIT_MS]
+            for timer_id in polls:
+                self.timers.pop(timer_id)[1]()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
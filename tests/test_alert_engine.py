@@ -0,0 +1,48 @@
+import time
+from datetime import date, timedelta
+import pytest
+from alert_engine import AlertEngine
+from database import engine, session_scope
+from db_worker import DBWorker
+from migrations import run_migrations
+from models import Medicine
+
+
+@pytest.fixture
+def medicine_id():
+    """One well-stocked medicine in the app database, which the DB worker uses."""
+    run_migrations(engine)
+    with session_scope() as session:
+        session.query(Medicine).delete()
+        medicine = Medicine(
+            name="Cetirizine 10mg", type="Tablet", price=1.5, quantity=500,
+            expiry_date=date.today() + timedelta(days=400),
+        )
+        session.add(medicine)
+        session.commit()
+        yield medicine.id
+        session.query(Medicine).delete()
+        session.commit()
+
+
+def sell_out(medicine_id):
+    with session_scope() as session:
+        session.get(Medicine, medicine_id).quantity = 0
+        session.commit()
+
+
+def test_touch_before_start_up_load_is_delivered_is_not_lost(root, medicine_id):
+    worker = DBWorker(root)
+    alert_engine = AlertEngine(root, worker)
+    alert_engine.start()
+    # The load has read the catalog but its result has not reached the Tk thread
+    while worker._results.empty():
+        time.sleep(0.01)
+
+    sell_out(medicine_id)
+    alert_engine.touch([medicine_id])
+    root.drain(worker)
+    worker.stop()
+
+    assert list(alert_engine.alerts) == [medicine_id]
+    assert root.errors == []
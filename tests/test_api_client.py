@@ -0,0 +1,129 @@
+"""Client mode serves every GUI read from the server, with the same results as a local session."""
+import asyncio
+import csv
+import threading
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import services
+from api_client import RemoteServices
+from api_server import ApiServer
+from models import Medicine, Patient, User
+from sales_history import SalesHistoryFilter, row_cursor as sales_cursor
+from patient_history import row_cursor as history_cursor
+
+
+@pytest.fixture
+def remote(engine):
+    """A RemoteServices talking to an ApiServer on ``engine``, served from a background loop."""
+    api = ApiServer(session_factory=sessionmaker(bind=engine))
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    address = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(api.start("127.0.0.1", 0))
+        address["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+        loop.run_forever()
+        server.close()
+        api.close()
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield RemoteServices(f"http://127.0.0.1:{address['port']}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+@pytest.fixture
+def pharmacy(session):
+    """Two patients, a low-stock and an expiring medicine, a clerk, and a few sales."""
+    today = date.today()
+    grace = Patient(name="Grace Kamau", age=41, medical_history="asthma")
+    otieno = Patient(name="Otieno Were", age=67)
+    amoxicillin = Medicine(name="Amoxicillin", type="Capsule", price=2.0, quantity=10,
+                           expiry_date=today + timedelta(days=365))
+    insulin = Medicine(name="Insulin Pen", type="Injection", price=30.0, quantity=80,
+                       expiry_date=today + timedelta(days=20))
+    session.add_all([grace, otieno, amoxicillin, insulin, User(username="clerk", password="pw", role="staff")])
+    session.commit()
+
+    for quantity in (1, 2, 3):
+        services.checkout(session, services.CheckoutRequest(grace.id, [
+            services.CartLine(amoxicillin.id, quantity, quantity * 2.0, "1*2*3"),
+            services.CartLine(insulin.id, 1, 30.0),
+        ]))
+    return grace.id, amoxicillin.id
+
+
+def test_remote_reads_match_local(session, remote, pharmacy):
+    patient_id, amoxicillin = pharmacy
+    today = date.today()
+    all_time = SalesHistoryFilter()
+    first_sales = services.sales_history_page(session, all_time, None, 2)
+    first_items = services.patient_history_page(session, patient_id, None, 2)
+
+    calls = [
+        ("count_medicines",),
+        ("list_medicines", 0, 1),
+        ("list_medicines",),
+        ("count_patients",),
+        ("list_patients", 1, 10),
+        ("list_patient_names",),
+        ("count_patient_matches", "asth"),
+        ("search_patients", "asth"),
+        ("count_users",),
+        ("list_users",),
+        ("authenticate", "clerk", "pw"),
+        ("authenticate", "clerk", "wrong"),
+        ("sales_history_page", all_time, None, 2),
+        ("sales_history_page", all_time, sales_cursor(first_sales[-1]), 2),
+        ("sales_history_page", SalesHistoryFilter(start=today, medicine_id=amoxicillin)),
+        ("load_patient_history", patient_id, 2),
+        ("load_patient_history", 9999),
+        ("patient_history_page", patient_id, history_cursor(first_items[-1]), 2),
+        ("alert_rows", today),
+        ("alert_rows", today, [amoxicillin]),
+        ("alert_rows", today, []),
+        ("next_alert_crossing", today),
+        ("medicines_crossing", today - timedelta(days=100), today),
+    ]
+    for name, *args in calls:
+        assert getattr(remote, name)(None, *args) == getattr(services, name)(session, *args), name
+
+
+def test_remote_import_and_export(session, remote, pharmacy, tmp_path):
+    catalog = tmp_path / "catalog.csv"
+    expiry = (date.today() + timedelta(days=400)).isoformat()
+    with open(catalog, "w", newline="") as f:
+        csv.writer(f).writerows([
+            ["name", "type", "expiry_date", "price", "quantity"],
+            ["Cetirizine", "Tablet", expiry, "1.5", "200"],
+            ["Broken", "Tablet", "tomorrow", "1.5", "5"],
+        ])
+
+    with open(catalog, newline="") as source:
+        checked = remote.import_csv(None, "catalog", source, dry_run=True)
+    assert (checked.dry_run, checked.rows_ok, len(checked.errors)) == (True, 1, 1)
+    assert services.count_medicines(session) == 2
+
+    with open(catalog, newline="") as source:
+        imported = remote.import_csv(None, "catalog", source)
+    assert imported.inserted == 1 and len(imported.medicine_ids) == 1
+    assert services.count_medicines(session) == 3
+
+    path = tmp_path / "medicines.csv"
+    assert remote.export_data(None, "medicines", str(path), "csv") == 3
+    with open(path, newline="") as f:
+        assert len(list(csv.reader(f))) == 4
+    assert not (tmp_path / "medicines.csv.part").exists()
@@ -0,0 +1,36 @@
+import io
+from datetime import date, timedelta
+from sqlalchemy import select
+from bulk_import import import_catalog, import_deliveries
+from models import Medicine
+
+NEXT_YEAR = date.today() + timedelta(days=365)
+YESTERDAY = date.today() - timedelta(days=1)
+
+
+def catalog(*names):
+    rows = [f"{name},Tablet,{NEXT_YEAR},2.50,10" for name in names]
+    return io.StringIO("\n".join(["name,type,expiry_date,price,quantity", *rows]) + "\n")
+
+
+def test_dry_run_counts_names_repeated_across_chunks_once(engine):
+    names = ["Aspirin", "Cetirizine", "Aspirin", "Cetirizine", "Ibuprofen"]
+    dry = import_catalog(catalog(*names), dry_run=True, chunk_size=2, bind=engine)
+    real = import_catalog(catalog(*names), chunk_size=2, bind=engine)
+
+    assert (dry.inserted, dry.updated) == (real.inserted, real.updated) == (3, 2)
+
+
+def test_deliveries_reject_expired_stock(engine):
+    import_catalog(catalog("Aspirin"), bind=engine)
+    source = io.StringIO(
+        "name,quantity,expiry_date\n"
+        f"Aspirin,5,{YESTERDAY}\n"
+        f"Aspirin,7,{NEXT_YEAR}\n"
+    )
+    report = import_deliveries(source, bind=engine)
+
+    assert report.errors == [(2, "cannot add expired medicine")]
+    with engine.connect() as conn:
+        quantity, expiry = conn.execute(select(Medicine.quantity, Medicine.expiry_date)).one()
+    assert (quantity, expiry) == (17, NEXT_YEAR)
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+import pytest
+import services
+from models import DailySales, Medicine, Patient, Sale
+
+
+@pytest.fixture
+def stock(session):
+    """A patient and two medicines: plenty of Amoxicillin, one Insulin pen."""
+    patient = Patient(name="Grace Kamau", age=41)
+    amoxicillin = Medicine(name="Amoxicillin", type="Capsule", price=2.0, quantity=10,
+                           expiry_date=date.today() + timedelta(days=365))
+    insulin = Medicine(name="Insulin Pen", type="Injection", price=30.0, quantity=1,
+                       expiry_date=date.today() + timedelta(days=365))
+    session.add_all([patient, amoxicillin, insulin])
+    session.commit()
+    return patient.id, amoxicillin.id, insulin.id
+
+
+def cart(patient_id, *lines):
+    return services.CheckoutRequest(
+        patient_id, [services.CartLine(medicine_id, quantity, quantity * 2.0) for medicine_id, quantity in lines]
+    )
+
+
+def quantities(session, *medicine_ids):
+    session.expire_all()
+    return [session.get(Medicine, medicine_id).quantity for medicine_id in medicine_ids]
+
+
+def test_batch_checkout_fails_only_the_cart_short_of_stock(session, stock):
+    patient_id, amoxicillin, insulin = stock
+    batch = services.checkout_many(session, [
+        cart(patient_id, (amoxicillin, 3)),
+        cart(patient_id, (amoxicillin, 2), (insulin, 2)),
+        cart(patient_id, (amoxicillin, 1), (insulin, 1)),
+    ])
+
+    assert batch.errors == {1: "Insufficient stock for Insulin Pen."}
+    assert batch.succeeded == 2
+    # The failed cart's Amoxicillin line was rolled back with its savepoint
+    assert quantities(session, amoxicillin, insulin) == [6, 0]
+    assert session.query(Sale).count() == 2
+    assert session.get(DailySales, date.today()).transaction_count == 2
+
+
+def test_checkout_short_of_stock_changes_nothing(session, stock):
+    patient_id, amoxicillin, insulin = stock
+    with pytest.raises(services.InsufficientStockError):
+        services.checkout(session, cart(patient_id, (amoxicillin, 3), (insulin, 2)))
+
+    assert quantities(session, amoxicillin, insulin) == [10, 1]
+    assert session.query(Sale).count() == 0
+    assert session.query(DailySales).count() == 0
@@ -0,0 +1,57 @@
+import sqlite3
+from dataclasses import replace
+from datetime import date, timedelta
+import pytest
+import services
+from retry import RetryPolicy
+
+PARACETAMOL = services.MedicineInput(
+    name="Paracetamol 500mg", type="Tablet", expiry_date=date.today() + timedelta(days=365),
+    price=1.0, quantity=100,
+)
+
+
+def test_saving_a_stale_version_raises_conflict(session):
+    loaded = services.save_medicine(session, PARACETAMOL)
+    # Another terminal saves first, bumping the version
+    services.save_medicine(session, replace(PARACETAMOL, price=1.2, medicine_id=loaded.id, version=loaded.version))
+
+    with pytest.raises(services.ConflictError) as conflict:
+        services.save_medicine(session, replace(PARACETAMOL, quantity=80, medicine_id=loaded.id, version=loaded.version))
+
+    assert conflict.value.current.version == loaded.version + 1
+    assert conflict.value.current.price == 1.2
+    assert services.get_medicine(session, loaded.id).quantity == 100
+
+
+def test_saving_the_current_version_bumps_it(session):
+    loaded = services.save_medicine(session, PARACETAMOL)
+    saved = services.save_medicine(session, replace(PARACETAMOL, price=1.5, medicine_id=loaded.id, version=loaded.version))
+    assert saved.version == loaded.version + 1
+
+
+def flaky(failures, error):
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error
+        return len(calls)
+
+    return work
+
+
+def test_lock_errors_are_retried():
+    policy = RetryPolicy(sleep=lambda seconds: None)
+    assert policy.run(flaky(2, sqlite3.OperationalError("database is locked"))) == 3
+    assert policy.retries == 2
+
+
+def test_other_errors_and_the_last_attempt_are_not_retried():
+    policy = RetryPolicy(attempts=3, sleep=lambda seconds: None)
+    with pytest.raises(sqlite3.OperationalError, match="no such table"):
+        policy.run(flaky(1, sqlite3.OperationalError("no such table: sales")))
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        policy.run(flaky(3, sqlite3.OperationalError("database is locked")))
+    assert policy.retries == 2
@@ -0,0 +1,39 @@
+import threading
+from db_worker import DBWorker
+
+
+def run_in_order(worker):
+    """Hold the worker until every job is queued, so they finish in one poll."""
+    gate = threading.Event()
+    worker.submit("gate", lambda session, job: gate.wait(), lambda result: None)
+    return gate
+
+
+def test_failing_callback_does_not_stop_later_results(root):
+    worker = DBWorker(root)
+    gate = run_in_order(worker)
+    results = []
+
+    worker.submit("first", lambda session, job: 1, lambda result: 1 / 0)
+    worker.submit("second", lambda session, job: 2, results.append)
+    gate.set()
+    root.drain(worker)
+    worker.stop()
+
+    assert results == [2]
+    assert [type(error) for error in root.errors] == [ZeroDivisionError]
+
+
+def test_cancel_all_keeps_the_result_of_a_non_cancellable_job(root):
+    worker = DBWorker(root)
+    gate = run_in_order(worker)
+    results = []
+
+    worker.submit("import", lambda session, job: "committed", results.append, cancellable=False)
+    worker.submit("import", lambda session, job: "checked", results.append)
+    worker.cancel_all()
+    gate.set()
+    root.drain(worker)
+    worker.stop()
+
+    assert results == ["committed"]
@@ -0,0 +1,55 @@
+"""Upgrading a database created by the first release, before any migration ran."""
+import shutil
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from migrations import SCHEMA_VERSION, get_schema_version, run_migrations
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    """A copy of the pharmacy.db shipped in the tree (schema version 0, with data)."""
+    path = tmp_path / "pharmacy.db"
+    shutil.copyfile(ROOT / "pharmacy.db", path)
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == 0
+    yield engine
+    engine.dispose()
+
+
+def table_counts(conn, *tables):
+    return [conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() for table in tables]
+
+
+def test_baseline_database_migrates_to_the_latest_version(baseline_engine):
+    with baseline_engine.connect() as conn:
+        before = table_counts(conn, "users", "medicines", "patients", "sales", "sale_items")
+
+    assert run_migrations(baseline_engine) == SCHEMA_VERSION
+
+    with baseline_engine.connect() as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        assert table_counts(conn, "users", "medicines", "patients", "sales", "sale_items") == before
+        # Backfilled from the existing sales
+        assert conn.execute(text("SELECT COALESCE(SUM(amount), 0) FROM daily_sales")).scalar() == pytest.approx(
+            conn.execute(text("SELECT COALESCE(SUM(total_amount), 0) FROM sales WHERE sale_date IS NOT NULL")).scalar()
+        )
+        assert conn.execute(text("SELECT COUNT(*) FROM report_versions")).scalar() == 2
+
+    columns = inspect(baseline_engine)
+    for table in ("medicines", "patients", "users"):
+        assert "version" in {column["name"] for column in columns.get_columns(table)}
+    assert "ix_sales_sale_date" in {index["name"] for index in columns.get_indexes("sales")}
+
+
+def test_migrating_twice_changes_nothing(baseline_engine):
+    run_migrations(baseline_engine)
+    with baseline_engine.connect() as conn:
+        before = conn.execute(text("SELECT sale_date, transaction_count, amount FROM daily_sales")).all()
+
+    assert run_migrations(baseline_engine) == SCHEMA_VERSION
+    with baseline_engine.connect() as conn:
+        assert conn.execute(text("SELECT sale_date, transaction_count, amount FROM daily_sales")).all() == before
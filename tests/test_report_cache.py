@@ -0,0 +1,64 @@
+"""Cached reports follow checkouts and deletes, in this process and the next."""
+from datetime import date, timedelta
+import pytest
+import services
+from models import Medicine, Patient
+from report_cache import ReportCache
+
+TODAY = date.today()
+LAST_WEEK = TODAY - timedelta(days=7)
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+@pytest.fixture
+def catalog(session):
+    patient = Patient(name="Grace Kamau", age=30)
+    medicines = [
+        Medicine(name=name, type="Tablet", price=1.0, quantity=1000, expiry_date=TODAY + timedelta(days=365))
+        for name in ("Aspirin", "Cetirizine")
+    ]
+    session.add_all([patient, *medicines])
+    session.commit()
+    return patient.id, [medicine.id for medicine in medicines]
+
+
+def sell(session, patient_id, sale_date, medicine_id, quantity):
+    services.checkout(session, services.CheckoutRequest(
+        patient_id, [services.CartLine(medicine_id, quantity, float(quantity))], sale_date,
+    ))
+
+
+def report(session, cache, start, end):
+    return services.build_report(session, services.ReportRequest(start, end), cache)
+
+
+def test_report_follows_checkout_and_delete(session, catalog):
+    patient_id, (aspirin, cetirizine) = catalog
+    cache = ReportCache()
+    sell(session, patient_id, TODAY, aspirin, 2)
+    assert report(session, cache, LAST_WEEK, TODAY).total == 2
+
+    sell(session, patient_id, TODAY, cetirizine, 3)
+    current = report(session, cache, LAST_WEEK, TODAY)
+    assert (current.total, current.transactions) == (5, 2)
+
+    services.delete_medicine(session, cetirizine)
+    current = report(session, cache, LAST_WEEK, TODAY)
+    assert [name for name, _, _ in current.medicine_sales] == ["Aspirin"]
+    assert [name for name, _ in current.inventory] == ["Aspirin"]
+
+
+def test_saved_closed_period_is_dropped_after_a_back_dated_sale(session, catalog, tmp_path):
+    patient_id, (aspirin, _) = catalog
+    path = tmp_path / "report_cache.json"
+    sell(session, patient_id, YESTERDAY, aspirin, 2)
+    assert report(session, ReportCache(path), LAST_WEEK, YESTERDAY).total == 2
+
+    # The next start sees the saved period until the closed data changes
+    restarted = ReportCache(path)
+    assert report(session, restarted, LAST_WEEK, YESTERDAY).total == 2
+    assert restarted.hits > 0
+
+    sell(session, patient_id, YESTERDAY, aspirin, 4)
+    assert report(session, ReportCache(path), LAST_WEEK, YESTERDAY).total == 6
+    assert report(session, restarted, LAST_WEEK, YESTERDAY).total == 6
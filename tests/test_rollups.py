@@ -0,0 +1,73 @@
+"""Checkout keeps the rollup tables equal to a rebuild from the raw sales."""
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import text
+import services
+from models import Medicine, Patient
+from rollups import rebuild_patient_summaries, rebuild_rollups
+
+TODAY = date.today()
+ROLLUP_TABLES = ("daily_sales", "daily_medicine_sales", "patient_summaries", "patient_medicine_totals")
+
+
+@pytest.fixture
+def catalog(session):
+    patients = [Patient(name=name, age=30) for name in ("Grace Kamau", "Peter Otieno")]
+    medicines = [
+        Medicine(name=name, type="Tablet", price=price, quantity=1000, expiry_date=TODAY + timedelta(days=365))
+        for name, price in (("Aspirin", 1.0), ("Cetirizine", 2.5))
+    ]
+    session.add_all(patients + medicines)
+    session.commit()
+    return [patient.id for patient in patients], [medicine.id for medicine in medicines]
+
+
+def sell(session, patient_id, sale_date, *lines):
+    return services.checkout(session, services.CheckoutRequest(
+        patient_id,
+        [services.CartLine(medicine_id, quantity, quantity * 1.5) for medicine_id, quantity in lines],
+        sale_date,
+    ))
+
+
+def snapshot(session):
+    session.expire_all()
+    return {
+        table: sorted(session.execute(text(f"SELECT * FROM {table}")).all())
+        for table in ROLLUP_TABLES
+    }
+
+
+def rebuilt(session):
+    rebuild_rollups(session)
+    rebuild_patient_summaries(session)
+    tables = snapshot(session)
+    session.rollback()
+    return tables
+
+
+def test_rollups_match_a_rebuild_after_checkouts_and_deletes(session, catalog):
+    (grace, peter), (aspirin, cetirizine) = catalog
+    sell(session, grace, TODAY, (aspirin, 2), (cetirizine, 1))
+    sell(session, grace, TODAY, (aspirin, 1), (aspirin, 3))
+    sell(session, peter, TODAY - timedelta(days=3), (cetirizine, 4))
+    sell(session, peter, TODAY, (aspirin, 5))
+    assert snapshot(session) == rebuilt(session)
+
+    services.delete_patient(session, peter)
+    services.delete_medicine(session, cetirizine)
+    assert snapshot(session) == rebuilt(session)
+
+    # Grace's first sale now has two unlinked medicines on a day medicine 0 already has
+    services.delete_medicine(session, aspirin)
+    assert snapshot(session) == rebuilt(session)
+
+
+def test_daily_totals_after_checkout(session, catalog):
+    (grace, _), (aspirin, cetirizine) = catalog
+    sell(session, grace, TODAY, (aspirin, 2), (cetirizine, 2))
+    sell(session, grace, TODAY, (aspirin, 1))
+
+    report = services.build_report(session, services.ReportRequest(TODAY, TODAY))
+    assert (report.transactions, report.total) == (2, pytest.approx(7.5))
+    assert report.medicine_sales == [["Aspirin", 3, pytest.approx(4.5)], ["Cetirizine", 2, pytest.approx(3.0)]]
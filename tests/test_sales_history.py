@@ -0,0 +1,59 @@
+"""The Sales tab's history costs the same number of statements however many sales exist."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from migrations import run_migrations
+from sales import SalesMixin
+import services
+from sales_history import SalesHistoryFilter, recent_window, row_cursor
+from benchmarks.synthetic import generate
+
+PAGE_SIZE = 200
+# Sale line items; even the small file has more than a page of sales
+SMALL, LARGE = 3_500, 70_000
+
+
+class SalesTab(SalesMixin):
+    def __init__(self):
+        self.services = services
+        self.sales_history_filter = recent_window()
+
+
+def count_statements(tmp_path_factory, items, load):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('sales') / 'sales.db'}")
+    run_migrations(engine)
+    generate(items, bind=engine, seed=7)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with sessionmaker(bind=engine)() as session:
+        rows = load(SalesTab(), session)
+    engine.dispose()
+    return len(statements), rows
+
+
+def open_tab(tab, session):
+    return tab.fetch_sales_history(None, PAGE_SIZE, session)
+
+
+def open_all_time(tab, session):
+    return tab.fetch_sales_history(None, PAGE_SIZE, session, SalesHistoryFilter())
+
+
+def scroll_to_second_page(tab, session):
+    first = tab.fetch_sales_history(None, PAGE_SIZE, session, SalesHistoryFilter())
+    return tab.fetch_sales_history(row_cursor(first[-1]), PAGE_SIZE, session, SalesHistoryFilter())
+
+
+def filter_by_patient(tab, session):
+    return tab.fetch_sales_history(None, PAGE_SIZE, session, SalesHistoryFilter(patient_id=3))
+
+
+@pytest.mark.parametrize("load", [open_tab, open_all_time, scroll_to_second_page, filter_by_patient])
+def test_statement_count_does_not_grow_with_sales(tmp_path_factory, load):
+    small, small_rows = count_statements(tmp_path_factory, SMALL, load)
+    large, large_rows = count_statements(tmp_path_factory, LARGE, load)
+
+    assert small == large
+    assert len(large_rows) <= PAGE_SIZE
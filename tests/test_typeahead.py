@@ -0,0 +1,20 @@
+from typeahead import TypeaheadIndex
+
+NAMES = ["Amoxicillin 500mg", "Mometasone Cream", "Paracetamol 500mg", "Ibuprofen 200mg"]
+
+
+def test_two_character_query_matches_inside_words():
+    index = TypeaheadIndex(NAMES)
+    assert index.search("mo") == ["Mometasone Cream", "Amoxicillin 500mg", "Paracetamol 500mg"]
+
+
+def test_one_character_query_matches_inside_words():
+    index = TypeaheadIndex(NAMES)
+    assert index.search("x") == ["Amoxicillin 500mg"]
+
+
+def test_short_queries_forget_removed_names():
+    index = TypeaheadIndex(NAMES)
+    index.remove("Amoxicillin 500mg")
+    assert "Amoxicillin 500mg" not in index.search("mo")
+    assert index.search("x") == []
@@ -0,0 +1,153 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+SUGGESTION_LIMIT = 20
+FUZZY_MIN_OVERLAP = 0.5
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class TypeaheadIndex:
+    """Prefix + trigram index over a set of display names.
+
+    ``search`` ranks matches as: name prefix, word prefix, substring, then
+    typo-tolerant trigram overlap, and returns at most ``limit`` names.
+    Queries shorter than a trigram are matched through word-start and bigram
+    postings instead. The index is updated incrementally with ``add``/``remove``
+    or ``sync``.
+    """
+
+    def __init__(self, names=()):
+        self._keys = {}
+        self._name_grams = {}
+        self._sorted = []
+        self._grams = defaultdict(set)
+        self._pairs = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, name):
+        if name in self._keys:
+            return
+        key = normalize(name)
+        self._keys[name] = key
+        insort(self._sorted, (key, name))
+        self._name_grams[name] = grams = frozenset(trigrams(key))
+        for gram in grams:
+            self._grams[gram].add(name)
+        for pair in bigrams(key):
+            self._pairs[pair].add(name)
+
+    def remove(self, name):
+        key = self._keys.pop(name, None)
+        if key is None:
+            return
+        index = bisect_left(self._sorted, (key, name))
+        if index < len(self._sorted) and self._sorted[index] == (key, name):
+            del self._sorted[index]
+        for gram in self._name_grams.pop(name):
+            postings = self._grams.get(gram)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self._grams[gram]
+        for pair in bigrams(key):
+            postings = self._pairs.get(pair)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self._pairs[pair]
+
+    def sync(self, names):
+        names = set(names)
+        for name in [name for name in self._keys if name not in names]:
+            self.remove(name)
+        for name in names:
+            self.add(name)
+
+    def search(self, query, limit=SUGGESTION_LIMIT):
+        query = normalize(query)
+        if not query:
+            return [name for _, name in self._sorted[:limit]]
+
+        ranked = {}
+
+        # Tier 0: the name starts with the query (ordered slice of the sorted list)
+        start = bisect_left(self._sorted, (query, ""))
+        for key, name in self._sorted[start:start + limit]:
+            if not key.startswith(query):
+                break
+            ranked[name] = (0, 0.0, len(key), key)
+
+        if len(query) < 3:
+            return self._search_short(query, ranked, limit)
+
+        query_grams = trigrams(query) - {f"{query[-2:]} "}
+        postings = sorted((self._grams.get(gram, set()) for gram in query_grams), key=len)
+
+        # Tiers 1-2: word prefix / substring. Such names contain every trigram
+        # inside the query (the leading word-start gram only when there is no
+        # other), so intersect those postings starting from the rarest.
+        inner_grams = query_grams - {f" {query[:2]}"} or query_grams
+        inner = sorted((self._grams.get(gram, set()) for gram in inner_grams), key=len)
+        exact = set(inner[0]).intersection(*inner[1:])
+        for name in exact:
+            if name not in ranked:
+                self._rank_substring(ranked, name, query)
+
+        # Tier 3: typo tolerance. A name sharing at least FUZZY_MIN_OVERLAP of
+        # the query trigrams must contain one of the rarest (n - needed + 1).
+        if len(ranked) < limit and len(query) >= 4:
+            needed = max(int(len(query_grams) * FUZZY_MIN_OVERLAP + 0.999), 1)
+            candidates = set().union(*postings[:len(query_grams) - needed + 1])
+            for name in candidates:
+                if name in ranked:
+                    continue
+                key = self._keys[name]
+                shared = len(query_grams & self._name_grams[name])
+                if shared >= needed:
+                    ranked[name] = (3, -shared / len(query_grams), len(key), key)
+
+        return sorted(ranked, key=ranked.get)[:limit]
+
+    def _search_short(self, query, ranked, limit):
+        # Too short for trigrams. Word prefixes come from the word-start
+        # postings (" mo" or " m"); names containing the query inside a word
+        # are looked up in its bigram postings only if those fall short.
+        word_start = self._grams.get(f" {query}", ()) if len(query) == 2 else self._pairs.get(f" {query}", ())
+        for name in word_start:
+            if name not in ranked:
+                key = self._keys[name]
+                ranked[name] = (1, 0.0, len(key), key)
+
+        if len(ranked) < limit:
+            pairs = [query] if len(query) == 2 else [pair for pair in self._pairs if query in pair]
+            for pair in pairs:
+                for name in self._pairs.get(pair, ()):
+                    if name not in ranked:
+                        self._rank_substring(ranked, name, query)
+
+        return heapq.nsmallest(limit, ranked, key=ranked.get)
+
+    def _rank_substring(self, ranked, name, query):
+        # Tiers 1-2: the query starts a word of the name, or is inside one
+        key = self._keys[name]
+        if f" {query}" in f" {key}":
+            ranked[name] = (1, 0.0, len(key), key)
+        elif query in key:
+            ranked[name] = (2, 0.0, len(key), key)
@@ -1,6 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from models import User
+from dataclasses import replace
+from database import session_scope
+from virtual_tree import VirtualTreeview
+from conflict_dialog import OVERWRITE, RELOAD, ask_conflict_resolution
+import services
 
 class UserMixin:
 
@@ -39,10 +43,18 @@ class UserMixin:
         ).grid(row=3, column=0, columnspan=2, pady=10)
 
         self.selected_user_id = None
+        self.selected_user_version = None
 
         columns = ("ID", "Username", "Role", "Edit", "Delete")
-        self.users_tree = ttk.Treeview(frame, columns=columns, show="headings")
-        self.users_tree.pack(fill="both", expand=True)
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill="both", expand=True)
+
+        self.users_tree = VirtualTreeview(table_frame, columns=columns, show="headings")
+        self.users_tree.pack(side="left", fill="both", expand=True)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.users_tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.users_tree.configure(yscrollcommand=scrollbar.set)
         for col in columns:
             self.users_tree.heading(col, text=col)
             if col in ("Edit", "Delete"):
@@ -54,38 +66,41 @@ class UserMixin:
         self.load_users()
 
     def load_users(self):
-        for row in self.users_tree.get_children():
-            self.users_tree.delete(row)
-        users = self.session.query(User).all()
-        for user in users:
-            self.users_tree.insert("", "end", values=(user.id, user.username, user.role, "Edit", "Delete"))
+        self.users_tree.set_source(self.count_user_rows, self.fetch_user_rows)
+
+    def count_user_rows(self):
+        with session_scope() as session:
+            return self.services.count_users(session)
+
+    def fetch_user_rows(self, offset, limit):
+        with session_scope() as session:
+            users = self.services.list_users(session, offset, limit)
+        return [(user.id, user.username, user.role, "Edit", "Delete") for user in users]
 
     def save_user(self):
-        username = self.user_username.get()
-        password = self.user_password.get()
-        role = self.user_role.get()
-        if not username:
-            messagebox.showerror("Error", "Username is required.")
+        request = services.UserInput(
+            username=self.user_username.get(),
+            password=self.user_password.get(),
+            role=self.user_role.get(),
+            user_id=int(self.selected_user_id) if self.selected_user_id else None,
+            version=self.selected_user_version,
+        )
+        try:
+            try:
+                with session_scope() as session:
+                    self.services.save_user(session, request)
+            except services.ConflictError as e:
+                choice = ask_conflict_resolution("user", e)
+                if choice != OVERWRITE:
+                    if choice == RELOAD:
+                        self.reload_user_form(e.current)
+                    return
+                with session_scope() as session:
+                    self.services.save_user(session, replace(request, version=e.current.version))
+        except services.ServiceError as e:
+            messagebox.showerror("Error", str(e))
             return
 
-        if self.selected_user_id:
-            user = self.session.query(User).get(self.selected_user_id)
-            if not user:
-                messagebox.showerror("Error", "User not found.")
-                return
-            user.username = username
-            if password:
-                user.password = password
-            user.role = role
-            self.selected_user_id = None
-        else:
-            if not password:
-                messagebox.showerror("Error", "Password is required for new user.")
-                return
-            user = User(username=username, password=password, role=role)
-            self.session.add(user)
-
-        self.session.commit()
         messagebox.showinfo("Success", "User saved successfully.")
         self.clear_user_form()
         self.load_users()
@@ -110,19 +125,33 @@ class UserMixin:
             self.delete_user(user_id)
 
     def edit_user(self, user_id):
-        user = self.session.query(User).get(user_id)
-        if not user:
+        try:
+            with session_scope() as session:
+                user = self.services.get_user(session, int(user_id))
+        except services.NotFoundError:
             return
+        self.fill_user_form(user)
+
+    def reload_user_form(self, user):
+        if user is None:
+            self.clear_user_form()
+        else:
+            self.fill_user_form(user)
+        self.load_users()
 
-        self.selected_user_id = user_id
+    def fill_user_form(self, user):
+        self.selected_user_id = user.id
+        self.selected_user_version = user.version
         self.user_username.delete(0, tk.END)
         self.user_username.insert(0, user.username)
         self.user_password.delete(0, tk.END)
         self.user_role.set(user.role)
 
     def delete_user(self, user_id):
-        user = self.session.query(User).get(user_id)
-        if not user:
+        try:
+            with session_scope() as session:
+                user = self.services.get_user(session, int(user_id))
+        except services.NotFoundError:
             return
 
         if user.role == "manager":
@@ -133,8 +162,13 @@ class UserMixin:
         if not confirm:
             return
 
-        self.session.delete(user)
-        self.session.commit()
+        try:
+            with session_scope() as session:
+                self.services.delete_user(session, user.id)
+        except services.NotFoundError:
+            pass
+        except services.ServiceError as e:
+            messagebox.showerror("Error", str(e))
         self.clear_user_form()
         self.load_users()
 
@@ -143,5 +177,6 @@ class UserMixin:
         self.user_password.delete(0, tk.END)
         self.user_role.set("staff")
         self.selected_user_id = None
+        self.selected_user_version = None
 
    
\ No newline at end of file
@@ -0,0 +1,278 @@
+from collections import OrderedDict, namedtuple
+from tkinter import ttk
+
+RenderStats = namedtuple("RenderStats", "inserted updated moved deleted unchanged")
+
+
+def first_column(values):
+    return values[0]
+
+
+def keyed_rows(rows, key):
+    """``(iid, values)`` per row; repeated keys get a ``#n`` suffix so iids stay unique."""
+    keyed = []
+    seen = set()
+    for values in rows:
+        iid = str(key(values))
+        if iid in seen:
+            n = 2
+            while f"{iid}#{n}" in seen:
+                n += 1
+            iid = f"{iid}#{n}"
+        seen.add(iid)
+        keyed.append((iid, tuple(values)))
+    return keyed
+
+
+def plan_render(shown, wanted):
+    """The item edits that turn ``shown`` into ``wanted``.
+
+    ``shown`` maps iid -> values in display order and ``wanted`` is a list of
+    ``(iid, values)``. Returns ``(deleted, edits, stats)``: the iids to delete
+    first, then ``(action, index, iid, values)`` edits to apply in order, where
+    action is "insert", "update" or "move". Rows that kept their key, values
+    and position are not touched at all.
+    """
+    wanted_ids = {iid for iid, _ in wanted}
+    deleted = [iid for iid in shown if iid not in wanted_ids]
+    order = [iid for iid in shown if iid in wanted_ids]
+
+    edits = []
+    inserted = updated = moved = unchanged = 0
+    for index, (iid, values) in enumerate(wanted):
+        if iid not in shown:
+            order.insert(index, iid)
+            edits.append(("insert", index, iid, values))
+            inserted += 1
+            continue
+        touched = False
+        if order[index] != iid:
+            order.remove(iid)
+            order.insert(index, iid)
+            edits.append(("move", index, iid, values))
+            moved += 1
+            touched = True
+        if shown[iid] != values:
+            edits.append(("update", index, iid, values))
+            updated += 1
+            touched = True
+        unchanged += not touched
+
+    return deleted, edits, RenderStats(inserted, updated, moved, len(deleted), unchanged)
+
+
+class KeysetRows:
+    """Row source that pages by keyset and grows as the user scrolls.
+
+    ``fetch_page(after, limit)`` returns up to ``limit`` rows following the
+    cursor ``after`` (``None`` for the first page), and ``cursor(row)`` gives a
+    row's cursor. Rows already loaded are kept; ``count()`` is what is loaded
+    plus one more page while the source is not exhausted, so scrolling into
+    that page loads it ("load more on scroll") without ever counting the table.
+    """
+
+    def __init__(self, fetch_page, cursor, page_size, first_page=None):
+        self.fetch_page = fetch_page
+        self.cursor = cursor
+        self.page_size = page_size
+        self.rows = []
+        self.exhausted = False
+        self.pages_loaded = 0
+        if first_page is not None:
+            self._extend(list(first_page))
+
+    def _extend(self, page):
+        self.rows.extend(page)
+        self.pages_loaded += 1
+        self.exhausted = len(page) < self.page_size
+
+    def load_more(self):
+        after = self.cursor(self.rows[-1]) if self.rows else None
+        self._extend(list(self.fetch_page(after, self.page_size)))
+
+    def count(self):
+        return len(self.rows) + (0 if self.exhausted else self.page_size)
+
+    def fetch(self, offset, limit):
+        while not self.exhausted and len(self.rows) < offset + limit:
+            self.load_more()
+        return self.rows[offset:offset + limit]
+
+
+class VirtualTreeview(ttk.Treeview):
+    """Treeview that only keeps the visible window of a large row set as items.
+
+    Rows come from a row source: ``count()`` returns the total number of rows
+    and ``fetch(offset, limit)`` returns a list of value tuples, typically
+    backed by a LIMIT/OFFSET query. Pages are fetched on demand while the user
+    scrolls and a few of them are kept in a small cache.
+
+    Items are keyed by ``key(values)`` (the first column, normally the primary
+    key), and each render only inserts, updates, moves or deletes the items
+    that differ, so a refresh after a sale touches the rows that changed and
+    the selection survives. ``render_stats`` counts what the last render did.
+    """
+
+    def __init__(self, master=None, overscan=5, page_size=200, max_pages=8, key=first_column, **kwargs):
+        self._yscrollcommand = kwargs.pop("yscrollcommand", None)
+        super().__init__(master, **kwargs)
+
+        self.overscan = overscan
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.key = key
+        self.render_stats = RenderStats(0, 0, 0, 0, 0)
+        self._shown = {}
+
+        self._count = lambda: 0
+        self._fetch = lambda offset, limit: []
+        self._growing = False
+        self._total = 0
+        self._offset = 0
+        self._pages = OrderedDict()
+
+        self.bind("<Configure>", lambda e: self._render(), add="+")
+        self.bind("<MouseWheel>", self._on_mousewheel, add="+")
+        self.bind("<Button-4>", lambda e: self._scroll_and_break(-3), add="+")
+        self.bind("<Button-5>", lambda e: self._scroll_and_break(3), add="+")
+        self.bind("<Prior>", lambda e: self._scroll_and_break(-self._visible_rows()), add="+")
+        self.bind("<Next>", lambda e: self._scroll_and_break(self._visible_rows()), add="+")
+
+    # ---------------- Row Source ----------------
+    def set_source(self, count, fetch, total=None, first_page=None, growing=False):
+        """Switch to a new row source.
+
+        ``total`` and ``first_page`` may be supplied when they were already
+        computed elsewhere (e.g. on the DB worker) to skip the initial queries.
+        ``growing`` sources (``KeysetRows``) change their count as rows are
+        fetched, so it is read again after every render.
+        """
+        self._count = count
+        self._fetch = fetch
+        self._growing = growing
+        self.refresh(total, first_page)
+
+    def set_rows(self, rows):
+        rows = list(rows)
+        self.set_source(lambda: len(rows), lambda offset, limit: rows[offset:offset + limit])
+
+    def refresh(self, total=None, first_page=None):
+        self._pages.clear()
+        if first_page is not None:
+            self._pages[0] = list(first_page)
+        self._total = self._count() if total is None else total
+        self._offset = self._clamp(self._offset)
+        self._render()
+
+    @property
+    def total_rows(self):
+        return self._total
+
+    def _page(self, index):
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index]
+
+        rows = list(self._fetch(index * self.page_size, self.page_size))
+        self._pages[index] = rows
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return rows
+
+    def _window(self, start, stop):
+        rows = []
+        for index in range(start // self.page_size, (stop - 1) // self.page_size + 1):
+            page_start = index * self.page_size
+            page = self._page(index)
+            rows.extend(page[max(start - page_start, 0):stop - page_start])
+        return rows
+
+    # ---------------- Rendering ----------------
+    def _row_height(self):
+        style = ttk.Style(self)
+        height = style.lookup(self.cget("style") or "Treeview", "rowheight")
+        try:
+            return max(int(height), 1)
+        except (TypeError, ValueError):
+            return 20
+
+    def _visible_rows(self):
+        pixel_rows = (self.winfo_height() - 25) // self._row_height()
+        return max(int(self.cget("height")), pixel_rows, 1)
+
+    def _clamp(self, offset):
+        return max(0, min(offset, self._total - self._visible_rows()))
+
+    def _render(self):
+        visible = self._visible_rows()
+        stop = min(self._offset + visible + self.overscan, self._total)
+        rows = self._window(self._offset, stop) if stop > self._offset else []
+        if self._growing and self._count() != self._total:
+            # Fetching loaded another page or found the end
+            self._total = self._count()
+            offset = self._clamp(self._offset)
+            if offset != self._offset:
+                self._offset = offset
+                return self._render()
+
+        wanted = keyed_rows(rows, self.key)
+        deleted, edits, self.render_stats = plan_render(self._shown, wanted)
+        if deleted:
+            super().delete(*deleted)
+        for action, index, iid, values in edits:
+            if action == "insert":
+                super().insert("", index, iid=iid, values=values)
+            elif action == "move":
+                super().move(iid, "", index)
+            else:
+                super().item(iid, values=values)
+        self._shown = dict(wanted)
+
+        if self._yscrollcommand:
+            self._yscrollcommand(*self.yview())
+
+    # ---------------- Scrolling ----------------
+    def yview(self, *args):
+        if not args:
+            if not self._total:
+                return 0.0, 1.0
+            first = self._offset / self._total
+            last = min(self._offset + self._visible_rows(), self._total) / self._total
+            return first, last
+
+        if args[0] == "moveto":
+            self.yview_moveto(args[1])
+        elif args[0] == "scroll":
+            self.yview_scroll(args[1], args[2])
+
+    def yview_moveto(self, fraction):
+        self._scroll_to(int(float(fraction) * self._total))
+
+    def yview_scroll(self, number, what):
+        step = self._visible_rows() if what == "pages" else 1
+        self._scroll_to(self._offset + int(number) * step)
+
+    def _scroll_to(self, offset):
+        offset = self._clamp(offset)
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _scroll_and_break(self, rows):
+        self._scroll_to(self._offset + rows)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll_and_break(-3 if event.delta > 0 else 3)
+
+    # ---------------- Configuration ----------------
+    def configure(self, cnf=None, **kwargs):
+        if "yscrollcommand" in kwargs:
+            self._yscrollcommand = kwargs.pop("yscrollcommand")
+            if self._yscrollcommand:
+                self._yscrollcommand(*self.yview())
+        if cnf is None and not kwargs:
+            return super().configure()
+        return super().configure(cnf, **kwargs)
+
+    config = configure